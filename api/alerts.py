@@ -0,0 +1,289 @@
+"""
+EV alert rules, checked incrementally against each fresh opportunity set, with
+batched webhook delivery.
+
+A rule looks like "player props with EV above 4% whose best price is at
+DraftKings or FanDuel, more than 30 minutes before tipoff". Rules are indexed
+by market type and book, so an opportunity is only compared with the rules
+that could apply to it, cheapest threshold first. Only opportunities that are
+new or whose best price moved since the last set are checked at all.
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+from incremental import opportunity_key
+from metrics import metrics
+from poller import seconds_until
+
+# Opportunity fields included in every alert
+ALERT_FIELDS = ("event_id", "commence_time", "home_team", "away_team", "market_type", "team",
+                "line", "best_book", "best_odds", "ev_percentage", "markets")
+
+
+class AlertRule(NamedTuple):
+    """
+    One alert rule. markets holds market filter names ("all", "spreads",
+    "player_props", ...) or exact market types ("Player Points"); books is
+    None for any book; min_minutes_before_start is None for no time limit.
+    """
+    name: str
+    markets: Tuple[str, ...]
+    min_ev: float
+    books: Optional[FrozenSet[str]] = None
+    min_minutes_before_start: Optional[float] = None
+
+
+def parse_rule(spec, position=0):
+    """An AlertRule from its JSON form; raises ValueError if it is malformed."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Alert rule {position} must be an object")
+    markets = spec.get("markets", spec.get("market", "all"))
+    if isinstance(markets, str):
+        markets = [markets]
+    books = spec.get("books")
+    if isinstance(books, str):
+        books = [books]
+    try:
+        min_ev = float(spec.get("min_ev", 0))
+        minutes = spec.get("min_minutes_before_start")
+        minutes = float(minutes) if minutes is not None else None
+    except (TypeError, ValueError):
+        raise ValueError(f"Alert rule {position}: min_ev and min_minutes_before_start must be numbers")
+    return AlertRule(
+        name=str(spec.get("name") or f"rule-{position}"),
+        markets=tuple(markets) or ("all",),
+        min_ev=min_ev,
+        books=frozenset(books) if books else None,
+        min_minutes_before_start=minutes,
+    )
+
+
+def load_rules(path):
+    """Alert rules from a JSON file holding a list of rule objects."""
+    with open(path) as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{path} must hold a list of alert rules")
+    rules = [parse_rule(spec, position) for position, spec in enumerate(specs)]
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Alert rule names in {path} must be unique")
+    return rules
+
+
+class AlertRuleIndex:
+    """
+    Rules indexed by (market type, book). The candidate list for each pair
+    is worked out the first time it is seen and kept sorted by min_ev, so a
+    lookup is one dict access and a scan that stops at the first threshold
+    the opportunity doesn't clear.
+
+    market_filters maps filter names to predicates on a market type, as in
+    EVResultSet.MARKET_FILTERS; "all" and exact market types always work.
+    """
+
+    def __init__(self, rules, market_filters=None):
+        self.rules = list(rules)
+        self.market_filters = market_filters or {}
+        self._by_market = {}
+        for rule in self.rules:
+            for market in rule.markets:
+                self._by_market.setdefault(market, []).append(rule)
+        self._candidates = {}
+
+    def candidates(self, market_type, book):
+        key = (market_type, book)
+        rules = self._candidates.get(key)
+        if rules is None:
+            markets = ["all", market_type]
+            markets += [name for name, matches in self.market_filters.items() if matches(market_type)]
+            found = {}
+            for market in markets:
+                for rule in self._by_market.get(market, ()):
+                    if rule.books is None or book in rule.books:
+                        found[rule.name] = rule
+            rules = self._candidates[key] = sorted(found.values(), key=lambda rule: rule.min_ev)
+        return rules
+
+    def match(self, opportunity, now=None):
+        """Rules the opportunity satisfies, as a list."""
+        ev_percentage = opportunity.get("ev_percentage") or 0
+        matched = []
+        remaining = None
+        for rule in self.candidates(opportunity.get("market_type", ""), opportunity.get("best_book")):
+            if ev_percentage <= rule.min_ev:
+                break
+            if rule.min_minutes_before_start is not None:
+                if remaining is None:
+                    remaining = seconds_until(opportunity.get("commence_time"), now)
+                if remaining <= rule.min_minutes_before_start * 60:
+                    continue
+            matched.append(rule)
+        return matched
+
+
+def alert_payload(rule, opportunity):
+    alert = {field: opportunity.get(field) for field in ALERT_FIELDS}
+    alert["rule"] = rule.name
+    alert["key"] = opportunity_key(opportunity)
+    return alert
+
+
+class AlertEngine:
+    """
+    Checks each new opportunity set against the rules and hands new matches
+    to notify(alerts).
+
+    Only opportunities that are new, or whose best book, price or EV changed
+    since the previous set, are looked up in the rule index. An alert fires
+    when an opportunity starts matching a rule. It doesn't fire again while
+    the opportunity keeps matching, only after it stops matching (or drops
+    off the board) and then matches again.
+    """
+
+    def __init__(self, rules, market_filters=None, notify=None):
+        self.index = AlertRuleIndex(rules, market_filters)
+        self.notify = notify
+        self._signatures = {}
+        self._matched = {}
+        self._lock = threading.Lock()
+        self.stats = {"opportunities_checked": 0, "alerts_fired": 0}
+
+    def process(self, opportunities, now=None):
+        """Check the opportunities that changed since the last call; returns the alerts fired."""
+        now = now if now is not None else time.time()
+        alerts = []
+        with self._lock:
+            signatures = {}
+            checked = 0
+            for opportunity in opportunities:
+                key = opportunity_key(opportunity)
+                signature = (opportunity.get("best_book"), opportunity.get("best_odds"),
+                             opportunity.get("ev_percentage"))
+                signatures[key] = signature
+                if self._signatures.get(key) == signature:
+                    continue
+                checked += 1
+                previous = self._matched.get(key, ())
+                matched = self.index.match(opportunity, now)
+                alerts.extend(alert_payload(rule, opportunity) for rule in matched if rule.name not in previous)
+                if matched:
+                    self._matched[key] = frozenset(rule.name for rule in matched)
+                else:
+                    self._matched.pop(key, None)
+            for key in self._signatures:
+                if key not in signatures:
+                    self._matched.pop(key, None)
+            self._signatures = signatures
+            self.stats["opportunities_checked"] += checked
+            self.stats["alerts_fired"] += len(alerts)
+        if alerts and self.notify is not None:
+            self.notify(alerts)
+        return alerts
+
+
+class WebhookSender:
+    """
+    Delivers alerts to a webhook as JSON batches ({"alerts": [...]}).
+
+    send() only queues. A background thread waits until no alert has arrived
+    for `debounce` seconds (but never more than max_delay after the first
+    one), then POSTs the queue in batches of at most max_batch. If the
+    webhook can't keep up, the oldest alerts beyond max_queue are dropped.
+
+    Batches go through one keep-alive requests.Session. Connection failures
+    and 429/503 responses (which mean the batch wasn't taken) are retried up
+    to max_retries times with backoff; other errors drop the batch.
+    """
+
+    RETRY_STATUSES = frozenset({429, 503})
+
+    def __init__(self, url, debounce=2.0, max_delay=10.0, max_batch=50, max_queue=1000, timeout=(3.05, 5),
+                 max_retries=2, backoff_factor=0.5):
+        self.url = url
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session = None
+        self._queue = deque(maxlen=max_queue)
+        self._first_at = None
+        self._last_at = None
+        self._condition = threading.Condition()
+        self._worker = None
+        self.stats = {"sent": 0, "failed": 0, "dropped": 0}
+
+    @property
+    def session(self):
+        """The sender's session, created (and requests imported) on first use."""
+        with self._condition:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                # read=0: a batch that may have been delivered is never sent twice
+                retry = Retry(total=self.max_retries, read=0, backoff_factor=self.backoff_factor,
+                              status_forcelist=self.RETRY_STATUSES, allowed_methods=frozenset({"POST"}),
+                              raise_on_status=False)
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retry))
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retry))
+                self._session = session
+            return self._session
+
+    def send(self, alerts):
+        with self._condition:
+            overflow = len(self._queue) + len(alerts) - self._queue.maxlen
+            if overflow > 0:
+                self.stats["dropped"] += overflow
+            self._queue.extend(alerts)
+            now = time.monotonic()
+            if self._first_at is None:
+                self._first_at = now
+            self._last_at = now
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                # Debounce: let a burst of alerts from one poll settle into one request
+                while True:
+                    now = time.monotonic()
+                    deadline = min(self._last_at + self.debounce, self._first_at + self.max_delay)
+                    if now >= deadline:
+                        break
+                    self._condition.wait(deadline - now)
+                pending = list(self._queue)
+                self._queue.clear()
+                self._first_at = self._last_at = None
+            for start in range(0, len(pending), self.max_batch):
+                self._post(pending[start:start + self.max_batch])
+
+    def _post(self, batch):
+        import requests  # deferred import, like the odds client's session
+
+        try:
+            response = self.session.post(self.url, json={"alerts": batch}, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error sending {len(batch)} EV alerts: {str(e)}")
+            self.stats["failed"] += len(batch)
+            metrics.inc("ev_alert_webhook_requests_total", labels={"result": "error"})
+            return
+        self.stats["sent"] += len(batch)
+        metrics.inc("ev_alert_webhook_requests_total", labels={"result": "ok"})
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
@@ -0,0 +1,125 @@
+"""
+Arbitrage scanner: best price per outcome across books, for moneylines,
+spreads (matched by point), totals and player-prop over/unders.
+
+Every quoted price is visited once and only the best price per outcome is
+kept, so a scan is linear in books x outcomes.
+"""
+from models import prop_label
+from odds_math import american_to_decimal
+
+MARKET_TYPES = {"h2h": "Moneyline", "spreads": "Spread", "totals": "Total"}
+
+
+def arb_key(arb):
+    """Stable identity key for an arb (event, market, player and line), as a string."""
+    return "|".join(str(arb.get(part)) for part in ("event_id", "market", "player", "line"))
+
+
+def stake_split(decimal_odds, total_stake=100.0):
+    """
+    Stakes on each outcome that return the same payout whichever one wins:
+    each stake is proportional to that outcome's implied probability.
+    """
+    implied = [1 / odds for odds in decimal_odds]
+    implied_total = sum(implied)
+    return [total_stake * p / implied_total for p in implied]
+
+
+def _offer(best, group, outcome, price, book, point=None):
+    """Keep the best price seen so far for one outcome of one market group."""
+    if not price:
+        return
+    decimal_odds = american_to_decimal(price)
+    outcomes = best.setdefault(group, {})
+    current = outcomes.get(outcome)
+    if current is None or decimal_odds > current[0]:
+        outcomes[outcome] = (decimal_odds, price, book, point)
+
+
+def _collect_standard(event, best):
+    home_team = event.get("home_team")
+    for bookmaker in event.get("bookmakers", []):
+        book = bookmaker.get("title")
+        for market in bookmaker.get("markets", []):
+            market_key = market.get("key")
+            if market_key not in MARKET_TYPES:
+                continue
+            for outcome in market.get("outcomes", []):
+                name, point = outcome.get("name"), outcome.get("point")
+                if market_key == "h2h":
+                    line = None
+                elif point is None:
+                    continue
+                elif market_key == "spreads":
+                    # Both sides of a spread are grouped under the home team's point
+                    line = point if name == home_team else -point
+                else:
+                    line = point
+                _offer(best, (market_key, None, line), name, outcome.get("price"), book, point)
+
+
+def _collect_props(props_data, best):
+    for prop_type, players in props_data.items():
+        for prop in players.values():
+            group = (f"player_{prop_type}", prop.get("player"), prop.get("line"))
+            for book, book_data in prop.get("books", {}).items():
+                _offer(best, group, "Over", book_data.get("over_price"), book, prop.get("line"))
+                _offer(best, group, "Under", book_data.get("under_price"), book, prop.get("line"))
+
+
+def find_arbitrage(standard_events, props_by_event=None, min_profit=0.0, total_stake=100.0):
+    """
+    Find arbitrage opportunities across books.
+
+    Args:
+        standard_events: Raw payload of the sport odds endpoint (h2h, spreads, totals)
+        props_by_event: Dictionary of {event_id: formatted props}
+        min_profit: Only report arbs returning more than this percentage
+        total_stake: Total amount split across the legs of each arb
+
+    Returns:
+        List of arb dictionaries, most profitable first. Each one has its legs
+        (outcome, book, price, point and stake) and the guaranteed profit.
+    """
+    props_by_event = props_by_event or {}
+    arbs = []
+    for event in standard_events:
+        event_id = event.get("id")
+        best = {}
+        _collect_standard(event, best)
+        _collect_props(props_by_event.get(event_id) or {}, best)
+
+        for (market_key, player, line), outcomes in best.items():
+            if len(outcomes) < 2:
+                continue
+            implied_total = sum(1 / offer[0] for offer in outcomes.values())
+            if implied_total >= 1:
+                continue
+            # Filtered on the rounded figure that is reported (and that /api/arbs filters snapshots on)
+            profit_percentage = round((1 / implied_total - 1) * 100, 2)
+            if profit_percentage <= min_profit:
+                continue
+            names = list(outcomes)
+            stakes = stake_split([outcomes[name][0] for name in names], total_stake)
+            arbs.append({
+                "event_id": event_id,
+                "commence_time": event.get("commence_time"),
+                "home_team": event.get("home_team"),
+                "away_team": event.get("away_team"),
+                "market": market_key,
+                "market_type": MARKET_TYPES.get(market_key) or f"Player {prop_label(market_key.split('_', 1)[1])}",
+                "player": player,
+                "line": line,
+                "legs": [
+                    {"outcome": name, "book": outcomes[name][2], "price": outcomes[name][1],
+                     "point": outcomes[name][3], "stake": round(stake, 2)}
+                    for name, stake in zip(names, stakes)
+                ],
+                "implied_total": round(implied_total, 4),
+                "profit_percentage": profit_percentage,
+                "payout": round(total_stake / implied_total, 2),
+            })
+
+    arbs.sort(key=lambda arb: arb["profit_percentage"], reverse=True)
+    return arbs
@@ -0,0 +1,470 @@
+"""
+Closing-line-value backtest of the EV scanner.
+
+Replays recorded Odds API snapshots in time order (fixture stores written with
+ODDS_API_MODE=record, as for batch_scan.py). At every snapshot it runs the
+app's EV detection over the games that haven't started yet. Each flagged price
+is then compared with the closing line: that book's last price for the same
+outcome and line before commence_time.
+
+    python api/backtest.py archive/
+    python api/backtest.py archive/ --min-ev 2 --json clv.json --picks picks.csv
+
+Reports, overall and by book, market type and EV tier:
+  picks         distinct flagged prices (a price flagged again in later
+                snapshots counts once, at the first snapshot that flagged it)
+  closed        picks whose book still quoted that outcome and line before the start
+  beat_close    share of closed picks priced better than the close (the hit rate)
+  avg_clv       average closing line value, (pick decimal / close decimal - 1) * 100
+  avg_ev        average EV when flagged
+  avg_close_ev  average EV of the pick price against the closing market
+                average, computed the way the scanner computes EV
+
+Every quoted price goes into one columnar table. Closing lines, CLV and the
+groupings are then numpy operations over the whole season, and the EV scan
+runs in large batches through ev_engine. Markets whose prices haven't moved
+since the previous snapshot are not re-evaluated.
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from batch_scan import APP_ONLY_SETTINGS, ChunkedWriter, FORMATS, snapshot_dirs
+from fixtures import FixtureStore
+from history import flatten_odds_payload
+from incremental import market_key
+from models import prop_label, prop_type_for_market
+from poller import seconds_until
+from props_stream import parse_props_payload
+
+# EV tiers, as highlighted on the /ev page
+EV_TIERS = ((5, "high (>5%)"), (2, "medium (2-5%)"))
+LOW_TIER = "low (<=2%)"
+GROUPS = ("book", "market_type", "ev_tier")
+
+PICK_COLUMNS = (
+    ("captured_at", "float"), ("event_id", "string"), ("commence_time", "string"),
+    ("market_type", "string"), ("team", "string"), ("line", "string"), ("book", "string"),
+    ("odds", "int"), ("ev_percentage", "float"), ("ev_tier", "string"), ("closing_odds", "int"),
+    ("clv_percentage", "float"), ("beat_close", "int"), ("closing_ev_percentage", "float"),
+)
+
+
+def classify_request(path):
+    """("standard", sport, None) or ("props", sport, event_id) for a recorded odds request path, else None."""
+    parts = path.strip("/").split("/")
+    if len(parts) == 3 and parts[0] == "sports" and parts[2] == "odds":
+        return "standard", parts[1], None
+    if len(parts) == 5 and parts[0] == "sports" and parts[2] == "events" and parts[4] == "odds":
+        return "props", parts[1], parts[3]
+    return None
+
+
+def event_start(commence_time):
+    """Start of an event as a Unix timestamp (inf if unknown)."""
+    return seconds_until(commence_time, 0)
+
+
+def iter_season(directories):
+    """Records of every fixture store, merged into one (captured_at, path, params, body) stream, oldest first."""
+    streams = [FixtureStore(directory).iter_records() for directory in directories]
+    return heapq.merge(*streams, key=lambda record: record[0])
+
+
+class PriceTable:
+    """
+    Every price seen during the replay, stored as columns.
+
+    A price key is (event, market, selection, player, point, book). Keys get
+    integer ids; an outcome is a key without its book, so all books quoting
+    the same side of the same line share an outcome id.
+    """
+
+    def __init__(self):
+        self.key_ids = {}
+        self.outcome_ids = {}
+        self.key_outcome = array("q")
+        self.key_start = array("d")
+        # market type shown by the scanner ("Player Points") -> market key ("player_points")
+        self.prop_markets = {}
+        self._rows_key = array("q")
+        self._rows_time = array("d")
+        self._rows_price = array("d")
+        self._starts = {}
+
+    def __len__(self):
+        return len(self._rows_key)
+
+    def add(self, rows):
+        for captured_at, _, event_id, commence_time, market, selection, player, point, book, price in rows:
+            key = (event_id, market, selection, player, None if point is None else float(point), book)
+            key_id = self.key_ids.get(key)
+            if key_id is None:
+                key_id = self._add_key(key, commence_time)
+            self._rows_key.append(key_id)
+            self._rows_time.append(captured_at)
+            self._rows_price.append(price)
+
+    def _add_key(self, key, commence_time):
+        key_id = self.key_ids[key] = len(self.key_ids)
+        outcome = key[:5]
+        outcome_id = self.outcome_ids.get(outcome)
+        if outcome_id is None:
+            outcome_id = self.outcome_ids[outcome] = len(self.outcome_ids)
+        self.key_outcome.append(outcome_id)
+        start = self._starts.get(key[0])
+        if start is None:
+            start = self._starts[key[0]] = event_start(commence_time)
+        self.key_start.append(start)
+        market = key[1]
+        if market.startswith("player_"):
+            self.prop_markets.setdefault(f"Player {prop_label(prop_type_for_market(market))}", market)
+        return key_id
+
+    def pick_key(self, details, book):
+        """Price key id of a scanner market's price at one book, or None if it was never quoted."""
+        line = str(details["line"])
+        try:
+            if details["market_type"] == "Spread":
+                key = (details["event_id"], "spreads", details["team"], "", float(line), book)
+            else:
+                market = self.prop_markets.get(details["market_type"])
+                side, _, point = line.partition(" ")
+                key = (details["event_id"], market, side, details["team"], float(point), book)
+        except ValueError:  # no numeric line to look up
+            return None
+        return self.key_ids.get(key)
+
+    def closing_prices(self):
+        """Last price of every key captured before its event started (nan if none), indexed by key id."""
+        keys = np.asarray(self._rows_key)
+        times = np.asarray(self._rows_time)
+        prices = np.asarray(self._rows_price)
+        starts = np.asarray(self.key_start)
+        before = times < starts[keys]
+        keys, times, prices = keys[before], times[before], prices[before]
+        # Sort by key, then time; the last row of each key's run is its close
+        order = np.lexsort((times, keys))
+        keys, prices = keys[order], prices[order]
+        last = np.flatnonzero(np.append(keys[1:] != keys[:-1], True)) if len(keys) else keys
+        closing = np.full(len(self.key_ids), np.nan)
+        closing[keys[last]] = prices[last]
+        return closing
+
+
+class PickLog:
+    """Flagged prices as parallel columns, one entry per distinct (price key, price)."""
+
+    def __init__(self):
+        self.captured_at = array("d")
+        self.key_id = array("q")
+        self.odds = array("d")
+        self.ev_percentage = array("d")
+        self.details = []
+        self.books = []
+        self._seen = set()
+
+    def __len__(self):
+        return len(self.key_id)
+
+    def add(self, captured_at, key_id, odds, ev_percentage, details, book):
+        if (key_id, odds) in self._seen:
+            return
+        self._seen.add((key_id, odds))
+        self.captured_at.append(captured_at)
+        self.key_id.append(key_id)
+        self.odds.append(odds)
+        self.ev_percentage.append(ev_percentage)
+        self.details.append(details)
+        self.books.append(book)
+
+
+class Backtest:
+    """
+    Replays records in time order and collects the picks the EV scan flags.
+
+    A snapshot is the slate as of a standard odds recording plus the props
+    recorded after it. It is scanned when the next standard recording arrives
+    (and at the end), at the time of the last record it includes, so only
+    prices known by then are used. Events that have started are left out.
+    """
+
+    def __init__(self, min_ev=0, chunk_size=50000):
+        import index
+
+        self.index = index
+        self.min_ev = min_ev
+        self.chunk_size = chunk_size
+        self.prices = PriceTable()
+        self.picks = PickLog()
+        self.stats = {"records": 0, "snapshots": 0, "markets_evaluated": 0, "markets_skipped": 0}
+        self._standard = {}
+        self._props = {}
+        self._props_start = {}
+        self._previous = {}
+        self._pending = []
+        self._last_at = None
+        self._dirty = False
+
+    def run(self, records):
+        for captured_at, path, params, body in records:
+            request = classify_request(path)
+            if request is None:
+                continue
+            kind, sport, event_id = request
+            if kind == "standard" and self._dirty:
+                self.scan()
+            self.stats["records"] += 1
+            self._last_at = captured_at
+            self.prices.add(flatten_odds_payload(body, captured_at, sport))
+            if kind == "standard":
+                self._standard[sport] = body
+            else:
+                self._props[event_id] = parse_props_payload(body, self.index.props_markets_for).props
+                self._props_start[event_id] = event_start(body.get("commence_time"))
+            self._dirty = True
+        if self._dirty:
+            self.scan()
+        self.flush()
+        return self
+
+    def scan(self):
+        """Queue every market of the current snapshot whose prices moved since the last one."""
+        now = self._last_at
+        self._dirty = False
+        self.stats["snapshots"] += 1
+        for event_id in [event_id for event_id, start in self._props_start.items() if start <= now]:
+            del self._props[event_id], self._props_start[event_id]
+        upcoming = [event for events in self._standard.values() for event in events
+                    if event_start(event.get("commence_time")) > now]
+        markets = self.index.collect_ev_markets(self.index.process_events(upcoming), self._props)
+        current = {}
+        for details, odds_by_book in markets:
+            key = market_key(details)
+            inputs = tuple(odds_by_book.items())
+            current[key] = inputs
+            if self._previous.get(key) == inputs:
+                self.stats["markets_skipped"] += 1
+                continue
+            self._pending.append((now, details, odds_by_book))
+        self._previous = current
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Evaluate the queued markets in one batch and log the ones flagged as +EV."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        from ev_engine import build_odds_matrix, evaluate_odds_matrix
+
+        odds, mask, books, parsed = build_odds_matrix([odds_by_book for _, _, odds_by_book in pending])
+        stats = evaluate_odds_matrix(odds, mask)
+        self.stats["markets_evaluated"] += len(pending)
+        ev_percentage = stats["ev_percentage"]
+        # Loose cut first; the exact test uses round() like calculate_positive_ev
+        candidates = np.flatnonzero((stats["valid_books"] > 1) & (ev_percentage > self.min_ev - 0.01))
+        best_slot = stats["best_slot"]
+        for i in candidates.tolist():
+            ev = round(float(ev_percentage[i]), 2)
+            if ev <= self.min_ev:
+                continue
+            captured_at, details, _ = pending[i]
+            slot = int(best_slot[i])
+            book = books[i][slot]
+            key_id = self.prices.pick_key(details, book)
+            if key_id is not None:
+                self.picks.add(captured_at, key_id, parsed[i][slot], ev, details, book)
+
+
+def ev_tiers(ev_percentage):
+    labels = np.full(len(ev_percentage), LOW_TIER, dtype=object)
+    for threshold, label in reversed(EV_TIERS):
+        labels[ev_percentage > threshold] = label
+    return labels
+
+
+def closing_line_value(backtest):
+    """
+    Per-pick closing results as a dict of arrays (plus the pick labels).
+
+    closing_odds, clv_percentage and closing_ev_percentage are nan for picks
+    without a closing price (closing_ev_percentage also when fewer than two
+    books closed the outcome).
+    """
+    from ev_engine import american_to_decimal, implied_probability
+
+    prices, picks = backtest.prices, backtest.picks
+    key_id = np.asarray(picks.key_id)
+    odds = np.asarray(picks.odds)
+    ev_percentage = np.asarray(picks.ev_percentage)
+
+    closing = prices.closing_prices()
+    closing_odds = closing[key_id]
+    closed = ~np.isnan(closing_odds)
+    pick_decimal = american_to_decimal(odds)
+    close_decimal = american_to_decimal(np.where(closed, closing_odds, 100.0))
+    clv = np.where(closed, (pick_decimal / close_decimal - 1) * 100, np.nan)
+
+    # Closing market average per outcome, over every book that closed it
+    key_outcome = np.asarray(prices.key_outcome)
+    quoted = ~np.isnan(closing)
+    n_outcomes = len(prices.outcome_ids)
+    probability_sum = np.bincount(key_outcome[quoted], weights=implied_probability(closing[quoted]),
+                                  minlength=n_outcomes)
+    books_closed = np.bincount(key_outcome[quoted], minlength=n_outcomes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average_probability = np.where(books_closed > 1, probability_sum / books_closed, np.nan)
+    closing_ev = (pick_decimal * average_probability[key_outcome[key_id]] - 1) * 100
+    closing_ev = np.where(closed, closing_ev, np.nan)
+
+    return {
+        "captured_at": np.asarray(picks.captured_at),
+        "odds": odds,
+        "ev_percentage": ev_percentage,
+        "closing_odds": closing_odds,
+        "closed": closed,
+        "clv_percentage": clv,
+        "beat_close": closed & (pick_decimal > close_decimal),
+        "closing_ev_percentage": closing_ev,
+        "book": np.array(picks.books, dtype=object),
+        "market_type": np.array([details["market_type"] for details in picks.details], dtype=object),
+        "ev_tier": ev_tiers(ev_percentage),
+    }
+
+
+def summarize(results, labels=None):
+    """Summary rows ({"group", "picks", "closed", "beat_close", "avg_clv", "avg_ev", "avg_close_ev"}) per label."""
+    n = len(results["odds"])
+    if labels is None:
+        names, inverse = np.array(["all"], dtype=object), np.zeros(n, dtype=np.int64)
+    elif n:
+        names, inverse = np.unique(labels.astype(str), return_inverse=True)
+    else:
+        return []
+    size = len(names)
+
+    def total(values):
+        return np.bincount(inverse, weights=values, minlength=size)
+
+    picks = np.bincount(inverse, minlength=size)
+    closed = total(results["closed"].astype(np.float64))
+    with_close_ev = ~np.isnan(results["closing_ev_percentage"])
+    close_ev_count = total(with_close_ev.astype(np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns = {
+            "picks": picks,
+            "closed": closed,
+            "beat_close": total(results["beat_close"].astype(np.float64)) / closed * 100,
+            "avg_clv": total(np.nan_to_num(results["clv_percentage"])) / closed,
+            "avg_ev": total(results["ev_percentage"]) / picks,
+            "avg_close_ev": total(np.where(with_close_ev, results["closing_ev_percentage"], 0.0)) / close_ev_count,
+        }
+    rows = []
+    for i, name in enumerate(names.tolist()):
+        row = {"group": name}
+        for column, values in columns.items():
+            value = values[i].item()
+            row[column] = int(value) if column in ("picks", "closed") else (
+                None if np.isnan(value) else round(value, 2))
+        rows.append(row)
+    return rows
+
+
+def report(results):
+    """The summary overall and by every grouping."""
+    summary = {"overall": summarize(results)}
+    for group in GROUPS:
+        summary[group] = summarize(results, results[group])
+    return summary
+
+
+def pick_rows(backtest, results):
+    for i, (details, book) in enumerate(zip(backtest.picks.details, backtest.picks.books)):
+        closed = bool(results["closed"][i])
+        closing_ev = results["closing_ev_percentage"][i]
+        yield {
+            **{field: details.get(field) for field in ("event_id", "commence_time", "market_type", "team", "line")},
+            "captured_at": float(results["captured_at"][i]),
+            "book": book,
+            "odds": int(results["odds"][i]),
+            "ev_percentage": float(results["ev_percentage"][i]),
+            "ev_tier": results["ev_tier"][i],
+            "closing_odds": int(results["closing_odds"][i]) if closed else None,
+            "clv_percentage": round(float(results["clv_percentage"][i]), 4) if closed else None,
+            "beat_close": int(results["beat_close"][i]) if closed else None,
+            "closing_ev_percentage": None if np.isnan(closing_ev) else round(float(closing_ev), 4),
+        }
+
+
+def print_report(summary):
+    header = f"{'group':<24} {'picks':>7} {'closed':>7} {'beat close %':>13} {'avg CLV %':>10} {'avg EV %':>9} {'close EV %':>11}"
+
+    def cell(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    for section, rows in summary.items():
+        print(f"\n{section}")
+        print(header)
+        for row in rows:
+            print(f"{str(row['group'])[:24]:<24} {row['picks']:>7} {row['closed']:>7} {cell(row['beat_close'], 13)} "
+                  f"{cell(row['avg_clv'], 10)} {cell(row['avg_ev'], 9)} {cell(row['avg_close_ev'], 11)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("snapshots", nargs="+", metavar="DIR",
+                        help="Fixture stores (or directories of them), replayed together in time order")
+    parser.add_argument("--min-ev", type=float, default=0, help="Only count picks above this EV %%")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Markets per EV batch")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    parser.add_argument("--picks", help="Write every pick to this .csv, .jsonl or .parquet file")
+    args = parser.parse_args(argv)
+
+    os.environ["ODDS_POLLER_ENABLED"] = "false"
+    for setting in APP_ONLY_SETTINGS:
+        os.environ.pop(setting, None)
+
+    directories = snapshot_dirs(args.snapshots)
+    if not directories:
+        sys.exit(f"No recorded snapshots found in {', '.join(args.snapshots)}")
+    picks_writer = None
+    if args.picks:
+        output_format = os.path.splitext(args.picks)[1].lstrip(".")
+        if output_format not in FORMATS:
+            sys.exit(f"--picks must end in one of: {', '.join('.' + name for name in FORMATS)}")
+        try:
+            picks_writer = ChunkedWriter(args.picks, output_format, PICK_COLUMNS)
+        except RuntimeError as e:
+            sys.exit(str(e))
+
+    start = time.perf_counter()
+    backtest = Backtest(args.min_ev, args.chunk_size).run(iter_season(directories))
+    results = closing_line_value(backtest)
+    summary = report(results)
+    elapsed = time.perf_counter() - start
+
+    stats = backtest.stats
+    print(f"Replayed {stats['records']} recordings ({stats['snapshots']} snapshots, "
+          f"{len(backtest.prices)} prices) in {elapsed:.1f}s")
+    print(f"  {stats['markets_evaluated']} markets evaluated, {stats['markets_skipped']} unchanged, "
+          f"{len(backtest.picks)} picks")
+    print_report(summary)
+
+    if picks_writer is not None:
+        picks_writer.write(pick_rows(backtest, results))
+        picks_writer.close()
+        print(f"\n{picks_writer.rows_written} picks -> {picks_writer.path}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"stats": stats, "summary": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Headless batch scanner.
+
+Runs the same pipeline as the web app (process_events, props ingestion and
+the EV scan) with no web server, and writes the results as CSV, JSONL or
+Parquet for offline analysis.
+
+Without --snapshots it scans the live odds once, through the Odds API client
+configured by the usual environment variables. With --snapshots it scans
+recorded fixture stores instead (see ODDS_API_MODE=record). Each DIR is
+either one store or a directory of stores, one per saved snapshot. Snapshots
+are scanned in parallel worker processes, and rows are written a chunk at a
+time, so a large archive never has to fit in memory.
+
+    python api/batch_scan.py --out results/
+    python api/batch_scan.py --snapshots archive/ --format parquet --workers 8 --out results/
+
+Writes <out>/opportunities.<format> (one row per +EV opportunity) and, unless
+--no-lines, <out>/lines.<format> (every price quoted, as in the odds history
+store). Parquet output needs the optional pyarrow package.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for --format parquet
+    pyarrow = None
+
+from fixtures import FixtureStore
+from history import COLUMNS as LINE_FIELDS, flatten_odds_payload
+from props_stream import parse_props_payload
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+# (name, kind) of every output column. "json" columns hold nested dicts,
+# written as JSON text in CSV and Parquet.
+OPPORTUNITY_COLUMNS = (
+    ("snapshot", "string"), ("captured_at", "float"), ("event_id", "string"),
+    ("commence_time", "string"), ("home_team", "string"), ("away_team", "string"),
+    ("market_type", "string"), ("team", "string"), ("line", "string"),
+    ("best_book", "string"), ("best_odds", "int"), ("ev_percentage", "float"),
+    ("avg_implied_probability", "float"), ("avg_american_odds", "int"), ("odds_variance", "float"),
+    ("markets", "int"), ("all_odds", "json"), ("implied_probabilities", "json"),
+    ("individual_ev", "json"), ("fair_odds", "json"),
+)
+LINE_KINDS = {"captured_at": "float", "point": "float", "price": "int"}
+LINE_COLUMNS = (("snapshot", "string"),) + tuple((name, LINE_KINDS.get(name, "string")) for name in LINE_FIELDS)
+
+# Settings that make sense for the web app but not for a one-off scan
+APP_ONLY_SETTINGS = ("SHARED_SNAPSHOT_PATH", "COLD_START_SNAPSHOT_PATH", "ALERT_RULES_PATH", "ODDS_HISTORY_PATH")
+
+
+class ChunkedWriter:
+    """Buffers rows and appends them to one CSV, JSONL or Parquet file chunk_size rows at a time."""
+
+    def __init__(self, path, output_format, columns, chunk_size=10000):
+        if output_format == "parquet" and pyarrow is None:
+            raise RuntimeError("Parquet output needs the pyarrow package (pip install pyarrow)")
+        self.path = path
+        self.format = output_format
+        self.names = [name for name, _ in columns]
+        self.json_columns = {name for name, kind in columns if kind == "json"}
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._buffer = []
+        self._file = None
+        self._writer = None
+        if output_format == "parquet":
+            types = {"string": pyarrow.string(), "float": pyarrow.float64(), "int": pyarrow.int64(),
+                     "json": pyarrow.string()}
+            self._schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+
+    def write(self, rows):
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        rows, self._buffer = self._buffer, []
+        self._open()
+        if not rows:
+            return
+        if self.format == "jsonl":
+            for row in rows:
+                self._file.write(json.dumps({name: row.get(name) for name in self.names}) + "\n")
+        elif self.format == "csv":
+            self._writer.writerows([self._cell(row, name) for name in self.names] for row in rows)
+        else:
+            columns = {name: [self._cell(row, name) for row in rows] for name in self.names}
+            self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self._schema))
+        self.rows_written += len(rows)
+
+    def close(self):
+        self.flush()
+        if self.format == "parquet":
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def _open(self):
+        if self._file is not None or self._writer is not None:
+            return
+        if self.format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+            return
+        self._file = open(self.path, "w", newline="" if self.format == "csv" else None)
+        if self.format == "csv":
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.names)
+
+    def _cell(self, row, name):
+        value = row.get(name)
+        if name in self.json_columns and value is not None:
+            return json.dumps(value)
+        return value
+
+
+def is_fixture_store(directory):
+    """Whether directory holds recordings (<request slug>/<captured_at>.json)."""
+    for slug in os.listdir(directory):
+        path = os.path.join(directory, slug)
+        if os.path.isdir(path) and any(name.endswith(".json") for name in os.listdir(path)):
+            return True
+    return False
+
+
+def snapshot_dirs(roots):
+    """Every fixture store among roots and their immediate subdirectories, in name order."""
+    found = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        if is_fixture_store(root):
+            found.append(root)
+            continue
+        children = sorted(os.path.join(root, name) for name in os.listdir(root))
+        found.extend(path for path in children if os.path.isdir(path) and is_fixture_store(path))
+    return found
+
+
+def scan_snapshot(name, load, min_ev=0, with_lines=True):
+    """
+    Run the pipeline over one snapshot.
+
+    Args:
+        name: Snapshot name, written into every row
+        load: Callable(path, params) returning (captured_at, body) for a
+            request, from a recording or the live API
+        min_ev: Only keep opportunities with EV above this percentage
+        with_lines: Also return every quoted price as a line row
+
+    Returns:
+        (opportunity rows, line rows)
+    """
+    import index
+
+    standard_events = []
+    props_by_event = {}
+    lines = []
+    captured_at = None
+
+    def load_props(sport, event_id):
+        try:
+            return load(*index.props_request(event_id, sport))
+        except Exception as e:
+            print(f"{name}: no props for event {event_id}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=index.PROPS_FETCH_WORKERS) as executor:
+        for sport in index.SPORTS:
+            try:
+                standard_at, events = load(*index.standard_request(sport))
+            except Exception as e:
+                print(f"{name}: no {sport} odds: {str(e)}")
+                continue
+            captured_at = max(captured_at or standard_at, standard_at)
+            standard_events.extend(events)
+            if with_lines:
+                lines.extend(flatten_odds_payload(events, standard_at, sport))
+            if not index.props_markets_for(sport):
+                continue
+            event_ids = [event.get("id") for event in events]
+            for event_id, loaded in zip(event_ids, executor.map(load_props, [sport] * len(event_ids), event_ids)):
+                if loaded is None:
+                    continue
+                props_at, payload = loaded
+                if with_lines:
+                    lines.extend(flatten_odds_payload(payload, props_at, sport))
+                props_by_event[event_id] = parse_props_payload(payload, index.props_markets_for).props
+
+    events_data = index.process_events(standard_events)
+    opportunities = index.find_ev_opportunities(events_data, min_ev, props_by_event)
+    opportunity_rows = [{**opportunity, "snapshot": name, "captured_at": captured_at} for opportunity in opportunities]
+    line_rows = [{"snapshot": name, **dict(zip(LINE_FIELDS, line))} for line in lines]
+    return opportunity_rows, line_rows
+
+
+def scan_fixture_store(directory, min_ev=0, with_lines=True):
+    """scan_snapshot over the newest recordings in one fixture store (run in a worker process)."""
+    store = FixtureStore(directory)
+
+    def load(path, params):
+        record = store.latest_record(path, params)
+        return record["captured_at"], record["body"]
+
+    return scan_snapshot(os.path.basename(os.path.normpath(directory)), load, min_ev, with_lines)
+
+
+def scan_live(min_ev=0, with_lines=True):
+    """scan_snapshot over the odds fetched from the API right now."""
+    import index
+
+    return scan_snapshot("live", lambda path, params: (time.time(), index.odds_client.get(path, params)),
+                         min_ev, with_lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshots", nargs="+", metavar="DIR",
+                        help="Fixture stores (or directories of them) to scan instead of the live API")
+    parser.add_argument("--out", default=".", help="Output directory (default: current directory)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--min-ev", type=float, default=0, help="Only keep opportunities above this EV %%")
+    parser.add_argument("--no-lines", action="store_true", help="Skip the raw lines output")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for --snapshots")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows written per chunk")
+    args = parser.parse_args(argv)
+
+    os.environ["ODDS_POLLER_ENABLED"] = "false"
+    for setting in APP_ONLY_SETTINGS:
+        os.environ.pop(setting, None)
+    with_lines = not args.no_lines
+
+    os.makedirs(args.out, exist_ok=True)
+    try:
+        writers = {"opportunities": ChunkedWriter(os.path.join(args.out, f"opportunities.{args.format}"),
+                                                  args.format, OPPORTUNITY_COLUMNS, args.chunk_size)}
+        if with_lines:
+            writers["lines"] = ChunkedWriter(os.path.join(args.out, f"lines.{args.format}"),
+                                             args.format, LINE_COLUMNS, args.chunk_size)
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+    start = time.perf_counter()
+    scanned = 0
+    executor = None
+    if args.snapshots:
+        directories = snapshot_dirs(args.snapshots)
+        if not directories:
+            sys.exit(f"No recorded snapshots found in {', '.join(args.snapshots)}")
+        executor = ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(directories))))
+        n = len(directories)
+        results = executor.map(scan_fixture_store, directories, [args.min_ev] * n, [with_lines] * n)
+    else:
+        results = [scan_live(args.min_ev, with_lines)]
+
+    try:
+        # Results arrive in snapshot order, one snapshot's rows at a time
+        for opportunity_rows, line_rows in results:
+            writers["opportunities"].write(opportunity_rows)
+            if with_lines:
+                writers["lines"].write(line_rows)
+            scanned += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        for writer in writers.values():
+            writer.close()
+
+    print(f"Scanned {scanned} snapshot(s) in {time.perf_counter() - start:.1f}s")
+    for writer in writers.values():
+        print(f"  {writer.rows_written} rows -> {writer.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Fast cold starts for instances without a background poller (e.g. serverless).
+
+A fresh instance has no odds in memory, and fetching a full slate before the
+first byte is sent is what makes cold starts slow. Instead the last persisted
+snapshot is loaded from disk and served straight away, marked as stale, while
+a fresh one is built in the background and persisted for the next cold start.
+"""
+import threading
+import time
+
+from shared_snapshot import SnapshotFile
+
+
+class BootstrapSnapshot:
+    """
+    Stale-while-revalidate holder for one snapshot.
+
+    The first get() loads the snapshot persisted at path (by an earlier
+    instance) or, failing that, at bundled_path (shipped with the deploy).
+    Whenever the snapshot is missing or older than max_age seconds, get()
+    starts refresh() in a background thread and keeps returning what it has.
+    A refreshed snapshot replaces it and is written back to path.
+
+    encode(snapshot) gives the data to persist; decode(data) turns loaded
+    data back into a snapshot. A failed refresh is retried after
+    retry_interval seconds.
+    """
+
+    def __init__(self, path, refresh, bundled_path=None, encode=None, decode=None,
+                 max_age=60, retry_interval=10):
+        self.file = SnapshotFile(path)
+        self.bundled_file = SnapshotFile(bundled_path) if bundled_path else None
+        self.refresh = refresh
+        self.encode = encode
+        self.decode = decode
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self._snapshot = None
+        self._loaded = False
+        self._refreshing = False
+        self._failed_at = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The current snapshot (possibly stale, or None), refreshing it in the background when due."""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._snapshot = self._load()
+            snapshot = self._snapshot
+            if self._refresh_due(snapshot):
+                self._refreshing = True
+                threading.Thread(target=self._run_refresh, name="snapshot-bootstrap", daemon=True).start()
+        return snapshot
+
+    def _refresh_due(self, snapshot):
+        if self._refreshing:
+            return False
+        now = time.time()
+        if self._failed_at is not None and now - self._failed_at < self.retry_interval:
+            return False
+        return snapshot is None or now - snapshot["updated_at"] >= self.max_age
+
+    def _load(self):
+        for snapshot_file in (self.file, self.bundled_file):
+            if snapshot_file is None:
+                continue
+            data = snapshot_file.read()
+            if data is None:
+                continue
+            self._sequence = max(self._sequence, snapshot_file.sequence())
+            try:
+                return self.decode(data) if self.decode else data
+            except Exception as e:
+                print(f"Error loading bootstrap snapshot {snapshot_file.path}: {str(e)}")
+        return None
+
+    def _run_refresh(self):
+        try:
+            snapshot = self.refresh()
+        except Exception as e:
+            print(f"Error refreshing bootstrap snapshot: {str(e)}")
+            with self._lock:
+                self._refreshing = False
+                self._failed_at = time.time()
+            return
+        with self._lock:
+            self._snapshot = snapshot
+            self._refreshing = False
+            self._failed_at = None
+            self._sequence += 1
+            sequence = self._sequence
+        try:
+            self.file.write(self.encode(snapshot) if self.encode else snapshot, sequence)
+        except Exception as e:
+            print(f"Error persisting bootstrap snapshot: {str(e)}")
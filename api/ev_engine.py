@@ -0,0 +1,190 @@
+"""
+Vectorized EV evaluation for many markets at once.
+
+Each market is a {book: american_odds} dict, the same input that
+calculate_positive_ev takes. Markets are packed into an (outcomes x slots)
+matrix, one row per market. Slot j of a row holds the j-th valid book of that
+market in dict order, and a boolean mask marks which slots are filled.
+Keeping each row in its own book order means every sum is accumulated in the
+same order as the scalar loop. That makes the results bit-for-bit identical to
+calculate_positive_ev.
+"""
+import numpy as np
+
+
+def parse_american_odds(odds):
+    """Return odds as a number, or None if it can't be used (mirrors the scalar parser)."""
+    if odds is None:
+        return None
+    if isinstance(odds, str):
+        try:
+            return int(odds)
+        except ValueError:
+            return None
+    return odds
+
+
+def build_odds_matrix(lines_dicts):
+    """
+    Pack a list of {book: odds} dicts into matrix form.
+
+    Returns:
+        (odds, mask, books, parsed) where odds is a float64 (markets x slots)
+        array, mask flags the filled slots, books[i] lists the book names for
+        row i in slot order, and parsed[i] holds the parsed odds values.
+    """
+    books = []
+    parsed = []
+    for lines_dict in lines_dicts:
+        row_books = []
+        row_odds = []
+        for bookmaker, odds in (lines_dict or {}).items():
+            odds = parse_american_odds(odds)
+            if odds is None:
+                continue
+            row_books.append(bookmaker)
+            row_odds.append(odds)
+        books.append(row_books)
+        parsed.append(row_odds)
+
+    width = max((len(row) for row in parsed), default=0)
+    odds_matrix = np.zeros((len(parsed), width), dtype=np.float64)
+    mask = np.zeros((len(parsed), width), dtype=bool)
+    for i, row_odds in enumerate(parsed):
+        odds_matrix[i, :len(row_odds)] = row_odds
+        mask[i, :len(row_odds)] = True
+    return odds_matrix, mask, books, parsed
+
+
+def implied_probability(odds):
+    """Vectorized implied_probability: implied probability of American odds."""
+    magnitude = np.abs(odds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(odds > 0, 100 / (odds + 100), magnitude / (magnitude + 100))
+
+
+def american_to_decimal(odds):
+    """Vectorized american_to_decimal."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(odds < 0, 1 + (100 / np.abs(odds)), 1 + (odds / 100))
+
+
+def decimal_to_american(decimal_odds):
+    """Vectorized decimal_to_american (truncates toward zero like int())."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        american = np.where(
+            decimal_odds < 2.0,
+            np.trunc(-100 / (decimal_odds - 1)),
+            np.trunc((decimal_odds - 1) * 100),
+        )
+    return np.where(decimal_odds <= 1.0, 0, american).astype(np.int64)
+
+
+def evaluate_odds_matrix(odds, mask):
+    """
+    Compute EV statistics for every row of an odds matrix.
+
+    Sums are accumulated slot by slot (vectorized across rows) so their
+    rounding matches the scalar per-book loop exactly.
+
+    Returns:
+        Dictionary of arrays: valid_books, decimal, implied, avg_probability,
+        avg_decimal, avg_american, odds_variance, best_slot, best_decimal,
+        ev_percentage, individual_ev, fair_odds. Per-slot arrays have the
+        same shape as odds; rows with fewer than two books are not meaningful.
+    """
+    n_rows, width = odds.shape
+    decimal = american_to_decimal(odds)
+    implied = implied_probability(odds)
+    valid_books = mask.sum(axis=1)
+
+    total_probability = np.zeros(n_rows)
+    total_decimal = np.zeros(n_rows)
+    for j in range(width):
+        total_probability += np.where(mask[:, j], implied[:, j], 0.0)
+        total_decimal += np.where(mask[:, j], decimal[:, j], 0.0)
+
+    count = np.maximum(valid_books, 1)
+    avg_probability = total_probability / count
+    avg_decimal = total_decimal / count
+
+    sum_squares = np.zeros(n_rows)
+    for j in range(width):
+        deviation = decimal[:, j] - avg_decimal
+        sum_squares += np.where(mask[:, j], deviation * deviation, 0.0)
+    odds_variance = np.where(valid_books > 1, np.sqrt(sum_squares / np.maximum(valid_books - 1, 1)), 0.0)
+
+    masked_decimal = np.where(mask, decimal, -np.inf)
+    best_slot = np.argmax(masked_decimal, axis=1) if width else np.zeros(n_rows, dtype=np.int64)
+    best_decimal = masked_decimal[np.arange(n_rows), best_slot] if width else np.zeros(n_rows)
+    best_decimal = np.where(valid_books > 0, best_decimal, 0.0)
+
+    individual_ev = (decimal * avg_probability[:, None] - 1) * 100
+    others = np.maximum(valid_books - 1, 1)[:, None]
+    other_books_avg = (total_probability[:, None] - implied) / others
+    with np.errstate(divide='ignore'):
+        fair_decimal = np.where(other_books_avg > 0, 1 / other_books_avg, 0.0)
+
+    return {
+        'valid_books': valid_books,
+        'decimal': decimal,
+        'implied': implied,
+        'avg_probability': avg_probability,
+        'avg_decimal': avg_decimal,
+        'avg_american': decimal_to_american(avg_decimal),
+        'odds_variance': odds_variance,
+        'best_slot': best_slot,
+        'best_decimal': best_decimal,
+        'ev_percentage': (best_decimal * avg_probability - 1) * 100,
+        'individual_ev': individual_ev,
+        'fair_odds': decimal_to_american(fair_decimal),
+    }
+
+
+def calculate_positive_ev_batch(lines_dicts):
+    """
+    Batch version of calculate_positive_ev.
+
+    Args:
+        lines_dicts: List of {bookmaker: odds} dictionaries
+
+    Returns:
+        List with one entry per input: the same dictionary calculate_positive_ev
+        would return for it, or None.
+    """
+    if not lines_dicts:
+        return []
+    odds, mask, books, parsed = build_odds_matrix(lines_dicts)
+    stats = evaluate_odds_matrix(odds, mask)
+
+    valid_books = stats['valid_books'].tolist()
+    implied = stats['implied'].tolist()
+    individual_ev = stats['individual_ev'].tolist()
+    fair_odds = stats['fair_odds'].tolist()
+    best_slot = stats['best_slot'].tolist()
+    avg_probability = stats['avg_probability'].tolist()
+    avg_american = stats['avg_american'].tolist()
+    odds_variance = stats['odds_variance'].tolist()
+    ev_percentage = stats['ev_percentage'].tolist()
+
+    results = []
+    for i, lines_dict in enumerate(lines_dicts):
+        if not lines_dict or len(lines_dict) <= 1 or valid_books[i] <= 1:
+            results.append(None)
+            continue
+        row_books = books[i]
+        n = valid_books[i]
+        results.append({
+            'best_book': row_books[best_slot[i]],
+            'best_odds': parsed[i][best_slot[i]],
+            'all_odds': lines_dict,
+            'implied_probabilities': dict(zip(row_books, implied[i][:n])),
+            'individual_ev': dict(zip(row_books, individual_ev[i][:n])),
+            'fair_odds': dict(zip(row_books, fair_odds[i][:n])),
+            'avg_implied_probability': avg_probability[i],
+            'avg_american_odds': avg_american[i],
+            'ev_percentage': round(ev_percentage[i], 2),
+            'odds_variance': odds_variance[i],
+            'markets': n,
+        })
+    return results
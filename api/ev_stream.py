@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from incremental import opportunity_key
+
+# Fields pushed to clients for each opportunity: enough to patch a table row
+STREAM_FIELDS = ("event_id", "commence_time", "home_team", "away_team", "market_type", "team",
+                 "line", "best_book", "best_odds", "ev_percentage", "markets")
+
+
+def stream_row(opportunity):
+    row = {field: opportunity.get(field) for field in STREAM_FIELDS}
+    row["key"] = opportunity_key(opportunity)
+    return row
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EVBroadcaster:
+    """
+    Fans out EV changes to every connected Server-Sent Events client.
+
+    publish() diffs a new opportunity set against the previous one by
+    opportunity key. It then appends a single "diff" message (added, changed,
+    removed) to a bounded buffer. Each subscriber only reads that shared buffer.
+    However many clients are connected, a scan happens once per update.
+
+    Event ids are "<stream_id>:<seq>". stream_id is random per broadcaster,
+    so a client resuming from an id this broadcaster didn't issue (another
+    worker process rendered its page, or this one restarted) or from one
+    that has fallen out of the buffer is sent a "sync" message with every
+    current row instead of diffs it can't apply.
+
+    When nothing else is publishing (no background poller), give it a
+    `compute` callable. A single pump thread then rescans every `interval`
+    seconds while at least one client is connected.
+    """
+
+    def __init__(self, compute=None, interval=30, buffer_size=256, heartbeat=15):
+        self.compute = compute
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.stream_id = os.urandom(4).hex()
+        self.seq = 0
+        self._current = {}
+        self._buffer = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._subscribers = 0
+        self._pump = None
+
+    def event_id(self, seq):
+        """SSE event id for a sequence number of this broadcaster, e.g. for a page to resume from."""
+        return f"{self.stream_id}:{seq}"
+
+    def parse_event_id(self, event_id):
+        """Sequence number in an event id this broadcaster issued, or None."""
+        stream_id, _, seq = (event_id or "").partition(":")
+        if stream_id != self.stream_id or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, opportunities):
+        """Diff opportunities against the last published set; returns the new sequence number."""
+        rows = {}
+        for opportunity in opportunities:
+            row = stream_row(opportunity)
+            rows[row["key"]] = row
+        with self._condition:
+            added = [row for key, row in rows.items() if key not in self._current]
+            changed = [row for key, row in rows.items()
+                       if key in self._current and self._current[key] != row]
+            removed = [key for key in self._current if key not in rows]
+            self._current = rows
+            if added or changed or removed:
+                self.seq += 1
+                self._buffer.append((self.seq, {"added": added, "changed": changed, "removed": removed}))
+                self._condition.notify_all()
+            return self.seq
+
+    def subscribe(self, last_event_id=None):
+        """
+        Generator of SSE-formatted messages for one client, starting after
+        `last_event_id` (None to start from now). An id this broadcaster
+        can't resume from gets a "sync" message with the full current state.
+        """
+        with self._condition:
+            self._subscribers += 1
+            self._ensure_pump()
+            sync = None
+            last_seq = self.seq
+            if last_event_id is not None:
+                since = self.parse_event_id(last_event_id)
+                oldest = self._buffer[0][0] if self._buffer else self.seq + 1
+                if since is None or since > self.seq or since < oldest - 1:
+                    sync = {"rows": list(self._current.values())}
+                else:
+                    last_seq = since
+        try:
+            if sync is not None:
+                yield format_sse("sync", sync, self.event_id(last_seq))
+            yield format_sse("hello", {"seq": last_seq})
+            while True:
+                with self._condition:
+                    if self.seq <= last_seq:
+                        self._condition.wait(self.heartbeat)
+                    pending = [(seq, diff) for seq, diff in self._buffer if seq > last_seq]
+                if not pending:
+                    yield ": keep-alive\n\n"
+                    continue
+                for seq, diff in pending:
+                    yield format_sse("diff", diff, self.event_id(seq))
+                    last_seq = seq
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+
+    def _ensure_pump(self):
+        if self.compute is None or (self._pump and self._pump.is_alive()):
+            return
+        self._pump = threading.Thread(target=self._run_pump, name="ev-stream-pump", daemon=True)
+        self._pump.start()
+
+    def _run_pump(self):
+        while True:
+            with self._condition:
+                if self._subscribers <= 0:
+                    self._pump = None
+                    return
+            try:
+                self.publish(self.compute())
+            except Exception as e:
+                print(f"Error computing EV stream update: {str(e)}")
+            time.sleep(self.interval)
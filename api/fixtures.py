@@ -0,0 +1,84 @@
+import json
+import os
+import re
+import time
+
+
+class FixtureNotFoundError(LookupError):
+    """No recorded response exists for a replayed request."""
+
+
+def fixture_slug(path, params):
+    """Filesystem-safe name for a request: its path plus sorted params, minus the API key."""
+    query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()) if k != "apiKey")
+    raw = f"{path.strip('/')}__{query}" if query else path.strip("/")
+    return re.sub(r"[^A-Za-z0-9._=,&-]", "_", raw)
+
+
+class FixtureStore:
+    """
+    On-disk recordings of Odds API responses.
+
+    Layout: <root>/<request slug>/<captured_at>.json, where each file holds
+    {"path", "params", "captured_at", "body"}. Recording the same request
+    again adds a new timestamped file, so a directory doubles as a
+    time-ordered snapshot archive.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def save(self, path, params, body, captured_at=None):
+        captured_at = captured_at if captured_at is not None else time.time()
+        directory = os.path.join(self.root, fixture_slug(path, params))
+        os.makedirs(directory, exist_ok=True)
+        record = {
+            "path": path,
+            "params": {k: v for k, v in (params or {}).items() if k != "apiKey"},
+            "captured_at": captured_at,
+            "body": body,
+        }
+        target = os.path.join(directory, f"{captured_at:.3f}.json")
+        tmp = f"{target}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp, target)
+        return target
+
+    def recordings(self, path, params):
+        """Recording file paths for a request, oldest first."""
+        directory = os.path.join(self.root, fixture_slug(path, params))
+        if not os.path.isdir(directory):
+            return []
+        names = [name for name in os.listdir(directory) if name.endswith(".json")]
+        names.sort(key=lambda name: float(name[:-5]))
+        return [os.path.join(directory, name) for name in names]
+
+    def load_latest(self, path, params, until=None):
+        """Body of the newest recording for a request (optionally no newer than `until`)."""
+        return self.latest_record(path, params, until)["body"]
+
+    def latest_record(self, path, params, until=None):
+        """Newest full recording ({"path", "params", "captured_at", "body"}) for a request."""
+        for filename in reversed(self.recordings(path, params)):
+            if until is not None and float(os.path.basename(filename)[:-5]) > until:
+                continue
+            with open(filename) as f:
+                return json.load(f)
+        raise FixtureNotFoundError(f"No recorded response for {fixture_slug(path, params)}")
+
+    def iter_records(self):
+        """Every recording in the store as (captured_at, path, params, body), oldest first."""
+        entries = []
+        for slug in sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []:
+            directory = os.path.join(self.root, slug)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".json"):
+                    entries.append((float(name[:-5]), os.path.join(directory, name)))
+        entries.sort()
+        for _, filename in entries:
+            with open(filename) as f:
+                record = json.load(f)
+            yield record["captured_at"], record["path"], record["params"], record["body"]
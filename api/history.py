@@ -0,0 +1,210 @@
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds_history (
+    captured_at REAL NOT NULL,
+    sport TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    commence_time TEXT,
+    market TEXT NOT NULL,
+    selection TEXT NOT NULL,
+    player TEXT NOT NULL DEFAULT '',
+    point REAL,
+    book TEXT NOT NULL,
+    price INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_event
+    ON odds_history (event_id, market, player, point, book, captured_at);
+CREATE INDEX IF NOT EXISTS idx_history_player
+    ON odds_history (player, market, point, book, captured_at);
+CREATE INDEX IF NOT EXISTS idx_history_time
+    ON odds_history (captured_at);
+CREATE TABLE IF NOT EXISTS odds_history_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Columns identifying one price series; compaction collapses repeats within each
+SERIES_COLUMNS = ("event_id", "market", "selection", "player", "point", "book")
+
+COLUMNS = ("captured_at", "sport", "event_id", "commence_time", "market",
+           "selection", "player", "point", "book", "price")
+
+
+def flatten_odds_payload(payload, captured_at, sport):
+    """
+    Flatten an Odds API payload into history rows.
+
+    Accepts either the list returned by the sport odds endpoint or the single
+    event dict returned by the per-event odds endpoint.
+    """
+    events = payload if isinstance(payload, list) else [payload]
+    for event in events:
+        event_id = event.get("id")
+        commence_time = event.get("commence_time")
+        event_sport = event.get("sport_key") or sport
+        for bookmaker in event.get("bookmakers", []):
+            book = bookmaker.get("title")
+            for market in bookmaker.get("markets", []):
+                market_key = market.get("key")
+                for outcome in market.get("outcomes", []):
+                    price = outcome.get("price")
+                    if price is None:
+                        continue
+                    yield (captured_at, event_sport, event_id, commence_time, market_key,
+                           outcome.get("name"), outcome.get("description") or "",
+                           outcome.get("point"), book, price)
+
+
+class OddsHistoryStore:
+    """
+    Append-only SQLite store of every odds snapshot we fetch.
+
+    Rows are (captured_at, sport, event, market, selection, player, point,
+    book, price). They are written in bulk batches and indexed for
+    line-movement lookups. compact() drops rows past the retention window and
+    collapses runs where a price didn't move, so disk use stays bounded.
+
+    Compaction only looks at rows written since the last one (tracked by
+    rowid in odds_history_meta, so it survives restarts), each compared with
+    the latest older row of its series. Rows are expected in captured_at
+    order per series, as live fetches write them. record_rows() never
+    compacts inline: once compact_interval has passed it starts compact() on
+    a background thread, so the fetch path only ever waits on the lock for
+    one interval's worth of rows.
+    """
+
+    def __init__(self, path, retention_days=200, batch_size=5000, compact_interval=3600):
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.compact_interval = compact_interval
+        self._last_compacted = time.time()
+        self._compactor = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, payload, sport, captured_at=None):
+        """Write every outcome price in an odds payload; returns the row count."""
+        captured_at = captured_at if captured_at is not None else time.time()
+        return self.record_rows(flatten_odds_payload(payload, captured_at, sport))
+
+    def record_rows(self, rows):
+        """Write rows already flattened by flatten_odds_payload; returns the row count."""
+        written = 0
+        with self._lock:
+            with self._conn:
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        self._insert(batch)
+                        written += len(batch)
+                        batch = []
+                if batch:
+                    self._insert(batch)
+                    written += len(batch)
+        if time.time() - self._last_compacted >= self.compact_interval:
+            self._compact_in_background()
+        return written
+
+    def _compact_in_background(self):
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._last_compacted = time.time()
+            self._compactor = threading.Thread(target=self._run_compaction, name="history-compact", daemon=True)
+            self._compactor.start()
+
+    def _run_compaction(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Error compacting odds history: {str(e)}")
+
+    def _insert(self, batch):
+        self._conn.executemany(
+            f"INSERT INTO odds_history ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            batch,
+        )
+
+    def price_history(self, player=None, market=None, point=None, book=None,
+                      event_id=None, selection=None, since=None):
+        """
+        Price history matching the given filters, oldest first, e.g.
+        price_history(player="Jayson Tatum", market="player_points", point=24.5, book="FanDuel").
+        """
+        clauses = []
+        params = []
+        for column, value in (("event_id", event_id), ("market", market), ("player", player),
+                              ("point", point), ("book", book), ("selection", selection)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("captured_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM odds_history {where} ORDER BY captured_at",
+                params,
+            )
+            return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    def compact(self):
+        """
+        Apply the retention policy and drop rows written since the last
+        compaction that repeat the previous price for the same (event,
+        market, selection, player, point, book). Returns the number of rows
+        deleted.
+        """
+        cutoff = time.time() - self.retention_days * 86400
+        series = ", ".join(SERIES_COLUMNS)
+        same_series = " AND ".join(f"older.{column} IS fresh.{column}" for column in SERIES_COLUMNS)
+        with self._lock:
+            with self._conn:
+                watermark = self._compacted_rowid()
+                expired = self._conn.execute(
+                    "DELETE FROM odds_history WHERE captured_at < ?", (cutoff,)
+                ).rowcount
+                # New rows, plus the latest older row of each series they belong to
+                repeated = self._conn.execute(f"""
+                    DELETE FROM odds_history WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, rowid > :watermark AS is_fresh, price, LAG(price) OVER (
+                                PARTITION BY {series} ORDER BY captured_at, rowid
+                            ) AS previous_price
+                            FROM odds_history WHERE rowid > :watermark OR rowid IN (
+                                SELECT (
+                                    SELECT older.rowid FROM odds_history AS older
+                                    WHERE {same_series} AND older.rowid <= :watermark
+                                    ORDER BY older.captured_at DESC, older.rowid DESC LIMIT 1
+                                ) FROM (SELECT DISTINCT {series} FROM odds_history WHERE rowid > :watermark) AS fresh
+                            )
+                        ) WHERE is_fresh AND previous_price = price
+                    )
+                """, {"watermark": watermark}).rowcount
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO odds_history_meta (key, value) "
+                    "SELECT 'compacted_rowid', COALESCE(MAX(rowid), 0) FROM odds_history"
+                )
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._last_compacted = time.time()
+        return expired + repeated
+
+    def _compacted_rowid(self):
+        row = self._conn.execute("SELECT value FROM odds_history_meta WHERE key = 'compacted_rowid'").fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._conn.close()
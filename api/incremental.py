@@ -0,0 +1,71 @@
+import threading
+
+
+def market_key(details):
+    """Stable identity of a market/opportunity: (event, market type, team or player, side and line)."""
+    return (details.get("event_id"), details.get("market_type"), details.get("team"), details.get("line"))
+
+
+def opportunity_key(opportunity):
+    """Stable identity key for an EV opportunity, as a string."""
+    return "|".join(str(part) for part in market_key(opportunity))
+
+
+class IncrementalEVScanner:
+    """
+    Re-evaluates only the markets whose prices moved since the previous scan.
+
+    Each market's inputs are its (book, price) pairs in book order. A market
+    whose inputs match the last scan reuses the EV result it got then. Everything
+    else goes to the batch engine in one call. After every scan, `stats`
+    reports how many markets were added, changed, removed and carried forward.
+    """
+
+    def __init__(self):
+        self._previous = {}
+        self._lock = threading.Lock()
+        self.stats = {"total_markets": 0, "changed_markets": 0, "added_markets": 0,
+                      "removed_markets": 0, "reused_markets": 0}
+
+    def evaluate(self, markets):
+        """
+        Args:
+            markets: List of (details, odds_by_book) tuples from collect_ev_markets
+
+        Returns:
+            List of calculate_positive_ev results (or None), aligned with markets
+        """
+        with self._lock:
+            current = {}
+            results = [None] * len(markets)
+            pending = []
+            added = 0
+            for i, (details, odds_by_book) in enumerate(markets):
+                key = market_key(details)
+                inputs = tuple(odds_by_book.items())
+                previous = self._previous.get(key)
+                if previous is not None and previous[0] == inputs:
+                    results[i] = previous[1]
+                    current[key] = previous
+                else:
+                    if previous is None:
+                        added += 1
+                    pending.append((i, key, inputs, odds_by_book))
+
+            # Imported here so numpy stays off the import path until the first scan
+            from ev_engine import calculate_positive_ev_batch
+            computed = calculate_positive_ev_batch([odds_by_book for _, _, _, odds_by_book in pending])
+            for (i, key, inputs, _), ev_data in zip(pending, computed):
+                results[i] = ev_data
+                current[key] = (inputs, ev_data)
+
+            removed = sum(1 for key in self._previous if key not in current)
+            self._previous = current
+            self.stats = {
+                "total_markets": len(markets),
+                "changed_markets": len(pending),
+                "added_markets": added,
+                "removed_markets": removed,
+                "reused_markets": len(markets) - len(pending),
+            }
+            return results
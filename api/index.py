@@ -1,41 +1,126 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, g, jsonify, render_template, request
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import math
 import os
-import requests
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from alerts import AlertEngine, WebhookSender, load_rules
+from arbitrage import arb_key, find_arbitrage
+from cold_start import BootstrapSnapshot
+from ev_stream import EVBroadcaster
+from incremental import IncrementalEVScanner, opportunity_key
+from pagination import (BadRequest, decode_cursor, decode_rank_cursor, ndjson_lines, paginate,
+                        paginate_ranked, parse_fields, parse_limit, project)
+from metrics import (end_request_timings, metrics, request_timings, server_timing_header,
+                     stage, start_request_timings)
+from models import SpreadLine, format_spread_line, prop_label
+from odds_client import OddsApiClient, QuotaExhaustedError
+from odds_math import american_to_decimal, decimal_odds, decimal_to_american, implied_probability
+from poller import OddsPoller, RequestBudget
+from profiler import SamplingProfiler
+from props_stream import EventProps, parse_props_payload
+from render_cache import RenderCache
+from shared_snapshot import SharedSnapshot
+from single_flight import SingleFlight
+from snapshot_cache import SnapshotCache
 
 app = Flask(__name__, template_folder='../templates')
 
 # Configuration directly in the file for simplicity
 API_KEY = os.environ.get('ODDS_API_KEY')
-SPORT = "basketball_nba"
-REGIONS = "us"
-MARKETS_MAIN = "h2h,spreads,totals"
-MARKETS_PROPS = "player_points,player_assists,player_rebounds"
+
+# Sports to scan (comma-separated sport keys). Each sport's odds are fetched
+# concurrently and merged into one slate. REGIONS may also list several
+# regions, which the API returns in a single response.
+SPORTS = [sport.strip() for sport in os.environ.get('ODDS_SPORTS', 'basketball_nba').split(',') if sport.strip()]
+REGIONS = os.environ.get('ODDS_REGIONS', 'us')
+MARKETS_MAIN = os.environ.get('ODDS_MARKETS_MAIN', 'h2h,spreads,totals')
 ODDS_FORMAT = "american"
 
+# Player prop markets per sport. Override or add sports with e.g.
+# ODDS_PROPS_MARKETS="basketball_nba=player_points;icehockey_nhl=player_points,player_assists".
+# Sports without an entry are scanned for game lines only.
+PROPS_MARKETS_BY_SPORT = {
+    "basketball_nba": "player_points,player_assists,player_rebounds",
+    "basketball_wnba": "player_points,player_assists,player_rebounds",
+    "americanfootball_nfl": "player_pass_yds,player_rush_yds,player_reception_yds",
+    "icehockey_nhl": "player_points,player_assists,player_shots_on_goal",
+}
+PROPS_MARKETS_BY_SPORT.update(
+    (part.strip() for part in entry.split('=', 1))
+    for entry in os.environ.get('ODDS_PROPS_MARKETS', '').split(';') if '=' in entry
+)
 
-def calculate_ev(odds):
-    """Calculate implied probability from American odds."""
-    if odds > 0:
-        implied_probability = 100 / (odds + 100)
-    else:
-        implied_probability = abs(odds) / (abs(odds) + 100)
-    return implied_probability
+# Per-sport cap on upstream requests per hour (0 means no cap), so one
+# busy sport can't use up the quota the others need
+SPORT_REQUESTS_PER_HOUR = int(os.environ.get('SPORT_REQUESTS_PER_HOUR', '0'))
+
+sport_budgets = {sport: RequestBudget(SPORT_REQUESTS_PER_HOUR) for sport in SPORTS} if SPORT_REQUESTS_PER_HOUR else {}
+
+# Max number of per-event props requests in flight at once
+PROPS_FETCH_WORKERS = int(os.environ.get('PROPS_FETCH_WORKERS', '8'))
+
+# Snapshot cache settings: seconds each market group stays fresh, how long a
+# stale snapshot may still be served while it refreshes, and the entry cap
+ODDS_CACHE_TTL = {
+    "standard": int(os.environ.get('STANDARD_ODDS_TTL', '60')),
+    "props": int(os.environ.get('PROPS_ODDS_TTL', '180')),
+}
+ODDS_CACHE_MAX_STALE = int(os.environ.get('ODDS_CACHE_MAX_STALE', '600'))
+ODDS_CACHE_MAX_ENTRIES = int(os.environ.get('ODDS_CACHE_MAX_ENTRIES', '256'))
+
+# Entry versions are seeded with the clock, like snapshot versions, since
+# snapshots carry them to other processes (see data_versions)
+odds_cache = SnapshotCache(max_entries=ODDS_CACHE_MAX_ENTRIES, max_stale=ODDS_CACHE_MAX_STALE,
+                           first_version=time.time_ns())
+
+# HTTP client settings: upstream base URL (overridable for local stubs),
+# retries on 429/5xx, the longest Retry-After worth waiting for (seconds),
+# and how many requests to keep in reserve
+ODDS_API_BASE_URL = os.environ.get('ODDS_API_BASE_URL', OddsApiClient.BASE_URL)
+ODDS_API_MAX_RETRIES = int(os.environ.get('ODDS_API_MAX_RETRIES', '3'))
+ODDS_API_MAX_RETRY_AFTER = float(os.environ.get('ODDS_API_MAX_RETRY_AFTER', '30'))
+ODDS_API_QUOTA_RESERVE = int(os.environ.get('ODDS_API_QUOTA_RESERVE', '0'))
+
+# "live", "record" (save every response under ODDS_FIXTURE_DIR) or
+# "replay" (serve recorded responses offline)
+ODDS_API_MODE = os.environ.get('ODDS_API_MODE', 'live')
+ODDS_FIXTURE_DIR = os.environ.get('ODDS_FIXTURE_DIR')
+
+odds_client = OddsApiClient(
+    API_KEY,
+    base_url=ODDS_API_BASE_URL,
+    max_retries=ODDS_API_MAX_RETRIES,
+    retry_after_cap=ODDS_API_MAX_RETRY_AFTER,
+    quota_reserve=ODDS_API_QUOTA_RESERVE,
+    pool_size=max(PROPS_FETCH_WORKERS, 4),
+    mode=ODDS_API_MODE,
+    fixture_dir=ODDS_FIXTURE_DIR,
+)
+
+# Odds history store: every fetched snapshot is appended to this SQLite file
+# when set; rows older than the retention window are compacted away
+ODDS_HISTORY_PATH = os.environ.get('ODDS_HISTORY_PATH')
+ODDS_HISTORY_RETENTION_DAYS = int(os.environ.get('ODDS_HISTORY_RETENTION_DAYS', '200'))
+
+# history (and sqlite3) is only imported when the store is on, so it stays off the cold-start path
+if ODDS_HISTORY_PATH:
+    from history import OddsHistoryStore, flatten_odds_payload
+    history_store = OddsHistoryStore(ODDS_HISTORY_PATH, retention_days=ODDS_HISTORY_RETENTION_DAYS)
+else:
+    history_store = None
+
+# Background poller settings. Off by default since serverless instances
+# can't keep a thread alive between requests
+ODDS_POLLER_ENABLED = os.environ.get('ODDS_POLLER_ENABLED', 'False').lower() in ('true', '1', 't')
+ODDS_POLLER_REQUESTS_PER_HOUR = int(os.environ.get('ODDS_POLLER_REQUESTS_PER_HOUR', '120'))
+ODDS_POLLER_STANDARD_INTERVAL = int(os.environ.get('ODDS_POLLER_STANDARD_INTERVAL', '60'))
 
-def american_to_decimal(american_odds):
-    """Convert American odds to decimal."""
-    if american_odds < 0:
-        return 1 + (100 / abs(american_odds))
-    else:
-        return 1 + (american_odds / 100)
-
-def decimal_to_american(decimal_odds):
-    """Convert decimal odds to American format."""
-    if decimal_odds <= 1.0:
-        return 0  # Just a fallback
-    elif decimal_odds < 2.0:
-        return int(-100 / (decimal_odds - 1))
-    else:
-        return int((decimal_odds - 1) * 100)
 
 def calculate_positive_ev(lines_dict):
     """
@@ -57,6 +142,7 @@ def calculate_positive_ev(lines_dict):
     
     # Calculate average implied probability
     total_probability = 0
+    total_decimal = 0
     valid_books = 0
     all_implied_probs = {}
     all_decimal_odds = []
@@ -76,6 +162,7 @@ def calculate_positive_ev(lines_dict):
         # Calculate decimal odds
         decimal_odds = american_to_decimal(odds)
         all_decimal_odds.append(decimal_odds)
+        total_decimal += decimal_odds
         
         # Track best odds
         if decimal_odds > best_decimal_odds:
@@ -84,7 +171,7 @@ def calculate_positive_ev(lines_dict):
             best_bookmaker = bookmaker
         
         # Calculate implied probability
-        implied_prob = calculate_ev(odds)
+        implied_prob = implied_probability(odds)
         all_implied_probs[bookmaker] = implied_prob
         
         # Add to totals
@@ -97,14 +184,19 @@ def calculate_positive_ev(lines_dict):
     # Get average implied probability
     avg_probability = total_probability / valid_books
     
-    # Calculate variance in the odds (as a measure of market agreement)
-    import statistics
-    odds_variance = statistics.stdev(all_decimal_odds) if len(all_decimal_odds) > 1 else 0
-    
     # Calculate average American odds
-    avg_decimal = sum(all_decimal_odds) / len(all_decimal_odds)
+    avg_decimal = total_decimal / valid_books
     avg_american = decimal_to_american(avg_decimal)
     
+    # Calculate variance in the odds (as a measure of market agreement).
+    # Sample stdev done by hand, in book order, so ev_engine can match it exactly.
+    # It can differ from statistics.stdev in the last bit or so
+    sum_squares = 0
+    for decimal_odds in all_decimal_odds:
+        deviation = decimal_odds - avg_decimal
+        sum_squares += deviation * deviation
+    odds_variance = math.sqrt(sum_squares / (valid_books - 1)) if valid_books > 1 else 0
+    
     # Calculate individual EV for each book and fair odds
     individual_ev = {}
     fair_odds = {}
@@ -144,20 +236,51 @@ def calculate_positive_ev(lines_dict):
         'markets': valid_books
     }
 
-def find_ev_opportunities(events_data, min_ev_threshold=0):
+def fetch_props_for_events(event_ids, max_workers=None):
     """
-    Find positive EV opportunities across events for both game spreads and player props.
+    Fetch formatted player props for several events in parallel.
+    
+    Args:
+        event_ids: Iterable of event IDs
+        max_workers: Concurrency cap (defaults to PROPS_FETCH_WORKERS)
+        
+    Returns:
+        Dictionary of {event_id: formatted props}. An event that fails to
+        fetch maps to an empty dict so it doesn't take down the whole scan.
+    """
+    event_ids = [event_id for event_id in dict.fromkeys(event_ids) if event_id]
+    if not event_ids:
+        return {}
+    
+    workers = max(1, min(max_workers or PROPS_FETCH_WORKERS, len(event_ids)))
+    props_by_event = {}
+    with stage("props"), ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            event_id: executor.submit(get_props_data_formatted, event_id)
+            for event_id in event_ids
+        }
+        for event_id, future in futures.items():
+            try:
+                props_by_event[event_id] = future.result()
+            except Exception as e:
+                print(f"Error fetching props for event {event_id}: {str(e)}")
+                props_by_event[event_id] = {}
+    return props_by_event
+
+def collect_ev_markets(events_data, props_by_event):
+    """
+    Gather every market to evaluate for EV, for both game spreads and player props.
     
     Args:
         events_data: List of event dictionaries
-        min_ev_threshold: Minimum EV percentage to include (default 0)
+        props_by_event: Dictionary of {event_id: formatted props}
         
     Returns:
-        List of EV opportunities sorted by EV percentage
+        List of (details, odds_by_book) tuples, where details holds the 
+        opportunity fields that describe the market (event, market type, side/line)
     """
-    ev_opportunities = []
+    markets = []
     
-    # Analyze main markets (game spreads)
     for event in events_data:
         # Home and away teams
         event_id = event.get("event_id")
@@ -165,73 +288,42 @@ def find_ev_opportunities(events_data, min_ev_threshold=0):
         away_team = event.get("away_team")
         commence_time = event.get("commence_time")
         
+        def details(market_type, team, line):
+            return {
+                "event_id": event_id,
+                "commence_time": commence_time,
+                "home_team": home_team,
+                "away_team": away_team,
+                "market_type": market_type,
+                "team": team,
+                "line": line,
+            }
+        
         # Analyze spread bets
         for side, team in [("away", away_team), ("home", home_team)]:
             # Get spread lines for this team
             spread_data = event["spread_data"][side]
             best_line = spread_data["best_line"]
             
-            if not best_line:
-                continue
-                
-            # Parse the line value from format like "-1.5 (+110)"
-            try:
-                parts = best_line.split(" ")
-                spread_point = parts[0]
-                american_odds_str = parts[1].strip("()")
-                
-                # Extract just the odds values from each book
-                book_lines = spread_data["book_lines"]
-                odds_by_book = {}
-                
-                for book, line_str in book_lines.items():
-                    if not line_str:
-                        continue
-                        
-                    # Only include lines with matching spread point
-                    if line_str.startswith(spread_point):
-                        try:
-                            book_odds_str = line_str.split(" ")[1].strip("()")
-                            if book_odds_str.startswith("+"):
-                                odds_by_book[book] = int(book_odds_str[1:])
-                            else:
-                                odds_by_book[book] = int(book_odds_str)
-                        except (IndexError, ValueError):
-                            continue
-                
-                # Calculate +EV
-                ev_data = calculate_positive_ev(odds_by_book)
-                if ev_data and ev_data["ev_percentage"] > min_ev_threshold:
-                    ev_opportunities.append({
-                        "event_id": event_id,
-                        "commence_time": commence_time,
-                        "home_team": home_team,
-                        "away_team": away_team,
-                        "market_type": "Spread",
-                        "team": team,
-                        "line": spread_point,
-                        "best_book": ev_data["best_book"],
-                        "best_odds": ev_data["best_odds"],
-                        "all_odds": ev_data["all_odds"],
-                        "implied_probabilities": ev_data["implied_probabilities"],
-                        "individual_ev": ev_data["individual_ev"],
-                        "fair_odds": ev_data["fair_odds"],
-                        "avg_implied_probability": ev_data["avg_implied_probability"],
-                        "avg_american_odds": ev_data["avg_american_odds"],
-                        "ev_percentage": ev_data["ev_percentage"],
-                        "odds_variance": ev_data["odds_variance"],
-                        "markets": ev_data["markets"]
-                    })
-            except (IndexError, ValueError):
+            if not best_line or not best_line.price:
                 continue
+            
+            # Only include books offering the same spread point as the best line
+            odds_by_book = {}
+            for book, line in spread_data["book_lines"].items():
+                if line.price and line.point == best_line.point:
+                    odds_by_book[book] = line.price
+            
+            markets.append((details("Spread", team, str(best_line.point)), odds_by_book))
         
         # Now analyze player props for this event
         try:
-            # Fetch player props data for this event
-            props_data = get_props_data_formatted(event_id)
+            # Player props for this event were fetched up front
+            props_data = props_by_event.get(event_id) or {}
             
             # Loop through each prop type (points, assists, rebounds)
             for prop_type, players in props_data.items():
+                market_type = f"Player {prop_label(prop_type)}"
                 # Loop through each player and their prop line
                 for prop_key, prop_data in players.items():
                     player_name = prop_data.get('player')
@@ -241,123 +333,333 @@ def find_ev_opportunities(events_data, min_ev_threshold=0):
                     if not player_name or not line or not books:
                         continue
                     
-                    # Analyze over odds
-                    over_odds_by_book = {}
-                    for book_name, book_data in books.items():
-                        over_price = book_data.get('over_price')
-                        if over_price:
-                            over_odds_by_book[book_name] = over_price
-                    
-                    # Calculate EV for over
-                    if len(over_odds_by_book) > 1:  # Need at least 2 books for comparison
-                        over_ev_data = calculate_positive_ev(over_odds_by_book)
-                        if over_ev_data and over_ev_data["ev_percentage"] > min_ev_threshold:
-                            ev_opportunities.append({
-                                "event_id": event_id,
-                                "commence_time": commence_time,
-                                "home_team": home_team,
-                                "away_team": away_team,
-                                "market_type": f"Player {prop_type.capitalize()}",
-                                "team": player_name,
-                                "line": f"Over {line}",
-                                "best_book": over_ev_data["best_book"],
-                                "best_odds": over_ev_data["best_odds"],
-                                "all_odds": over_ev_data["all_odds"],
-                                "implied_probabilities": over_ev_data["implied_probabilities"],
-                                "individual_ev": over_ev_data["individual_ev"],
-                                "fair_odds": over_ev_data["fair_odds"],
-                                "avg_implied_probability": over_ev_data["avg_implied_probability"],
-                                "avg_american_odds": over_ev_data["avg_american_odds"],
-                                "ev_percentage": over_ev_data["ev_percentage"],
-                                "odds_variance": over_ev_data["odds_variance"],
-                                "markets": over_ev_data["markets"]
-                            })
-                    
-                    # Analyze under odds
-                    under_odds_by_book = {}
-                    for book_name, book_data in books.items():
-                        under_price = book_data.get('under_price')
-                        if under_price:
-                            under_odds_by_book[book_name] = under_price
-                    
-                    # Calculate EV for under
-                    if len(under_odds_by_book) > 1:  # Need at least 2 books for comparison
-                        under_ev_data = calculate_positive_ev(under_odds_by_book)
-                        if under_ev_data and under_ev_data["ev_percentage"] > min_ev_threshold:
-                            ev_opportunities.append({
-                                "event_id": event_id,
-                                "commence_time": commence_time,
-                                "home_team": home_team,
-                                "away_team": away_team,
-                                "market_type": f"Player {prop_type.capitalize()}",
-                                "team": player_name,
-                                "line": f"Under {line}",
-                                "best_book": under_ev_data["best_book"],
-                                "best_odds": under_ev_data["best_odds"],
-                                "all_odds": under_ev_data["all_odds"],
-                                "implied_probabilities": under_ev_data["implied_probabilities"],
-                                "individual_ev": under_ev_data["individual_ev"],
-                                "fair_odds": under_ev_data["fair_odds"],
-                                "avg_implied_probability": under_ev_data["avg_implied_probability"],
-                                "avg_american_odds": under_ev_data["avg_american_odds"],
-                                "ev_percentage": under_ev_data["ev_percentage"],
-                                "odds_variance": under_ev_data["odds_variance"],
-                                "markets": under_ev_data["markets"]
-                            })
+                    # Over and under are evaluated as separate markets
+                    for side, price_key in [("Over", 'over_price'), ("Under", 'under_price')]:
+                        odds_by_book = {}
+                        for book_name, book_data in books.items():
+                            price = book_data.get(price_key)
+                            if price:
+                                odds_by_book[book_name] = price
+                        
+                        if len(odds_by_book) > 1:  # Need at least 2 books for comparison
+                            markets.append((details(market_type, player_name, f"{side} {line}"), odds_by_book))
         except Exception as e:
             print(f"Error processing props for event {event_id}: {str(e)}")
             continue
     
-    # Sort by EV percentage (highest first)
-    ev_opportunities.sort(key=lambda x: x["ev_percentage"], reverse=True)
+    return markets
+
+def build_ev_opportunity(details, ev_data):
+    """Merge a market's details with its calculate_positive_ev result."""
+    return {
+        **details,
+        "best_book": ev_data["best_book"],
+        "best_odds": ev_data["best_odds"],
+        "all_odds": ev_data["all_odds"],
+        "implied_probabilities": ev_data["implied_probabilities"],
+        "individual_ev": ev_data["individual_ev"],
+        "fair_odds": ev_data["fair_odds"],
+        "avg_implied_probability": ev_data["avg_implied_probability"],
+        "avg_american_odds": ev_data["avg_american_odds"],
+        "ev_percentage": ev_data["ev_percentage"],
+        "odds_variance": ev_data["odds_variance"],
+        "markets": ev_data["markets"]
+    }
+
+def find_ev_opportunities(events_data, min_ev_threshold=0, props_by_event=None, scanner=None, sort=True):
+    """
+    Find positive EV opportunities across events for both game spreads and player props.
+    
+    Args:
+        events_data: List of event dictionaries
+        min_ev_threshold: Minimum EV percentage to include (default 0)
+        props_by_event: Optional pre-fetched {event_id: formatted props}; 
+            when omitted, props for every event are fetched concurrently
+        scanner: Optional IncrementalEVScanner; when given, only markets whose
+            prices changed since its last scan are recomputed
+        sort: Sort by EV percentage; pass False when the caller only needs
+            a top-k and will select it itself
+        
+    Returns:
+        List of EV opportunities sorted by EV percentage (unless sort=False)
+    """
+    if props_by_event is None:
+        props_by_event = fetch_props_for_events(e.get("event_id") for e in events_data)
+    
+    with stage("ev_scan"):
+        # Evaluate every (changed) market in one vectorized batch
+        markets = collect_ev_markets(events_data, props_by_event)
+        if scanner is not None:
+            results = scanner.evaluate(markets)
+        else:
+            from ev_engine import calculate_positive_ev_batch  # deferred import: pulls in numpy
+            results = calculate_positive_ev_batch([odds_by_book for _, odds_by_book in markets])
+        
+        ev_opportunities = []
+        for (details, _), ev_data in zip(markets, results):
+            if ev_data and ev_data["ev_percentage"] > min_ev_threshold:
+                ev_opportunities.append(build_ev_opportunity(details, ev_data))
+        
+        # Sort by EV percentage (highest first)
+        if sort:
+            ev_opportunities.sort(key=lambda x: x["ev_percentage"], reverse=True)
     return ev_opportunities
 
-def american_to_decimal(american_odds):
-    """Convert American odds to decimal."""
-    if american_odds < 0:
-        return 1 + (100 / abs(american_odds))
-    else:
-        return 1 + (american_odds / 100)
-
-def decimal_to_american(decimal_odds):
-    """Convert decimal odds to American."""
-    if decimal_odds <= 1.0:
-        return 0  # Just a fallback
-    elif decimal_odds < 2.0:
-        return int(-100 / (decimal_odds - 1))
-    else:
-        return int((decimal_odds - 1) * 100)
+class EVResultSet:
+    """
+    One scan's EV opportunities (sorted by EV, highest first) indexed by
+    market type, so the /ev filters can be answered without rescanning.
+    """
+    
+    # market filter -> predicate on market_type. Any other filter but "all" is
+    # an exact market type, as listed in the /ev dropdown (e.g. "Player Pass Yds")
+    MARKET_FILTERS = {
+        'spreads': lambda market_type: market_type == 'Spread',
+        'player_props': lambda market_type: 'Player' in market_type,
+        'points': lambda market_type: market_type == 'Player Points',
+        'assists': lambda market_type: market_type == 'Player Assists',
+        'rebounds': lambda market_type: market_type == 'Player Rebounds',
+    }
+    
+    def __init__(self, opportunities):
+        self.opportunities = opportunities
+        # market_type -> positions into self.opportunities, in EV order
+        self.by_market = {}
+        for position, ev in enumerate(opportunities):
+            self.by_market.setdefault(ev.get('market_type', ''), []).append(position)
+        self.market_types = sorted(self.by_market)
+    
+    @classmethod
+    def market_matcher(cls, market_filter):
+        """Predicate on market_type for a market filter name or exact market type."""
+        if market_filter == 'all':
+            return lambda market_type: True
+        return cls.MARKET_FILTERS.get(market_filter, lambda market_type: market_type == market_filter)
+    
+    def select(self, market_filter='all', min_ev=0):
+        """Opportunities in the filtered market types with EV above min_ev, best first."""
+        matches = self.market_matcher(market_filter)
+        positions = []
+        for market_type, market_positions in self.by_market.items():
+            if not matches(market_type):
+                continue
+            # Each position list is in descending EV order, so stop at the threshold
+            for position in market_positions:
+                if self.opportunities[position]["ev_percentage"] <= min_ev:
+                    break
+                positions.append(position)
+        positions.sort()
+        return [self.opportunities[position] for position in positions]
+
+def props_markets_for(sport):
+    """Comma-separated player prop markets scanned for a sport ("" if none)."""
+    return PROPS_MARKETS_BY_SPORT.get(sport, "")
+
+# Summary (teams, start time, sport) of every event on the board by event_id,
+# refreshed from each standard odds fetch
+event_index = {}
+event_index_lock = threading.Lock()
+
+def event_summary(event, sport):
+    return {
+        "event_id": event.get("id"),
+        "away_team": event.get("away_team"),
+        "home_team": event.get("home_team"),
+        "commence_time": event.get("commence_time", ""),
+        "sport_key": sport,
+    }
+
+def index_events(sport, standard_events):
+    """Replace one sport's entries in the event index with a freshly fetched slate."""
+    summaries = {event.get("id"): event_summary(event, sport) for event in standard_events}
+    with event_index_lock:
+        for event_id, event in list(event_index.items()):
+            if event["sport_key"] == sport and event_id not in summaries:
+                del event_index[event_id]
+        event_index.update(summaries)
+
+# Event ids the per-event endpoint didn't know, remembered (event_id -> time of
+# the lookup) for UNKNOWN_EVENT_TTL seconds so that requests for a made-up id
+# can't spend a props request each time
+UNKNOWN_EVENT_TTL = int(os.environ.get('UNKNOWN_EVENT_TTL', '60'))
+UNKNOWN_EVENT_MAX_ENTRIES = 1024
+
+unknown_events = OrderedDict()
+
+def is_unknown_event(event_id):
+    """Whether event_id failed a lookup within the last UNKNOWN_EVENT_TTL seconds."""
+    with event_index_lock:
+        looked_up_at = unknown_events.get(event_id)
+        if looked_up_at is None:
+            return False
+        if time.monotonic() - looked_up_at < UNKNOWN_EVENT_TTL:
+            return True
+        del unknown_events[event_id]
+        return False
+
+def remember_unknown_event(event_id):
+    with event_index_lock:
+        unknown_events[event_id] = time.monotonic()
+        unknown_events.move_to_end(event_id)
+        while len(unknown_events) > UNKNOWN_EVENT_MAX_ENTRIES:
+            unknown_events.popitem(last=False)
+
+def find_event(event_id):
+    """
+    Summary of one event from the event index. Events that aren't on the
+    board (yet) are looked up through the per-event odds endpoint instead,
+    and ids it doesn't know are remembered as unknown for a short while.
+    """
+    if latest_snapshot() is None:
+        get_standard_odds_data()  # revalidates the slate, which refreshes the index
+    event = event_index.get(event_id)
+    if event is not None:
+        return event
+    if is_unknown_event(event_id):
+        return None
+    try:
+        event = get_props_odds_data(event_id).event
+    except Exception as e:
+        print(f"Error looking up event {event_id}: {str(e)}")
+        event = None
+    if not event or event.get("id") != event_id:
+        remember_unknown_event(event_id)
+        return None
+    return event_summary(event, event.get("sport_key") or sport_for_event(event_id))
+
+def sport_for_event(event_id):
+    if event_id not in event_index:
+        get_standard_odds_data()
+    event = event_index.get(event_id)
+    return event["sport_key"] if event else SPORTS[0]
+
+def for_each_sport(fetch_sport):
+    """
+    Call fetch_sport(sport) for every configured sport concurrently and merge
+    the event lists in SPORTS order, so a scan waits on the slowest sport
+    rather than on all of them in turn. A sport that fails is logged and
+    left out unless every sport failed.
+    """
+    if len(SPORTS) == 1:
+        return fetch_sport(SPORTS[0])
+    
+    with ThreadPoolExecutor(max_workers=len(SPORTS)) as executor:
+        futures = [(sport, executor.submit(fetch_sport, sport)) for sport in SPORTS]
+    merged = []
+    errors = []
+    for sport, future in futures:
+        try:
+            merged.extend(future.result())
+        except Exception as e:
+            print(f"Error fetching odds for {sport}: {str(e)}")
+            errors.append(e)
+    if len(errors) == len(SPORTS):
+        raise errors[0]
+    return merged
 
 def get_standard_odds_data():
-    """Fetch standard (main) markets for all NBA events."""
-    url = f"https://api.the-odds-api.com/v4/sports/{SPORT}/odds"
+    """Standard (main) markets for all events of every sport, served from the snapshot cache."""
+    with stage("standard_odds"):
+        return for_each_sport(get_sport_odds_data)
+
+def standard_cache_key(sport):
+    return (sport, REGIONS, MARKETS_MAIN, None)
+
+def props_cache_key(event_id):
+    sport = sport_for_event(event_id)
+    return (sport, REGIONS, props_markets_for(sport), event_id)
+
+def get_sport_odds_data(sport):
+    return odds_cache.get(standard_cache_key(sport), lambda: fetch_standard_odds_data(sport),
+                          ttl=ODDS_CACHE_TTL["standard"])
+
+def get_props_odds_data(event_id):
+    """Player props for one event as an EventProps, served from the snapshot cache."""
+    return odds_cache.get(props_cache_key(event_id), lambda: fetch_props_odds_data(event_id),
+                          ttl=ODDS_CACHE_TTL["props"])
+
+def refresh_standard_odds_data():
+    """Fetch standard markets for every sport and store them in the snapshot cache."""
+    def refresh_sport(sport):
+        return odds_cache.refresh(standard_cache_key(sport), lambda: fetch_standard_odds_data(sport))
+    
+    return for_each_sport(refresh_sport)
+
+def refresh_props_odds_data(event_id):
+    """Fetch one event's props and store them in the snapshot cache."""
+    return odds_cache.refresh(props_cache_key(event_id), lambda: fetch_props_odds_data(event_id))
+
+def spend_sport_budget(sport):
+    budget = sport_budgets.get(sport)
+    if budget is not None and not budget.try_spend():
+        raise QuotaExhaustedError(f"Hourly request budget for {sport} is used up")
+
+def standard_request(sport):
+    """(path, params) of the sport odds request for one sport's standard markets."""
     params = {
-        "apiKey": API_KEY,
         "regions": REGIONS,
         "markets": MARKETS_MAIN,
         "oddsFormat": ODDS_FORMAT,
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return f"/sports/{sport}/odds", params
 
-def get_props_odds_data(event_id):
-    """Fetch player props for one event."""
-    url = f"https://api.the-odds-api.com/v4/sports/{SPORT}/events/{event_id}/odds"
+def fetch_standard_odds_data(sport):
+    """Fetch standard (main) markets for all events of one sport."""
+    spend_sport_budget(sport)
+    standard_events = odds_client.get(*standard_request(sport))
+    index_events(sport, standard_events)
+    record_history(standard_events, sport)
+    return standard_events
+
+def props_request(event_id, sport=None):
+    """(path, params) of the per-event odds request for one event's player props."""
+    sport = sport or sport_for_event(event_id)
     params = {
-        "apiKey": API_KEY,
         "regions": REGIONS,
-        "markets": MARKETS_PROPS,
+        "markets": props_markets_for(sport),
         "oddsFormat": ODDS_FORMAT,
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return f"/sports/{sport}/events/{event_id}/odds", params
+
+def fetch_props_odds_data(event_id):
+    """
+    Fetch player props for one event as an EventProps. The response is
+    formatted as it streams in, so the raw payload is never held whole.
+    """
+    sport = sport_for_event(event_id)
+    if not props_markets_for(sport):
+        return EventProps(None, {})
+    path, params = props_request(event_id, sport)
+    spend_sport_budget(sport)
+    
+    history_rows = []
+    captured_at = time.time()
+    def record_bookmaker(event, bookmaker):
+        payload = {**event, "id": event.get("id", event_id), "bookmakers": [bookmaker]}
+        history_rows.extend(flatten_odds_payload(payload, captured_at, sport))
+    
+    event_props = odds_client.get_stream(path, params, lambda source: parse_props_payload(
+        source, props_markets_for, on_bookmaker=record_bookmaker if history_store is not None else None))
+    if history_rows:
+        try:
+            history_store.record_rows(history_rows)
+        except Exception as e:
+            print(f"Error recording odds history: {str(e)}")
+    return event_props
+
+def record_history(payload, sport):
+    """Append a freshly fetched payload to the history store, if one is configured."""
+    if history_store is None:
+        return
+    try:
+        history_store.record(payload, sport)
+    except Exception as e:
+        print(f"Error recording odds history: {str(e)}")
 
 def build_spread_data(away_team, home_team, bookmakers):
     """
     For the "spreads" market only, gather each bookmaker's line for 
-    (away_team) and (home_team).
+    (away_team) and (home_team) as SpreadLine records.
     """
     away_lines = {}
     home_lines = {}
@@ -369,13 +671,9 @@ def build_spread_data(away_team, home_team, bookmakers):
             if market.get("key") == "spreads":
                 for outcome in market.get("outcomes", []):
                     if outcome["name"] == away_team:
-                        away_price = outcome["price"]
-                        away_point = outcome.get("point")
-                        away_lines[book_name] = (away_point, away_price)
+                        away_lines[book_name] = SpreadLine(outcome.get("point"), outcome["price"])
                     elif outcome["name"] == home_team:
-                        home_price = outcome["price"]
-                        home_point = outcome.get("point")
-                        home_lines[book_name] = (home_point, home_price)
+                        home_lines[book_name] = SpreadLine(outcome.get("point"), outcome["price"])
 
     # Compute "best line" for each side
     best_away = pick_best_line(away_lines)
@@ -384,53 +682,41 @@ def build_spread_data(away_team, home_team, bookmakers):
     # Compute hold
     hold_value = compute_hold_percent(away_lines, home_lines)
 
-    # Convert lines into a nicer dict
-    away_display = {}
-    for b, (pt, price) in away_lines.items():
-        away_display[b] = format_line(pt, price)
-
-    home_display = {}
-    for b, (pt, price) in home_lines.items():
-        home_display[b] = format_line(pt, price)
-
+    # Lines stay numeric; templates format them with the format_line filter
     return {
         "away": {
-            "best_line": format_line(*best_away) if best_away else "",
-            "book_lines": away_display
+            "best_line": best_away,
+            "book_lines": away_lines
         },
         "home": {
-            "best_line": format_line(*best_home) if best_home else "",
-            "book_lines": home_display
+            "best_line": best_home,
+            "book_lines": home_lines
         },
         "hold": hold_value
     }
 
 def pick_best_line(lines_dict):
     """
-    lines_dict = { "BookName": (spread_point, american_price), ... }
+    lines_dict = { "BookName": SpreadLine(spread_point, american_price), ... }
     We'll define "best" by largest decimal price. 
-    Returns a tuple (spread_point, american_price) or None if no lines.
+    Returns the best SpreadLine or None if no lines.
     """
-    best_tuple = None
+    best_line = None
     best_decimal = 0.0
-    for book_name, (pt, price) in lines_dict.items():
-        dec = american_to_decimal(price)
+    for book_name, line in lines_dict.items():
+        dec = american_to_decimal(line.price)
         if dec > best_decimal:
             best_decimal = dec
-            best_tuple = (pt, price)
-    return best_tuple
+            best_line = line
+    return best_line
 
 def compute_hold_percent(away_lines, home_lines):
     """
     Very rough example: take the away *average decimal odds* and home 
     *average decimal odds*, sum implied probabilities, see how far above 1.0.
     """
-    away_decimal_list = []
-    for pt, price in away_lines.values():
-        away_decimal_list.append(american_to_decimal(price))
-    home_decimal_list = []
-    for pt, price in home_lines.values():
-        home_decimal_list.append(american_to_decimal(price))
+    away_decimal_list = decimal_odds(price for pt, price in away_lines.values())
+    home_decimal_list = decimal_odds(price for pt, price in home_lines.values())
 
     # Average decimal for away, home
     away_dec = sum(away_decimal_list)/len(away_decimal_list) if away_decimal_list else 0
@@ -445,80 +731,28 @@ def compute_hold_percent(away_lines, home_lines):
     hold_pct = (sum_imp - 1.0)*100 if sum_imp > 0 else 0
     return round(hold_pct, 2)
 
-def format_line(spread_point, american_price):
-    """Helper to return something like '-1.5 -110' for display."""
-    return f"{spread_point} ({american_price:+})" if american_price else ""
+@app.template_filter('format_line')
+def format_line(line):
+    """Jinja filter returning something like '-1.5 (-110)' for a SpreadLine (or '' for None)."""
+    return format_spread_line(line)
+
+app.add_template_filter(prop_label, 'prop_label')
+
+@app.template_filter('format_timestamp')
+def format_timestamp(timestamp):
+    """Jinja filter returning a Unix timestamp as e.g. 'Mar 14, 19:05 UTC'."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%b %d, %H:%M UTC")
+
+def format_props_data(props_data):
+    """Format one event's raw props payload into {prop_type: {prop_key: prop}}."""
+    return parse_props_payload(props_data, props_markets_for).props
 
 def get_props_data_formatted(event_id):
     """Fetch and format player props for an event."""
+    import requests  # deferred import, like the client's session
     try:
-        # Get the event odds for player props
-        props_data = get_props_odds_data(event_id)
-        
-        # Initialize formatted props structure
-        formatted_props = {
-            'points': {},
-            'assists': {},
-            'rebounds': {}
-        }
-        
-        # Process bookmakers from the props data
-        bookmakers = props_data.get('bookmakers', [])
-        
-        for bookmaker in bookmakers:
-            book_name = bookmaker.get('title')
-            
-            for market in bookmaker.get('markets', []):
-                market_key = market.get('key')
-                if market_key not in ['player_points', 'player_assists', 'player_rebounds']:
-                    continue
-                    
-                prop_type = market_key.split('_')[1]  # points, assists, or rebounds
-                
-                # Group outcomes by player (using description field)
-                player_outcomes = {}
-                for outcome in market.get('outcomes', []):
-                    player_name = outcome.get('description')
-                    if not player_name:
-                        continue
-                        
-                    if player_name not in player_outcomes:
-                        player_outcomes[player_name] = []
-                    player_outcomes[player_name].append(outcome)
-                
-                # Process each player's over/under lines
-                for player_name, outcomes in player_outcomes.items():
-                    # Find the "Over" outcome to get the line
-                    over_outcome = next((o for o in outcomes if o.get('name') == 'Over'), None)
-                    if over_outcome:
-                        point = over_outcome.get('point')
-                        
-                        # Create a unique key combining player name and line
-                        prop_key = f"{player_name}_{point}"
-                        
-                        if prop_key not in formatted_props[prop_type]:
-                            formatted_props[prop_type][prop_key] = {
-                                'player': player_name,
-                                'line': point,
-                                'books': {}
-                            }
-                        
-                        # Store both over/under prices
-                        under_outcome = next((o for o in outcomes if o.get('name') == 'Under'), None)
-                        formatted_props[prop_type][prop_key]['books'][book_name] = {
-                            'point': point,
-                            'over_price': over_outcome.get('price'),
-                            'under_price': under_outcome.get('price') if under_outcome else None
-                        }
-        
-        # Sort the props data alphabetically by player name within each prop type
-        for prop_type in formatted_props:
-            formatted_props[prop_type] = dict(sorted(
-                formatted_props[prop_type].items(),
-                key=lambda item: item[1]['player'].lower()  # Sort by player name (case-insensitive)
-            ))
-            
-        return formatted_props
+        # Player props arrive already formatted from the streaming parser
+        return get_props_odds_data(event_id).props
     except requests.HTTPError as e:
         print(f"HTTP Error fetching props: {str(e)}")
         return {}
@@ -526,54 +760,472 @@ def get_props_data_formatted(event_id):
         print(f"Error processing props: {str(e)}")
         return {}
 
-def process_events():
+def process_events(standard_events=None):
     """Modified to include event IDs and commence times for props navigation."""
-    standard_events = get_standard_odds_data()
+    if standard_events is None:
+        standard_events = get_standard_odds_data()
     
     all_processed = []
-    for event in standard_events:
-        event_id = event.get("id")
-        home_team = event.get("home_team")
-        away_team = event.get("away_team")
-        commence_time = event.get("commence_time", "")
-        
-        spread_data = build_spread_data(away_team, home_team, event.get("bookmakers", []))
-        
-        all_processed.append({
-            "event_id": event_id,
-            "away_team": away_team,
-            "home_team": home_team,
-            "commence_time": commence_time,
-            "spread_data": spread_data,
-        })
+    with stage("build_spread_data"):
+        for event in standard_events:
+            event_id = event.get("id")
+            home_team = event.get("home_team")
+            away_team = event.get("away_team")
+            commence_time = event.get("commence_time", "")
+            
+            spread_data = build_spread_data(away_team, home_team, event.get("bookmakers", []))
+            
+            all_processed.append({
+                "event_id": event_id,
+                "away_team": away_team,
+                "home_team": home_team,
+                "commence_time": commence_time,
+                "spread_data": spread_data,
+            })
     
     return all_processed
 
+def build_snapshot(standard_events, event_props_by_event):
+    """
+    Precompute everything the pages need from the raw standard odds payload
+    and each event's EventProps (whose props are already formatted).
+    
+    Returns:
+        Dictionary with processed events, formatted props per event, the EV
+        result set, arbitrage opportunities, the odds cache versions it was
+        built from and the time it was built
+    """
+    version = next(snapshot_versions)
+    events_data = process_events(standard_events)
+    props_by_event = {event_id: event_props.props for event_id, event_props in event_props_by_event.items()}
+    result_set = EVResultSet(find_ev_opportunities(events_data, 0, props_by_event, scanner=ev_scanner))
+    with stage("arb_scan"):
+        arbs = find_arbitrage(standard_events, props_by_event)
+    check_alerts(result_set.opportunities)
+    return {
+        "events": events_data,
+        "props_by_event": props_by_event,
+        "result_set": result_set,
+        "arbs": arbs,
+        "scan_stats": dict(ev_scanner.stats),
+        "event_index": dict(event_index),
+        "stream_seq": ev_broadcaster.publish(result_set.opportunities),
+        "data_versions": snapshot_data_versions(props_by_event, version),
+        "version": version,
+        "updated_at": time.time(),
+    }
+
+def snapshot_data_versions(props_by_event, version):
+    """
+    Odds cache versions of the standard odds and of each event's props in a
+    snapshot, so a page can be keyed on just the parts it shows. A part no
+    longer in the cache gets the snapshot's own version.
+    """
+    standard = tuple(v or version for v in odds_cache.versions([standard_cache_key(sport) for sport in SPORTS]))
+    event_ids = list(props_by_event)
+    props = odds_cache.versions([props_cache_key(event_id) for event_id in event_ids])
+    return {"standard": standard, "props": {event_id: v or version for event_id, v in zip(event_ids, props)}}
+
+# Seeded with the clock so versions stay unique across processes and restarts
+snapshot_versions = itertools.count(time.time_ns())
+
+# Poller snapshots are consecutive, so only markets that moved get recomputed
+ev_scanner = IncrementalEVScanner()
+
+poller = OddsPoller(
+    refresh_standard_odds_data,
+    refresh_props_odds_data,
+    lambda standard_events, event_props_by_event: publish_snapshot(build_snapshot(standard_events, event_props_by_event)),
+    requests_per_hour=ODDS_POLLER_REQUESTS_PER_HOUR,
+    standard_interval=ODDS_POLLER_STANDARD_INTERVAL,
+    standard_cost=len(SPORTS),
+)
+
+# Live /ev updates: the poller publishes every snapshot; without it, a single
+# pump thread rescans (through the snapshot cache) while clients are connected
+EV_STREAM_INTERVAL = int(os.environ.get('EV_STREAM_INTERVAL', '30'))
+
+def stream_opportunities():
+    """Current EV opportunities for the stream pump when this process has no poller of its own."""
+    snapshot = latest_snapshot()
+    if snapshot:
+        return snapshot["result_set"].opportunities
+    return current_result_set().opportunities
+
+# Without a snapshot, requests that arrive together share one pass over the
+# odds cache (and its fetches) instead of each processing and scanning the slate
+scans = SingleFlight()
+
+def current_events():
+    """Processed events from the odds cache; concurrent callers share one pass."""
+    return scans.do("events", process_events)
+
+def current_opportunities():
+    """
+    EV opportunities (above 0%, unsorted) scanned from the odds cache, props
+    included. Concurrent callers share one scan, and every scan is checked
+    for alerts.
+    """
+    def scan():
+        opportunities = find_ev_opportunities(current_events(), 0, sort=False)
+        check_alerts(opportunities)
+        return opportunities
+    
+    return scans.do("ev_scan", scan)
+
+def current_result_set():
+    """current_opportunities() as an EVResultSet, for pages that need every opportunity in order."""
+    def build():
+        opportunities = sorted(current_opportunities(), key=lambda x: x["ev_percentage"], reverse=True)
+        return EVResultSet(opportunities)
+    
+    return scans.do("ev_result_set", build)
+
+# Multi-process deployments (e.g. gunicorn -w 4): set SHARED_SNAPSHOT_PATH and
+# only one process polls the API, publishing every snapshot to a memory-mapped
+# file the other workers read. SHARED_SNAPSHOT_ROLE is "auto" (workers elect
+# a leader through a lock file next to the snapshot), "writer" (always poll
+# and publish, as api/refresher.py does) or "reader" (never poll). Don't
+# combine with gunicorn --preload: the election has to happen in each worker.
+SHARED_SNAPSHOT_PATH = os.environ.get('SHARED_SNAPSHOT_PATH')
+SHARED_SNAPSHOT_ROLE = os.environ.get('SHARED_SNAPSHOT_ROLE', 'auto')
+
+# Snapshot fields written to the shared file; the rest is rebuilt on load
+SHARED_SNAPSHOT_FIELDS = ("events", "props_by_event", "arbs", "scan_stats", "event_index", "data_versions",
+                          "version", "updated_at")
+
+# The two big fields are pickled on their own, so loading a snapshot (say on a
+# cold start that only has to render /) doesn't decode them until a page needs them
+DEFERRED_SNAPSHOT_FIELDS = ("props_by_event", "opportunities")
+
+def snapshot_data(snapshot):
+    """The part of a snapshot that is written to disk."""
+    data = {field: snapshot[field] for field in SHARED_SNAPSHOT_FIELDS}
+    data["opportunities"] = snapshot["result_set"].opportunities
+    for field in DEFERRED_SNAPSHOT_FIELDS:
+        data[field] = pickle.dumps(data[field], protocol=pickle.HIGHEST_PROTOCOL)
+    return data
+
+def publish_snapshot(snapshot):
+    """Hand a freshly built snapshot to the other workers, if sharing is on."""
+    if shared_snapshot is not None:
+        try:
+            shared_snapshot.publish(snapshot_data(snapshot))
+        except Exception as e:
+            print(f"Error publishing shared snapshot: {str(e)}")
+    return snapshot
+
+class LoadedSnapshot(dict):
+    """
+    A snapshot rebuilt from disk. props_by_event, result_set and stream_seq
+    are decoded from the deferred fields the first time they're looked up.
+    """
+
+    def __init__(self, data):
+        super().__init__((field, data[field]) for field in SHARED_SNAPSHOT_FIELDS
+                         if field not in DEFERRED_SNAPSHOT_FIELDS)
+        self._deferred = {field: data[field] for field in DEFERRED_SNAPSHOT_FIELDS}
+        self._lock = threading.Lock()
+
+    def __missing__(self, key):
+        with self._lock:
+            if key in self:
+                return dict.__getitem__(self, key)  # decoded by another thread meanwhile
+            if key == "props_by_event":
+                self[key] = pickle.loads(self._deferred[key])
+            elif key in ("result_set", "stream_seq"):
+                opportunities = pickle.loads(self._deferred["opportunities"])
+                self["result_set"] = EVResultSet(opportunities)
+                # Stream sequence numbers are per process, so followers publish to their own clients
+                self["stream_seq"] = ev_broadcaster.publish(opportunities)
+            else:
+                raise KeyError(key)
+            return dict.__getitem__(self, key)
+
+def load_shared_snapshot(data):
+    """Rebuild a full snapshot from one written to disk by snapshot_data."""
+    snapshot = LoadedSnapshot(data)
+    # Lets /props find events without fetching the slate. The snapshot's index
+    # replaces this process's, so events that left the board stop resolving
+    # (find_event then treats them as it would on the leader)
+    with event_index_lock:
+        event_index.clear()
+        event_index.update(data["event_index"])
+    return snapshot
+
+shared_snapshot = SharedSnapshot(
+    SHARED_SNAPSHOT_PATH,
+    role=SHARED_SNAPSHOT_ROLE,
+    on_leader=poller.start,
+    on_load=load_shared_snapshot,
+) if SHARED_SNAPSHOT_PATH else None
+
+# Fast cold starts without a poller (e.g. on Vercel): set COLD_START_SNAPSHOT_PATH
+# to a writable file (such as /tmp/ev-cold-start.bin). A cold instance answers
+# straight away from the snapshot an earlier instance persisted there, or from
+# COLD_START_BUNDLED_SNAPSHOT shipped with the deploy (see api/refresher.py
+# --once), with a banner saying how old it is. A fresh snapshot is built in the
+# background whenever the one held is older than COLD_START_MAX_AGE seconds.
+# Off by default: each refresh fetches every event's props, so every cold or
+# stale instance spends that much Odds API quota whatever page it was asked for.
+COLD_START_SNAPSHOT_PATH = os.environ.get('COLD_START_SNAPSHOT_PATH')
+COLD_START_BUNDLED_SNAPSHOT = os.environ.get('COLD_START_BUNDLED_SNAPSHOT')
+COLD_START_MAX_AGE = int(os.environ.get('COLD_START_MAX_AGE', '60'))
+
+def build_fresh_snapshot():
+    """Fetch the slate and every event's props (through the odds cache) and build a snapshot."""
+    standard_events = get_standard_odds_data()
+    props_by_event = fetch_props_for_events(event.get("id") for event in standard_events)
+    return build_snapshot(standard_events, {
+        event_id: EventProps(None, props_data) for event_id, props_data in props_by_event.items()
+    })
+
+def load_bootstrap_snapshot(data):
+    """A persisted snapshot, flagged as stale since an earlier instance built it."""
+    snapshot = load_shared_snapshot(data)
+    snapshot["stale_since"] = snapshot["updated_at"]
+    return snapshot
+
+bootstrap_snapshot = BootstrapSnapshot(
+    COLD_START_SNAPSHOT_PATH,
+    build_fresh_snapshot,
+    bundled_path=COLD_START_BUNDLED_SNAPSHOT,
+    encode=snapshot_data,
+    decode=load_bootstrap_snapshot,
+    max_age=COLD_START_MAX_AGE,
+) if COLD_START_SNAPSHOT_PATH and not ODDS_POLLER_ENABLED and shared_snapshot is None else None
+
+ev_broadcaster = EVBroadcaster(
+    compute=None if ODDS_POLLER_ENABLED and shared_snapshot is None else stream_opportunities,
+    interval=EV_STREAM_INTERVAL,
+)
+
+app.add_template_global(opportunity_key, 'opportunity_key')
+
+# EV alerts: set ALERT_RULES_PATH to a JSON list of rules such as
+# {"name": "big props", "markets": ["player_props"], "min_ev": 4,
+#  "books": ["DraftKings", "FanDuel"], "min_minutes_before_start": 30}.
+# Every fresh scan is checked (only what changed since the last one) and
+# new matches are POSTed to ALERT_WEBHOOK_URL in debounced batches, or
+# logged when no webhook is set.
+ALERT_RULES_PATH = os.environ.get('ALERT_RULES_PATH')
+ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL')
+ALERT_DEBOUNCE_SECONDS = float(os.environ.get('ALERT_DEBOUNCE_SECONDS', '2'))
+ALERT_MAX_BATCH = int(os.environ.get('ALERT_MAX_BATCH', '50'))
+
+def log_alerts(alerts):
+    for alert in alerts:
+        print(f"EV alert [{alert['rule']}]: {alert['team']} {alert['line']} ({alert['market_type']}) "
+              f"{alert['best_odds']} at {alert['best_book']}, EV {alert['ev_percentage']}%")
+
+alert_webhook = WebhookSender(
+    ALERT_WEBHOOK_URL,
+    debounce=ALERT_DEBOUNCE_SECONDS,
+    max_batch=ALERT_MAX_BATCH,
+) if ALERT_WEBHOOK_URL else None
+
+alert_engine = AlertEngine(
+    load_rules(ALERT_RULES_PATH),
+    market_filters=EVResultSet.MARKET_FILTERS,
+    notify=alert_webhook.send if alert_webhook is not None else log_alerts,
+) if ALERT_RULES_PATH else None
+
+def check_alerts(opportunities):
+    """Run a full, freshly scanned opportunity set through the alert rules, if any are set."""
+    if alert_engine is not None:
+        with stage("alerts"):
+            alert_engine.process(opportunities)
+
+def latest_snapshot():
+    """
+    Latest precomputed snapshot: this process's poller's, the one the leader
+    process published, or the cold-start one. None if none is available yet.
+    """
+    if shared_snapshot is not None:
+        return poller.latest if shared_snapshot.is_leader else shared_snapshot.read()
+    if ODDS_POLLER_ENABLED:
+        return poller.latest
+    return bootstrap_snapshot.get() if bootstrap_snapshot is not None else None
+
+# Set PROFILING_ENABLED to allow ?profile=1 on any page, which returns the
+# request's sampled stacks (collapsed flamegraph format) instead of the page
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ('true', '1', 't')
+
+def render_page(template_name, **context):
+    """
+    render_template, timed as the "render" stage. Pages rendered from a
+    persisted cold-start snapshot get its build time as stale_since.
+    """
+    snapshot = latest_snapshot()
+    stale_since = snapshot.get("stale_since") if snapshot else None
+    with stage("render"):
+        return render_template(template_name, stale_since=stale_since, **context)
+
+# Rendered pages, reused until the odds they were rendered from change
+RENDER_CACHE_MAX_ENTRIES = int(os.environ.get('RENDER_CACHE_MAX_ENTRIES', '64'))
+
+render_cache = RenderCache(max_entries=RENDER_CACHE_MAX_ENTRIES)
+
+# Concurrent requests for a page that isn't cached yet wait for one render
+page_renders = SingleFlight()
+
+def odds_data_version(props_event_ids=(), all_props=False):
+    """
+    Version of the odds a page is rendered from: the standard odds plus the
+    props of props_event_ids (or of every event, with all_props). It only
+    changes when one of those does, so e.g. a props refresh leaves / cached.
+    Taken from the latest snapshot when there is one; otherwise from the
+    odds cache, after loading (or revalidating) those entries.
+    """
+    snapshot = latest_snapshot()
+    if snapshot:
+        data_versions = snapshot["data_versions"]
+        props = data_versions["props"]
+        event_ids = list(props) if all_props else props_event_ids
+        if all(event_id in props for event_id in event_ids):
+            return ("snapshot", data_versions["standard"], tuple(props[event_id] for event_id in event_ids))
+        # Pages for events missing from the snapshot fetch their props through the odds cache
+    standard_events = get_standard_odds_data()
+    event_ids = [event.get("id") for event in standard_events] if all_props else list(props_event_ids)
+    if event_ids:
+        fetch_props_for_events(event_ids)
+    keys = [standard_cache_key(sport) for sport in SPORTS] + [props_cache_key(event_id) for event_id in event_ids]
+    return ("cache",) + odds_cache.versions(keys)
+
+def cached_page(version, build):
+    """
+    Serve the page for this URL from the render cache, calling build() to
+    render it on a miss. Responses carry a strong ETag per encoding, answer
+    If-None-Match with 304 and are sent pre-compressed when the client allows.
+    """
+    if g.profiler is not None:
+        return build()
+    key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+    entry = render_cache.get(key)
+    if entry is None:
+        entry = page_renders.do(key, lambda: render_cache_entry(key, build))
+        if not isinstance(entry, dict):
+            return entry  # not a page (e.g. a 404), passed through uncached
+    
+    encoding = request.accept_encodings.best_match(
+        [encoding for encoding in ("br", "gzip") if encoding in entry["bodies"]], default="identity")
+    if render_cache.not_modified(entry, request.headers.get('If-None-Match')):
+        response = Response(status=304)
+    else:
+        response = Response(entry["bodies"][encoding], mimetype="text/html")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.headers["ETag"] = entry["etags"][encoding]
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+def render_cache_entry(key, build):
+    html = build()
+    if not isinstance(html, str):
+        return html
+    with stage("compress"):
+        return render_cache.put(key, html)
+
+metrics.register_collector(lambda: [
+    ("odds_cache_events_total", "counter", {"result": result}, count)
+    for result, count in odds_cache.stats.items()
+])
+metrics.register_collector(lambda: [
+    ("render_cache_events_total", "counter", {"result": result}, count)
+    for result, count in render_cache.stats.items()
+])
+metrics.register_collector(lambda: [
+    ("odds_api_requests_remaining", "gauge", {}, odds_client.quota["remaining"]),
+    ("odds_api_requests_used", "gauge", {}, odds_client.quota["used"]),
+])
+metrics.register_collector(lambda: [
+    (f"ev_scan_{name}", "gauge", {}, value) for name, value in ev_scanner.stats.items()
+])
+metrics.register_collector(lambda: [
+    ("single_flight_calls_total", "counter", {"group": group, "result": result}, count)
+    for group, flights in (("odds_cache", odds_cache.loads), ("scans", scans), ("renders", page_renders))
+    for result, count in flights.stats.items()
+])
+
+def alert_metrics():
+    if alert_engine is None:
+        return []
+    samples = [(f"ev_alerts_{name}_total", "counter", {}, value) for name, value in alert_engine.stats.items()]
+    if alert_webhook is not None:
+        samples += [("ev_alert_webhook_alerts_total", "counter", {"result": result}, count)
+                    for result, count in alert_webhook.stats.items()]
+    return samples
+
+metrics.register_collector(alert_metrics)
+
+@app.before_request
+def start_instrumentation():
+    g.timing_token = start_request_timings()
+    g.profiler = None
+    if PROFILING_ENABLED and request.args.get('profile') == '1':
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def finish_instrumentation(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        response = Response(profiler.collapsed(), mimetype="text/plain")
+    timings = request_timings()
+    if timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    if request.endpoint:
+        metrics.inc("http_requests_total", labels={"endpoint": request.endpoint, "status": str(response.status_code)})
+    return response
+
+@app.teardown_request
+def clear_instrumentation(exc=None):
+    token = g.pop('timing_token', None)
+    if token is not None:
+        end_request_timings(token)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus-style metrics: stage histograms, upstream counters, cache and quota gauges."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/', methods=['GET'])
 def index():
-    events_data = process_events()
+    return cached_page(odds_data_version(), render_index)
+
+def render_index():
+    snapshot = latest_snapshot()
+    events_data = snapshot["events"] if snapshot else current_events()
     all_books = set()
     for ev in events_data:
         for side in ("away","home"):
             all_books.update(ev["spread_data"][side]["book_lines"].keys())
     all_books = sorted(list(all_books))
     
-    return render_template("index.html", 
+    return render_page("index.html", 
                          events=events_data, 
                          all_books=all_books,
                          active_tab="main")
 
 @app.route('/props/<event_id>', methods=['GET'])
 def props(event_id):
-    # Get basic event info
-    events_data = process_events()
-    event = next((e for e in events_data if e["event_id"] == event_id), None)
+    # Looked up first: an event found through the per-event endpoint leaves its
+    # props in the odds cache for odds_data_version, and an unknown one stops here
+    event = find_event(event_id)
     
     if not event:
         return "Event not found", 404
     
+    return cached_page(odds_data_version([event_id]), lambda: render_props(event_id, event))
+
+def render_props(event_id, event):
     # Get props data
-    props_data = get_props_data_formatted(event_id)
+    snapshot = latest_snapshot()
+    if snapshot and event_id in snapshot["props_by_event"]:
+        props_data = snapshot["props_by_event"][event_id]
+    else:
+        props_data = get_props_data_formatted(event_id)
     
     # Get all books that have props
     props_books = set()
@@ -582,7 +1234,7 @@ def props(event_id):
             props_books.update(player_data['books'].keys())
     props_books = sorted(list(props_books))
     
-    return render_template("props.html",
+    return render_page("props.html",
                          event=event,
                          props_data=props_data,
                          all_books=props_books,
@@ -592,28 +1244,26 @@ def props(event_id):
 @app.route('/ev', methods=['GET'])
 def ev_page():
     """Display positive EV opportunities for both game spreads and player props."""
-    # Get all events data
-    events_data = process_events()
-    
-    # Get filter parameters
+    version = odds_data_version(all_props=True)
+    # Keyed on the odds alone: the stream position the page embeds is taken when
+    # it renders, and a client resuming from an older one is sent what it missed
+    return cached_page(version, render_ev_page)
+
+def render_ev_page():
+    # Get filter parameters (the page never shows non-positive EV, so the
+    # threshold can't go below the 0 the result set was scanned at)
     market_filter = request.args.get('market', 'all')
     min_ev = float(request.args.get('min_ev', '1.0'))
     
-    # Find EV opportunities with the specified threshold
-    ev_opportunities = find_ev_opportunities(events_data, min_ev_threshold=min_ev)
-    
-    # Apply market filter if specified
-    if market_filter != 'all':
-        if market_filter == 'spreads':
-            ev_opportunities = [ev for ev in ev_opportunities if ev.get('market_type') == 'Spread']
-        elif market_filter == 'player_props':
-            ev_opportunities = [ev for ev in ev_opportunities if 'Player' in ev.get('market_type', '')]
-        elif market_filter == 'points':
-            ev_opportunities = [ev for ev in ev_opportunities if ev.get('market_type') == 'Player Points']
-        elif market_filter == 'assists':
-            ev_opportunities = [ev for ev in ev_opportunities if ev.get('market_type') == 'Player Assists']
-        elif market_filter == 'rebounds':
-            ev_opportunities = [ev for ev in ev_opportunities if ev.get('market_type') == 'Player Rebounds']
+    # One scan answers the filter, the threshold and the market dropdown
+    snapshot = latest_snapshot()
+    if snapshot:
+        result_set = snapshot["result_set"]
+        stream_seq = snapshot["stream_seq"]
+    else:
+        result_set = current_result_set()
+        stream_seq = ev_broadcaster.publish(result_set.opportunities)
+    ev_opportunities = result_set.select(market_filter, min_ev)
     
     # Get the list of all books for display
     all_books = set()
@@ -623,18 +1273,188 @@ def ev_page():
     all_books = sorted(list(all_books))
     
     # Get available market types for filtering
-    market_types = set()
-    for ev in find_ev_opportunities(events_data, 0):  # Get all possible markets without filtering
-        market_types.add(ev.get('market_type'))
-    market_types = sorted(list(market_types))
+    market_types = result_set.market_types
     
-    return render_template("ev.html", 
+    return render_page("ev.html", 
                          opportunities=ev_opportunities,
                          all_books=all_books,
                          market_types=market_types,
                          active_tab="ev",
                          current_filter=market_filter,
-                         min_ev=min_ev)
+                         min_ev=min_ev,
+                         stream_since=ev_broadcaster.event_id(stream_seq))
+
+@app.route('/ev/stream', methods=['GET'])
+def ev_stream():
+    """
+    Server-Sent Events feed of added/changed/removed EV opportunities.
+    
+    Each client holds its request open, and so a worker, for as long as the
+    page is open: serve the app with threaded or async workers (e.g.
+    gunicorn --threads 8, or -k gevent), not plain sync workers.
+    """
+    # On a reconnect the browser sends the last event it got; ?since is where the page started
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    response = Response(ev_broadcaster.subscribe(last_event_id), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# JSON API
+
+EV_FIELDS = ("event_id", "commence_time", "home_team", "away_team", "market_type", "team", "line",
+             "best_book", "best_odds", "all_odds", "implied_probabilities", "individual_ev", "fair_odds",
+             "avg_implied_probability", "avg_american_odds", "ev_percentage", "odds_variance", "markets")
+EVENT_FIELDS = ("event_id", "away_team", "home_team", "commence_time", "spread_data")
+PROP_FIELDS = ("prop_type", "player", "line", "books")
+ARB_FIELDS = ("event_id", "commence_time", "home_team", "away_team", "market", "market_type", "player",
+              "line", "legs", "implied_total", "profit_percentage", "payout")
+
+def serialize_event(event):
+    """JSON-friendly copy of a processed event (SpreadLine records become objects)."""
+    def line_json(line):
+        return {"point": line.point, "price": line.price} if line else None
+    
+    spread_data = event["spread_data"]
+    serialized = {"hold": spread_data["hold"]}
+    for side in ("away", "home"):
+        serialized[side] = {
+            "best_line": line_json(spread_data[side]["best_line"]),
+            "book_lines": {book: line_json(line) for book, line in spread_data[side]["book_lines"].items()},
+        }
+    return {**event, "spread_data": serialized}
+
+def flatten_props(props_data):
+    """Formatted props as a flat list of prop lines, in display order."""
+    return [
+        {"prop_type": prop_type, "player": prop["player"], "line": prop["line"], "books": prop["books"]}
+        for prop_type, players in props_data.items()
+        for prop in players.values()
+    ]
+
+def api_page(items, fields, next_cursor, **extra):
+    """A page of results as JSON, or as streamed NDJSON when ?format=ndjson."""
+    if request.args.get('format') == 'ndjson':
+        response = Response(ndjson_lines(items, fields), mimetype="application/x-ndjson")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    return jsonify({**extra, "data": [project(item, fields) for item in items], "next_cursor": next_cursor})
+
+@app.errorhandler(BadRequest)
+def api_bad_request(e):
+    return jsonify({"error": str(e)}), 400
+
+@app.route('/api/ev', methods=['GET'])
+def api_ev():
+    """
+    Top EV opportunities as JSON.
+    
+    Query args: market, min_ev (default 0), limit (default 50), cursor,
+    fields (comma-separated), format=ndjson to stream one opportunity per line.
+    """
+    market_filter = request.args.get('market', 'all')
+    try:
+        min_ev = float(request.args.get('min_ev', '0'))
+    except ValueError:
+        raise BadRequest("min_ev must be a number")
+    limit = parse_limit(request.args.get('limit'))
+    after = decode_rank_cursor(request.args.get('cursor'))
+    fields = parse_fields(request.args.get('fields'), EV_FIELDS)
+    
+    snapshot = latest_snapshot()
+    if snapshot:
+        candidates = snapshot["result_set"].select(market_filter, min_ev)
+    else:
+        matches = EVResultSet.market_matcher(market_filter)
+        candidates = [
+            ev for ev in current_opportunities()
+            if matches(ev.get("market_type", "")) and ev["ev_percentage"] > min_ev
+        ]
+    
+    # Only the requested page is needed, so it is picked with a heap instead of sorting everything
+    page, next_cursor = paginate_ranked(candidates, after, limit, ev_rank)
+    return api_page(page, fields, next_cursor, total=len(candidates))
+
+def ev_rank(ev):
+    """API order of EV opportunities: highest EV first, ties by opportunity key."""
+    return (-ev["ev_percentage"], opportunity_key(ev))
+
+@app.route('/api/events', methods=['GET'])
+def api_events():
+    """Events with their spread lines; supports limit, cursor, fields and format=ndjson."""
+    limit = parse_limit(request.args.get('limit'))
+    offset = decode_cursor(request.args.get('cursor'))
+    fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+    
+    snapshot = latest_snapshot()
+    events_data = snapshot["events"] if snapshot else current_events()
+    page, next_cursor = paginate(events_data, offset, limit)
+    return api_page([serialize_event(event) for event in page], fields, next_cursor, total=len(events_data))
+
+@app.route('/api/props/<event_id>', methods=['GET'])
+def api_props(event_id):
+    """One event's player prop lines; supports limit, cursor, fields and format=ndjson."""
+    limit = parse_limit(request.args.get('limit'))
+    offset = decode_cursor(request.args.get('cursor'))
+    fields = parse_fields(request.args.get('fields'), PROP_FIELDS)
+    
+    snapshot = latest_snapshot()
+    if snapshot and event_id in snapshot["props_by_event"]:
+        props_data = snapshot["props_by_event"][event_id]
+    elif find_event(event_id) is None:
+        return jsonify({"error": f"Unknown event: {event_id}"}), 404
+    else:
+        props_data = get_props_data_formatted(event_id)
+    
+    prop_lines = flatten_props(props_data)
+    page, next_cursor = paginate(prop_lines, offset, limit)
+    return api_page(page, fields, next_cursor, event_id=event_id, total=len(prop_lines))
+
+@app.route('/api/arbs', methods=['GET'])
+def api_arbs():
+    """
+    Arbitrage opportunities across moneylines, spreads, totals and player props.
+    
+    Query args: market (h2h, spreads, totals or a player_* prop market),
+    min_profit (default 0), stake (total split across the legs, default 100),
+    limit, cursor, fields and format=ndjson.
+    """
+    market = request.args.get('market')
+    try:
+        min_profit = float(request.args.get('min_profit', '0'))
+        stake = float(request.args.get('stake', '100'))
+    except ValueError:
+        raise BadRequest("min_profit and stake must be numbers")
+    if stake <= 0:
+        raise BadRequest("stake must be positive")
+    limit = parse_limit(request.args.get('limit'))
+    after = decode_rank_cursor(request.args.get('cursor'))
+    fields = parse_fields(request.args.get('fields'), ARB_FIELDS)
+    
+    snapshot = latest_snapshot()
+    if snapshot and stake == 100:
+        arbs = [arb for arb in snapshot["arbs"] if arb["profit_percentage"] > min_profit]
+    else:
+        standard_events = get_standard_odds_data()
+        if snapshot:
+            props_by_event = snapshot["props_by_event"]
+        else:
+            props_by_event = fetch_props_for_events(event.get("id") for event in standard_events)
+        with stage("arb_scan"):
+            arbs = find_arbitrage(standard_events, props_by_event, min_profit, stake)
+    if market:
+        arbs = [arb for arb in arbs if arb["market"] == market]
+    
+    page, next_cursor = paginate_ranked(arbs, after, limit, lambda arb: (-arb["profit_percentage"], arb_key(arb)))
+    return api_page(page, fields, next_cursor, total=len(arbs))
+
+if shared_snapshot is not None:
+    shared_snapshot.start()  # starts the poller if this process is the leader
+elif ODDS_POLLER_ENABLED:
+    poller.start()
+
 # For local development
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,146 @@
+"""
+In-process metrics: counters, histograms, per-request stage timings and a
+Prometheus text exposition of all of it.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings collected for the current request, as a list of (stage, seconds)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters and histograms, keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, labels=None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_BUCKETS):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def register_collector(self, collector):
+        """
+        Add a callable run at scrape time that returns a list of
+        (name, type, labels, value) samples, e.g. for cache or quota gauges.
+        """
+        self._collectors.append(collector)
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, hist in series.items():
+                    for bound, count in zip(hist["buckets"], hist["counts"]):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+        seen = set()
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+                continue
+            for name, metric_type, labels, value in samples:
+                if value is None:
+                    continue
+                if name not in seen:
+                    self._header(lines, name, metric_type)
+                    seen.add(name)
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines, name, metric_type):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "Requests served by endpoint and status.")
+metrics.describe("ev_stage_seconds", "Time spent in each hot-path stage.")
+metrics.describe("odds_api_requests_total", "Upstream Odds API requests by status.")
+metrics.describe("odds_api_response_bytes_total", "Bytes received from the Odds API.")
+metrics.describe("odds_api_request_seconds", "Upstream Odds API request latency.")
+
+
+def start_request_timings():
+    """Begin collecting stage timings for the current request; returns a reset token."""
+    return _request_timings.set([])
+
+
+def request_timings():
+    """Stage timings recorded so far in the current request, or [] outside one."""
+    return _request_timings.get() or []
+
+
+def end_request_timings(token):
+    _request_timings.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Time a block: feeds the ev_stage_seconds histogram and the request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe("ev_stage_seconds", elapsed, {"stage": name})
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing_header(timings):
+    """Format (stage, seconds) pairs as a Server-Timing header value, merging repeats."""
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
@@ -0,0 +1,24 @@
+from typing import NamedTuple, Optional
+
+
+class SpreadLine(NamedTuple):
+    """One book's spread line: numeric point and American price. Formatted only at render time."""
+    point: Optional[float]
+    price: int
+
+
+def format_spread_line(line):
+    """Render a SpreadLine like '-1.5 (+110)'; empty for a missing line or price."""
+    if not line or not line.price:
+        return ""
+    return f"{line.point} ({line.price:+})"
+
+
+def prop_type_for_market(market_key):
+    """Short prop type for a player prop market key, e.g. 'player_pass_yds' -> 'pass_yds'."""
+    return market_key[len("player_"):] if market_key.startswith("player_") else market_key
+
+
+def prop_label(prop_type):
+    """Display name for a prop type, e.g. 'pass_yds' -> 'Pass Yds'."""
+    return prop_type.replace("_", " ").title()
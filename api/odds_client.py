@@ -0,0 +1,210 @@
+import random
+import threading
+import time
+
+from fixtures import FixtureStore
+from metrics import metrics
+
+
+class QuotaExhaustedError(Exception):
+    """Raised instead of sending a request that would eat into the reserved quota."""
+
+
+class OddsApiClient:
+    """
+    Pooled HTTP client for The Odds API.
+
+    Keeps one requests.Session (keep-alive, gzip) for every call, applies
+    timeouts, retries 429/5xx responses and connection errors with jittered
+    exponential backoff (or after the Retry-After the server asks for, up to
+    retry_after_cap seconds; a longer wait is not retried), and tracks the x-requests-remaining / x-requests-used
+    headers so callers can check the quota before spending it.
+
+    mode="record" also saves every response under fixture_dir; mode="replay"
+    serves the newest recording from fixture_dir and never touches the network.
+    """
+
+    BASE_URL = "https://api.the-odds-api.com/v4"
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, api_key, base_url=BASE_URL, timeout=(3.05, 15), max_retries=3,
+                 backoff_base=0.5, backoff_cap=8.0, retry_after_cap=30.0, pool_size=16, quota_reserve=0,
+                 mode="live", fixture_dir=None):
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"Unknown Odds API client mode: {mode}")
+        if mode != "live" and not fixture_dir:
+            raise ValueError(f"Odds API client mode '{mode}' needs a fixture_dir")
+        self.mode = mode
+        self.fixtures = FixtureStore(fixture_dir) if fixture_dir else None
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_after_cap = retry_after_cap
+        self.quota_reserve = quota_reserve
+        self.pool_size = pool_size
+        self._session = None
+
+        self._lock = threading.Lock()
+        self.requests_remaining = None
+        self.requests_used = None
+        self.last_request_cost = None
+
+    @property
+    def session(self):
+        """
+        The pooled session, created on first use. requests is imported there
+        too, so a process that never goes to the network (replay mode, or a
+        cold start served from a persisted snapshot) doesn't pay for it.
+        """
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate", "Accept": "application/json"})
+                self._session = session
+            return self._session
+
+    @property
+    def quota(self):
+        """Latest quota figures reported by the API (None until the first response)."""
+        with self._lock:
+            return {
+                "remaining": self.requests_remaining,
+                "used": self.requests_used,
+                "last_cost": self.last_request_cost,
+            }
+
+    def can_spend(self, cost=1):
+        """True if spending `cost` requests would keep us above the reserve."""
+        with self._lock:
+            if self.requests_remaining is None:
+                return True
+            return self.requests_remaining - cost >= self.quota_reserve
+
+    def get(self, path, params=None):
+        """
+        GET `path` (relative to the base URL) and return the decoded JSON body.
+
+        Raises QuotaExhaustedError if the reserve is already reached, or the
+        last requests.HTTPError / RequestException once retries run out.
+        In replay mode, raises FixtureNotFoundError for unrecorded requests.
+        """
+        if self.mode == "replay":
+            return self.fixtures.load_latest(path, params)
+
+        response = self._send(path, params)
+        body = response.json()
+        metrics.inc("odds_api_response_bytes_total", self._wire_bytes(response))
+        if self.mode == "record":
+            self.fixtures.save(path, params, body)
+        return body
+
+    def get_stream(self, path, params, consume):
+        """
+        Like get(), but hands the body to consume(stream) while it downloads
+        instead of decoding it into memory first, and returns what consume
+        returns. Recording and replay work on whole bodies, so in those modes
+        consume() is given the decoded JSON instead of a stream.
+        """
+        if self.mode != "live":
+            return consume(self.get(path, params))
+
+        response = self._send(path, params, stream=True)
+        try:
+            response.raw.decode_content = True
+            result = consume(response.raw)
+            metrics.inc("odds_api_response_bytes_total", self._wire_bytes(response))
+        finally:
+            response.close()
+        return result
+
+    def _send(self, path, params, stream=False):
+        """Send the request with retries; returns the successful response."""
+        if not self.can_spend():
+            raise QuotaExhaustedError(
+                f"Odds API quota reserve reached ({self.requests_remaining} requests remaining)"
+            )
+
+        import requests
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        query = dict(params or {})
+        query["apiKey"] = self.api_key
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=query, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.inc("odds_api_requests_total", labels={"status": "error"})
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            metrics.observe("odds_api_request_seconds", time.perf_counter() - start)
+            metrics.inc("odds_api_requests_total", labels={"status": str(response.status_code)})
+            self._record_quota(response.headers)
+            if response.ok:
+                return response
+
+            response.content  # read the error body so the connection can be reused
+            metrics.inc("odds_api_response_bytes_total", self._wire_bytes(response))
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(response, attempt)
+                if delay is not None:
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+            response.raise_for_status()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    @staticmethod
+    def _wire_bytes(response):
+        """Bytes of body read off the wire so far (compressed size when gzipped)."""
+        try:
+            return response.raw.tell()
+        except (AttributeError, OSError, ValueError):
+            return len(response.content)
+
+    def _backoff(self, attempt):
+        # "Full jitter": anywhere between 0 and the capped exponential delay
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying, or None if the server wants longer than retry_after_cap."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = max(0.0, float(retry_after))
+            except ValueError:
+                return self._backoff(attempt)
+            # Retrying any sooner would only be refused again
+            return delay if delay <= self.retry_after_cap else None
+        return self._backoff(attempt)
+
+    def _record_quota(self, headers):
+        with self._lock:
+            for header, attr in (("x-requests-remaining", "requests_remaining"),
+                                 ("x-requests-used", "requests_used"),
+                                 ("x-requests-last", "last_request_cost")):
+                value = headers.get(header)
+                if value is None:
+                    continue
+                try:
+                    setattr(self, attr, int(float(value)))
+                except ValueError:
+                    continue
@@ -0,0 +1,72 @@
+"""
+Odds conversions shared by the EV scan, the spread tables and the arbitrage
+scanner.
+
+American prices are whole numbers in a narrow range, so decimal odds and
+implied probabilities for every price within +/-TABLE_LIMIT are worked out
+once at import and conversions become dict lookups. Table values come from
+the same arithmetic as the formulas, so a lookup returns exactly what the
+formula would. Anything else (fractional or out-of-range prices) falls back
+to the formula. Integral floats such as -110.0 hash like the ints they equal
+and are looked up as well.
+
+ev_engine has the numpy versions of these conversions for whole odds matrices.
+"""
+
+# Prices from -TABLE_LIMIT to +TABLE_LIMIT are precomputed
+TABLE_LIMIT = 10000
+
+
+def _decimal(american_odds):
+    if american_odds < 0:
+        return 1 + (100 / abs(american_odds))
+    else:
+        return 1 + (american_odds / 100)
+
+
+def _implied(odds):
+    if odds > 0:
+        return 100 / (odds + 100)
+    else:
+        return abs(odds) / (abs(odds) + 100)
+
+
+# Same arithmetic as _decimal and _implied, inlined so building takes a few ms
+DECIMAL_TABLE = {odds: 1 + (100 / -odds) for odds in range(-TABLE_LIMIT, 0)}
+DECIMAL_TABLE.update({odds: 1 + (odds / 100) for odds in range(0, TABLE_LIMIT + 1)})
+IMPLIED_TABLE = {odds: -odds / (-odds + 100) for odds in range(-TABLE_LIMIT, 1)}
+IMPLIED_TABLE.update({odds: 100 / (odds + 100) for odds in range(1, TABLE_LIMIT + 1)})
+
+
+def american_to_decimal(american_odds):
+    """Convert American odds to decimal."""
+    # Decimal odds are never 0, so a miss is the only way to get a falsy value
+    return DECIMAL_TABLE.get(american_odds) or _decimal(american_odds)
+
+
+def implied_probability(odds):
+    """Implied probability of American odds."""
+    # 0 is only ever the probability of price 0; recomputing it gives 0 again
+    return IMPLIED_TABLE.get(odds) or _implied(odds)
+
+
+def decimal_to_american(decimal_odds):
+    """Convert decimal odds to American."""
+    if decimal_odds <= 1.0:
+        return 0  # Just a fallback
+    elif decimal_odds < 2.0:
+        return int(-100 / (decimal_odds - 1))
+    else:
+        return int((decimal_odds - 1) * 100)
+
+
+def decimal_odds(prices):
+    """american_to_decimal for every price in an iterable, as a list."""
+    lookup = DECIMAL_TABLE.get
+    return [lookup(price) or _decimal(price) for price in prices]
+
+
+def implied_probabilities(prices):
+    """implied_probability for every price in an iterable, as a list."""
+    lookup = IMPLIED_TABLE.get
+    return [lookup(price) or _implied(price) for price in prices]
@@ -0,0 +1,124 @@
+"""
+Helpers for the JSON API: cursors, top-k selection, field projection and NDJSON.
+
+Ranked lists (EV opportunities, arbs) are re-ranked on every poll, so their
+cursors hold the rank of the last item served; lists in upstream order
+(events, props) use plain offsets.
+"""
+import base64
+import heapq
+import json
+
+MAX_PAGE_SIZE = 500
+
+
+class BadRequest(ValueError):
+    """Invalid API query parameter; the message is safe to return to the client."""
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def _decode(cursor, field):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))[field]
+    except (ValueError, KeyError, TypeError):
+        raise BadRequest("Invalid cursor")
+
+
+def encode_cursor(offset):
+    return _encode({"o": offset})
+
+
+def decode_cursor(cursor):
+    """Offset encoded in an opaque cursor (0 for no cursor)."""
+    if not cursor:
+        return 0
+    offset = _decode(cursor, "o")
+    if not isinstance(offset, int) or offset < 0:
+        raise BadRequest("Invalid cursor")
+    return offset
+
+
+def encode_rank_cursor(rank):
+    return _encode({"a": list(rank)})
+
+
+def decode_rank_cursor(cursor):
+    """Rank tuple encoded in an opaque cursor by encode_rank_cursor (None for no cursor)."""
+    if not cursor:
+        return None
+    rank = _decode(cursor, "a")
+    if not isinstance(rank, list) or not all(isinstance(part, (int, float, str)) for part in rank):
+        raise BadRequest("Invalid cursor")
+    return tuple(rank)
+
+
+def parse_limit(value, default=50):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if limit < 1:
+        raise BadRequest("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(value, allowed):
+    """Requested field names (None means all), rejecting anything not in `allowed`."""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(item, fields):
+    if fields is None:
+        return item
+    return {field: item.get(field) for field in fields}
+
+
+def top_k(items, k, rank):
+    """The k items with the lowest rank(item), lowest first. Uses a heap rather than sorting everything."""
+    return heapq.nsmallest(k, items, key=rank)
+
+
+def paginate_ranked(items, after, limit, rank):
+    """
+    One page of items in rank order, starting strictly after the rank
+    `after` (None for the first page); returns (page, next_cursor or None).
+
+    rank(item) must be unique per item (e.g. score plus identity key). The
+    cursor holds the rank of the last item served, not an offset, so a list
+    re-ranked between requests doesn't repeat or skip the items around it.
+    """
+    try:
+        if after is not None:
+            items = [item for item in items if rank(item) > after]
+        page = top_k(items, limit + 1, rank)
+    except TypeError:
+        raise BadRequest("Invalid cursor")  # a rank of the wrong shape
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_rank_cursor(rank(page[-1]))
+
+
+def paginate(items, offset, limit):
+    """Slice one page; returns (page, next_cursor or None)."""
+    page = items[offset:offset + limit]
+    next_cursor = encode_cursor(offset + limit) if len(items) > offset + limit else None
+    return page, next_cursor
+
+
+def ndjson_lines(items, fields=None):
+    """Serialize items one line at a time so a streaming response can start right away."""
+    for item in items:
+        yield json.dumps(project(item, fields)) + "\n"
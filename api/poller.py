@@ -0,0 +1,154 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+# (seconds until tipoff, props refresh interval in seconds). The first tier
+# whose cutoff the event is inside wins; games already underway use the first.
+DEFAULT_PROPS_SCHEDULE = (
+    (60 * 60, 2 * 60),
+    (6 * 60 * 60, 10 * 60),
+    (24 * 60 * 60, 30 * 60),
+    (float("inf"), 2 * 60 * 60),
+)
+
+
+def seconds_until(commence_time, now=None):
+    """Seconds from now until an ISO-8601 commence_time (negative once started)."""
+    if not commence_time:
+        return float("inf")
+    try:
+        start = datetime.fromisoformat(commence_time.replace("Z", "+00:00"))
+    except ValueError:
+        return float("inf")
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    now = now if now is not None else time.time()
+    return start.timestamp() - now
+
+
+def props_refresh_interval(commence_time, schedule=DEFAULT_PROPS_SCHEDULE, now=None):
+    """How often props for an event tipping off at commence_time should refresh."""
+    remaining = seconds_until(commence_time, now)
+    for cutoff, interval in schedule:
+        if remaining <= cutoff:
+            return interval
+    return schedule[-1][1]
+
+
+class RequestBudget:
+    """Token bucket enforcing a requests-per-hour budget."""
+
+    def __init__(self, requests_per_hour):
+        self.capacity = max(1.0, float(requests_per_hour))
+        self.rate = self.capacity / 3600.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_spend(self, cost=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < cost:
+                return False
+            self.tokens -= cost
+            return True
+
+
+class OddsPoller:
+    """
+    Background refresher that keeps the latest odds and EV results in memory.
+
+    Every tick it refreshes the standard markets when due, then the props of
+    every event whose schedule says it is due, soonest tipoff first, as long as
+    the requests-per-hour budget allows. Whenever anything was refreshed,
+    on_update(standard_events, props_by_event) is called to rebuild the
+    precomputed snapshot, which request handlers then read from `latest`.
+    fetch_standard costs standard_cost requests (one per sport).
+    """
+
+    def __init__(self, fetch_standard, fetch_props, on_update, requests_per_hour=120,
+                 standard_interval=60, props_schedule=DEFAULT_PROPS_SCHEDULE, tick=5, standard_cost=1):
+        self.fetch_standard = fetch_standard
+        self.fetch_props = fetch_props
+        self.on_update = on_update
+        self.budget = RequestBudget(requests_per_hour)
+        self.standard_interval = standard_interval
+        self.standard_cost = standard_cost
+        self.props_schedule = props_schedule
+        self.tick = tick
+
+        self.latest = None
+        self.standard_events = None
+        self.standard_fetched_at = None
+        self.props_by_event = {}
+        self.props_fetched_at = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="odds-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Error in odds poller: {str(e)}")
+            self._stop.wait(self.tick)
+
+    def poll_once(self, now=None):
+        """Run one scheduling pass; returns True if anything was refreshed."""
+        now = now if now is not None else time.time()
+        changed = False
+
+        standard_due = (self.standard_fetched_at is None
+                        or now - self.standard_fetched_at >= self.standard_interval)
+        if standard_due and self.budget.try_spend(self.standard_cost):
+            try:
+                self.standard_events = self.fetch_standard()
+                self.standard_fetched_at = now
+                changed = True
+            except Exception as e:
+                self.standard_fetched_at = now
+                print(f"Error polling standard odds: {str(e)}")
+
+        if self.standard_events is None:
+            return changed
+
+        # Forget props for events that dropped off the board
+        live_ids = {event.get("id") for event in self.standard_events}
+        for event_id in list(self.props_fetched_at):
+            if event_id not in live_ids:
+                self.props_fetched_at.pop(event_id, None)
+                if self.props_by_event.pop(event_id, None) is not None:
+                    changed = True
+
+        for event in sorted(self.standard_events, key=lambda e: seconds_until(e.get("commence_time"), now)):
+            event_id = event.get("id")
+            last = self.props_fetched_at.get(event_id)
+            interval = props_refresh_interval(event.get("commence_time"), self.props_schedule, now)
+            if last is not None and now - last < interval:
+                continue
+            if not self.budget.try_spend():
+                break
+            try:
+                self.props_by_event[event_id] = self.fetch_props(event_id)
+                self.props_fetched_at[event_id] = now
+                changed = True
+            except Exception as e:
+                # Wait out the interval rather than retrying every tick
+                self.props_fetched_at[event_id] = now
+                print(f"Error polling props for event {event_id}: {str(e)}")
+
+        if changed:
+            self.latest = self.on_update(self.standard_events, dict(self.props_by_event))
+        return changed
@@ -0,0 +1,52 @@
+import sys
+import threading
+
+
+class SamplingProfiler:
+    """
+    Minimal wall-clock sampling profiler for one thread.
+
+    A helper thread snapshots the target thread's stack every `interval`
+    seconds. collapsed() returns the samples in the "frame;frame;frame count"
+    format that flamegraph tools read.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005, max_depth=64):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = {}
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+            self.sample_count += 1
+
+    def collapsed(self):
+        """Collapsed stacks, heaviest first."""
+        ordered = sorted(self.samples.items(), key=lambda item: item[1], reverse=True)
+        return "\n".join(f"{stack} {count}" for stack, count in ordered) + "\n"
+
@@ -0,0 +1,180 @@
+"""
+One-pass ingestion of per-event props payloads.
+
+The payload is read one bookmaker at a time (incrementally from the response
+stream when the optional ijson package is installed) and every market's
+Over/Under outcomes are paired in a single pass straight into the compact
+{prop_type: {prop_key: prop}} structure the pages use. The full JSON document
+never has to sit in memory.
+"""
+import json
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from models import prop_type_for_market
+
+EVENT_FIELDS = ("id", "sport_key", "home_team", "away_team", "commence_time")
+
+
+class EventProps(NamedTuple):
+    """One event's top-level fields (None if unknown) and its formatted props."""
+    event: Optional[dict]
+    props: dict
+
+
+class PropsBuilder:
+    """Accumulates formatted props one bookmaker at a time."""
+
+    def __init__(self):
+        self._sections = {}
+
+    def add_bookmaker(self, bookmaker):
+        book_name = bookmaker.get("title")
+        for market in bookmaker.get("markets", []):
+            market_key = market.get("key", "")
+            if not market_key.startswith("player_"):
+                continue
+            section = self._sections.setdefault(prop_type_for_market(market_key), {})
+
+            # First Over and first Under quoted for each player
+            pairs = {}
+            for outcome in market.get("outcomes", []):
+                player_name = outcome.get("description")
+                side = outcome.get("name")
+                if not player_name or side not in ("Over", "Under"):
+                    continue
+                pair = pairs.setdefault(player_name, [None, None])
+                slot = 0 if side == "Over" else 1
+                if pair[slot] is None:
+                    pair[slot] = outcome
+
+            # The Over outcome sets the line; a player without one is skipped
+            for player_name, (over, under) in pairs.items():
+                if over is None:
+                    continue
+                point = over.get("point")
+                prop_key = f"{player_name}_{point}"
+                prop = section.get(prop_key)
+                if prop is None:
+                    prop = section[prop_key] = {"player": player_name, "line": point, "books": {}}
+                prop["books"][book_name] = {
+                    "point": point,
+                    "over_price": over.get("price"),
+                    "under_price": under.get("price") if under else None,
+                }
+
+    def result(self, prop_markets=()):
+        """
+        Formatted props: a section for every configured market (in order, even
+        if empty), then any other player markets seen. Props within a section
+        are sorted by player name, case-insensitively.
+        """
+        prop_types = [prop_type_for_market(m) for m in prop_markets if m.startswith("player_")]
+        prop_types += [prop_type for prop_type in self._sections if prop_type not in prop_types]
+        return {
+            prop_type: dict(sorted(
+                self._sections.get(prop_type, {}).items(),
+                key=lambda item: item[1]["player"].lower(),
+            ))
+            for prop_type in prop_types
+        }
+
+
+@lru_cache(maxsize=None)
+def load_ijson():
+    """
+    The optional ijson module, or None if it isn't installed. Imported on
+    first use rather than with this module, to keep it off the cold-start path.
+    """
+    try:
+        import ijson
+    except ImportError:  # falls back to decoding the whole body with json
+        return None
+    return ijson
+
+
+class _Recorder:
+    """File-like wrapper that keeps a copy of everything read through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.chunks = []
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.chunks.append(data)
+        return data
+
+
+class _Replay:
+    """File-like reader that replays already-read bytes, then carries on with the stream."""
+
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.stream.read(), b""
+            return data
+        data, self.head = self.head[:size], self.head[size:]
+        return data
+
+
+def iter_payload(source):
+    """
+    Yield ("field", name, value) for the event's top-level fields and
+    ("bookmaker", None, bookmaker) for each bookmaker, in document order.
+    source is a decoded payload dict or a binary stream of JSON.
+
+    When streaming, only fields that come before "bookmakers" are seen, which
+    is how the API orders them.
+    """
+    ijson = None if isinstance(source, dict) else load_ijson()
+    if ijson is None:
+        payload = source if isinstance(source, dict) else json.load(source)
+        for name in EVENT_FIELDS:
+            if name in payload:
+                yield "field", name, payload[name]
+        for bookmaker in payload.get("bookmakers", []):
+            yield "bookmaker", None, bookmaker
+        return
+
+    # Read the header event by event, then hand everything read so far plus
+    # the rest of the stream to ijson's items(), which builds each bookmaker
+    # natively instead of one parse event at a time in Python
+    recorder = _Recorder(source)
+    for prefix, event, value in ijson.parse(recorder, use_float=True):
+        if prefix == "" and event == "map_key" and value == "bookmakers":
+            break
+        if prefix in EVENT_FIELDS and event not in ("start_map", "start_array"):
+            yield "field", prefix, value
+    stream = _Replay(b"".join(recorder.chunks), source)
+    for bookmaker in ijson.items(stream, "bookmakers.item", use_float=True):
+        yield "bookmaker", None, bookmaker
+
+
+def parse_props_payload(source, markets_for_sport=lambda sport: "", on_bookmaker=None):
+    """
+    Build an EventProps from a per-event odds payload.
+
+    Args:
+        source: Decoded payload dict, or a binary stream of its JSON
+        markets_for_sport: Callable giving the comma-separated prop markets
+            configured for a sport, whose sections always appear
+        on_bookmaker: Optional callable(event_fields, bookmaker) run for each
+            bookmaker as it is parsed, e.g. to record history
+    """
+    event = {}
+    builder = PropsBuilder()
+    for kind, name, value in iter_payload(source):
+        if kind == "field":
+            event[name] = value
+            continue
+        builder.add_bookmaker(value)
+        if on_bookmaker is not None:
+            on_bookmaker(event, value)
+    markets = markets_for_sport(event.get("sport_key")) or ""
+    return EventProps(event or None, builder.result(markets.split(",")))
@@ -0,0 +1,45 @@
+"""
+Standalone snapshot refresher.
+
+Polls the Odds API and publishes every processed snapshot to
+SHARED_SNAPSHOT_PATH, so web workers started with SHARED_SNAPSHOT_ROLE=reader
+serve it without making upstream calls of their own:
+
+    SHARED_SNAPSHOT_PATH=/tmp/ev-snapshot.bin python api/refresher.py
+    SHARED_SNAPSHOT_PATH=/tmp/ev-snapshot.bin SHARED_SNAPSHOT_ROLE=reader gunicorn -w 4 ...
+
+With --once it instead builds a single snapshot, writes it to the given file
+and exits, e.g. at deploy time to produce the file COLD_START_BUNDLED_SNAPSHOT
+points to:
+
+    python api/refresher.py --once api/bootstrap-snapshot.bin
+"""
+import os
+import sys
+import time
+
+
+def write_once(path):
+    os.environ["ODDS_POLLER_ENABLED"] = "false"
+    os.environ.pop("SHARED_SNAPSHOT_PATH", None)
+    os.environ.pop("COLD_START_SNAPSHOT_PATH", None)
+    import index
+    from shared_snapshot import SnapshotFile
+
+    snapshot = index.build_fresh_snapshot()
+    SnapshotFile(path).write(index.snapshot_data(snapshot), 1)
+    print(f"Wrote a snapshot of {len(snapshot['events'])} events to {path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--once":
+        write_once(sys.argv[2])
+        sys.exit()
+    if not os.environ.get("SHARED_SNAPSHOT_PATH"):
+        sys.exit("Set SHARED_SNAPSHOT_PATH to the file the web workers read")
+    os.environ["SHARED_SNAPSHOT_ROLE"] = "writer"
+    import index  # starts the poller, which publishes each snapshot
+
+    print(f"Publishing snapshots to {index.SHARED_SNAPSHOT_PATH}")
+    while True:
+        time.sleep(3600)
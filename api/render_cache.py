@@ -0,0 +1,92 @@
+"""
+Cache of rendered pages keyed by route, query args and the version of the
+odds data they were rendered from, with strong ETags and pre-compressed bodies.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional: pages are still served gzipped or plain
+    brotli = None
+
+
+def parse_etags(header):
+    """Entity tags listed in an If-None-Match header (weak tags compare equal to strong ones)."""
+    if not header:
+        return set()
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class RenderCache:
+    """
+    Bounded LRU of rendered pages.
+
+    Each page is stored once per encoding (identity, gzip and, when the brotli
+    package is installed, br), compressed at store time. Every encoding gets
+    its own strong ETag derived from the page content, so a repeat viewer can
+    be answered with a 304 and no body.
+    """
+
+    def __init__(self, max_entries=64, gzip_level=6, brotli_quality=5):
+        self.max_entries = max_entries
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+    def get(self, key):
+        """The stored page for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key, html):
+        """Encode and compress a rendered page, store it under key and return the entry."""
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        bodies = {"identity": body, "gzip": gzip.compress(body, self.gzip_level)}
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body, quality=self.brotli_quality)
+        entry = {
+            "bodies": bodies,
+            "etags": {
+                encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+                for encoding in bodies
+            },
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        return entry
+
+    def not_modified(self, entry, if_none_match):
+        """Whether an If-None-Match header matches any representation of entry."""
+        tags = parse_etags(if_none_match)
+        if "*" in tags or tags & set(entry["etags"].values()):
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return True
+        return False
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,182 @@
+"""
+Snapshot sharing between worker processes.
+
+One process (the leader) polls the Odds API and publishes every processed
+snapshot to a versioned binary file. The others map the file into memory and
+decode it only when a new version appears. Each publish writes a temporary
+file and os.replace()s it over the old one. Readers therefore see either the
+old snapshot or the new one, never a partial write.
+"""
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # no flock (e.g. Windows): every process acts as its own leader
+    fcntl = None
+
+# Bumped whenever the payload layout changes, so older files read as missing
+MAGIC = b"EVSNAP03"
+# magic, sequence number, payload length
+HEADER = struct.Struct("<8sQQ")
+
+
+class SnapshotFile:
+    """
+    A snapshot file: header (magic, sequence, payload length) then a pickled
+    payload. The file must only be writable by the app itself, since it is
+    unpickled on read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._identity = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def sequence(self):
+        """Sequence number of the current file, or 0 if there is none (or it's unreadable)."""
+        try:
+            with open(self.path, "rb") as f:
+                magic, sequence, _ = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return 0
+        return sequence if magic == MAGIC else 0
+
+    def write(self, data, sequence):
+        """Atomically replace the file with data under the given sequence number."""
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, sequence, len(payload)))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def read(self):
+        """
+        Latest published data, or None if nothing has been published yet. The
+        file is only mapped and decoded again when it has been replaced.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if identity == self._identity:
+                return self._data
+            try:
+                data = self._load()
+            except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+                print(f"Error reading shared snapshot: {str(e)}")
+                return self._data
+            self._identity, self._data = identity, data
+            return data
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, _, length = HEADER.unpack_from(mapped)
+                if magic != MAGIC or HEADER.size + length > len(mapped):
+                    raise ValueError("not a complete snapshot file")
+                with memoryview(mapped)[HEADER.size:HEADER.size + length] as payload:
+                    return pickle.loads(payload)
+
+
+class SharedSnapshot:
+    """
+    Leader election plus publish/read of a SnapshotFile.
+
+    role="auto": processes race for a lock file next to the snapshot. The
+    winner becomes leader and on_leader() is called (e.g. to start the
+    poller). The others read, and retry the lock every takeover_interval
+    seconds so one of them takes over if the leader dies.
+    role="writer": always the leader (e.g. a standalone refresher).
+    role="reader": never the leader.
+
+    on_load(data) turns freshly decoded data into the snapshot callers get.
+    """
+
+    def __init__(self, path, role="auto", on_leader=None, on_load=None,
+                 takeover_interval=5, check_interval=0.5):
+        if role not in ("auto", "writer", "reader"):
+            raise ValueError(f"Unknown shared snapshot role: {role}")
+        self.file = SnapshotFile(path)
+        self.role = role
+        self.on_leader = on_leader
+        self.on_load = on_load
+        self.takeover_interval = takeover_interval
+        self.check_interval = check_interval
+        self.is_leader = False
+        self._sequence = 0
+        self._lock_file = None
+        self._checked_at = 0.0
+        self._loaded = None
+        self._snapshot = None
+        self._read_lock = threading.Lock()
+
+    def start(self):
+        if self.role == "writer" or (self.role == "auto" and self._try_lock()):
+            self._become_leader()
+        elif self.role == "auto":
+            threading.Thread(target=self._wait_for_takeover, name="snapshot-takeover", daemon=True).start()
+
+    def publish(self, data):
+        """Write data for the other workers (leader only); returns its sequence number."""
+        self._sequence += 1
+        self.file.write(data, self._sequence)
+        return self._sequence
+
+    def read(self):
+        """The latest snapshot published by the leader, passed through on_load (or None)."""
+        with self._read_lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            data = self.file.read()
+            if data is not self._loaded:
+                self._loaded = data
+                self._snapshot = self.on_load(data) if (self.on_load and data is not None) else data
+            return self._snapshot
+
+    def _become_leader(self):
+        # Carry the sequence on from whatever an earlier leader published
+        self._sequence = self.file.sequence()
+        self.is_leader = True
+        if self.on_leader:
+            self.on_leader()
+
+    def _try_lock(self):
+        if fcntl is None:
+            return True
+        lock_file = open(self.file.path + ".lock", "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held (and the lock kept) for the life of the process
+        self._lock_file = lock_file
+        return True
+
+    def _wait_for_takeover(self):
+        while not self._try_lock():
+            time.sleep(self.takeover_interval)
+        print("Took over as shared snapshot leader")
+        self._become_leader()
@@ -0,0 +1,114 @@
+"""
+In-process single-flight: concurrent calls for the same key share one
+computation.
+
+A burst of requests that all need the same upstream fetch or the same EV
+scan would otherwise each run it. With a SingleFlight the first caller for a
+key runs it and everyone who asks for that key while it is running waits for
+the same result.
+"""
+import threading
+from concurrent.futures import CancelledError, Future
+
+
+class _Call(Future):
+    """
+    One computation for a key. claimed is set once a caller is running it;
+    an interrupted call points at the call that replaces it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.claimed = False
+        self.successor = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent do(key, fn) calls.
+
+    The first caller for a key (the leader) runs fn() in its own thread.
+    Callers that arrive while it runs wait for it and get the same return
+    value, or have the same exception raised. Nothing is cached: once the
+    call finishes the key is forgotten, and the next do() starts afresh.
+
+    If the leader is interrupted by something that isn't an Exception
+    (KeyboardInterrupt, SystemExit, a generator being closed), the call
+    counts as cancelled: the waiters don't inherit the interruption, and one
+    of them runs fn() again as the new leader while the rest wait for it. A
+    waiter can also give up on its own by passing a timeout, without
+    affecting the call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "shared": 0, "errors": 0, "cancelled": 0}
+
+    def do(self, key, fn, timeout=None):
+        """
+        fn()'s result for key, run once however many threads ask at the same time.
+
+        Raises concurrent.futures.TimeoutError if timeout seconds pass
+        while waiting on another caller's computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+            leader = self._claim(call)
+            if not leader:
+                self.stats["shared"] += 1
+        while not leader:
+            try:
+                return call.result(timeout)
+            except CancelledError:
+                # The leader was interrupted: move on to the call that replaced
+                # it, and run it unless another waiter already does
+                with self._lock:
+                    call = call.successor
+                    leader = self._claim(call)
+        return self._run(key, call, fn)
+
+    def in_flight(self, key):
+        """Whether a computation for key is running right now."""
+        with self._lock:
+            call = self._calls.get(key)
+            return call is not None and call.claimed
+
+    def _claim(self, call):
+        # Called with the lock held
+        if call.claimed:
+            return False
+        call.claimed = True
+        self.stats["leaders"] += 1
+        return True
+
+    def _run(self, key, call, fn):
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, call)
+            with self._lock:
+                self.stats["errors"] += 1
+            call.set_exception(e)
+            raise
+        except BaseException:
+            # Put an unclaimed call in its place before waking the waiters,
+            # so they all hand over to the same one (as does the next caller
+            # if no one was waiting)
+            with self._lock:
+                call.successor = self._calls[key] = _Call()
+                self.stats["cancelled"] += 1
+            call.cancel()
+            raise
+        self._finish(key, call)
+        call.set_result(result)
+        return result
+
+    def _finish(self, key, call):
+        # Forget the call before waking the waiters, so a retry after a
+        # failure starts a fresh computation
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+
+class SnapshotCache:
+    """
+    Bounded in-memory cache for odds snapshots with stale-while-revalidate.
+
+    Entries are keyed by whatever the caller passes in, e.g.
+    (sport, regions, markets, event_id). Once an entry is older than its TTL it
+    is still served, but a background refresh is kicked off. Entries older than
+    max_stale are reloaded inline. The least recently used entry is evicted once
+    max_entries is reached.
+
+    Loads of the same key never overlap: callers that miss while the key is
+    already being loaded (inline or by a background refresh) wait for that
+    load instead of starting their own.
+
+    `version` goes up whenever a stored value changes, so callers can tell
+    whether anything derived from the cache is still current. Each entry
+    keeps the version it was stored at, so versions(keys) tells whether
+    anything derived from just those entries is.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=60, max_stale=600, first_version=0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = first_version
+        self.loads = SingleFlight()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "refresh_errors": 0}
+
+    def get(self, key, loader, ttl=None):
+        """
+        Return the cached value for key, calling loader() to fill it on a miss.
+
+        Args:
+            key: Hashable cache key
+            loader: Zero-argument callable that fetches a fresh value
+            ttl: Seconds the value stays fresh (defaults to default_ttl)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry["stored_at"]
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry["value"]
+                if age <= ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if not entry["refreshing"]:
+                        entry["refreshing"] = True
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader), daemon=True
+                        ).start()
+                    return entry["value"]
+            self.stats["misses"] += 1
+
+        return self.refresh(key, loader)
+
+    def refresh(self, key, loader):
+        """Load key now with loader() and store it, or wait for a load of key already in progress."""
+        return self.loads.do(key, lambda: self._load(key, loader))
+
+    def _load(self, key, loader):
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self.version += 1
+            self._entries[key] = {"value": value, "stored_at": time.monotonic(), "refreshing": False,
+                                  "version": self.version}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def versions(self, keys):
+        """The version each key was stored at, as a tuple (None for keys not in the cache)."""
+        with self._lock:
+            return tuple(self._entries[key]["version"] if key in self._entries else None for key in keys)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.version += 1
+
+    def _refresh(self, key, loader):
+        try:
+            self.refresh(key, loader)
+        except Exception as e:
+            print(f"Error refreshing cached snapshot {key}: {str(e)}")
+            with self._lock:
+                self.stats["refresh_errors"] += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry["refreshing"] = False
@@ -0,0 +1,177 @@
+"""
+Synthetic Odds API payloads for offline benchmarks.
+
+Payload shapes match what the sport odds and per-event odds endpoints return.
+Prices are centred on a hidden fair probability with per-book noise and vig,
+so the EV scan finds a realistic mix of positive and negative edges.
+"""
+import copy
+import random
+from datetime import datetime, timedelta, timezone
+
+from odds_math import implied_probability
+
+PROP_MARKETS = ("player_points", "player_assists", "player_rebounds")
+PROP_LINES = {"player_points": (8.5, 32.5), "player_assists": (1.5, 11.5), "player_rebounds": (2.5, 13.5)}
+
+
+def probability_to_american(probability):
+    """American odds for a win probability, as an int like the API returns."""
+    probability = min(max(probability, 0.02), 0.98)
+    if probability >= 0.5:
+        return -int(round(100 * probability / (1 - probability)))
+    return int(round(100 * (1 - probability) / probability))
+
+
+def book_names(n_books):
+    return [f"Book {i:02d}" for i in range(n_books)]
+
+
+def _two_way_prices(rng, fair_probability, vig=0.045, noise=0.02):
+    """Over/under (or home/away) prices for one book around a fair probability."""
+    p = fair_probability + rng.uniform(-noise, noise)
+    return (probability_to_american(p + vig / 2),
+            probability_to_american(1 - p + vig / 2))
+
+
+def generate_standard_events(n_events=12, n_books=10, seed=0, sport="basketball_nba", start=None, first_id=0):
+    """
+    Payload of the sport odds endpoint: h2h, spreads and totals for n_events
+    games, numbered from first_id.
+    """
+    rng = random.Random(seed)
+    books = book_names(n_books)
+    start = start or datetime(2030, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(first_id, first_id + n_events):
+        home, away = f"Home Team {i}", f"Away Team {i}"
+        home_win = rng.uniform(0.3, 0.7)
+        spread = round(rng.uniform(-12, 12) * 2) / 2
+        total = round(rng.uniform(205, 240) * 2) / 2
+        bookmakers = []
+        for book in books:
+            # Books shade the consensus spread by half a point now and then
+            point = spread + rng.choice((0, 0, 0, -0.5, 0.5))
+            home_h2h, away_h2h = _two_way_prices(rng, home_win)
+            home_spread, away_spread = _two_way_prices(rng, 0.5)
+            over, under = _two_way_prices(rng, 0.5)
+            bookmakers.append({
+                "key": book.lower().replace(" ", ""),
+                "title": book,
+                "markets": [
+                    {"key": "h2h", "outcomes": [
+                        {"name": away, "price": away_h2h},
+                        {"name": home, "price": home_h2h},
+                    ]},
+                    {"key": "spreads", "outcomes": [
+                        {"name": away, "price": away_spread, "point": -point},
+                        {"name": home, "price": home_spread, "point": point},
+                    ]},
+                    {"key": "totals", "outcomes": [
+                        {"name": "Over", "price": over, "point": total},
+                        {"name": "Under", "price": under, "point": total},
+                    ]},
+                ],
+            })
+        events.append({
+            "id": f"synthetic{i:04d}",
+            "sport_key": sport,
+            "home_team": home,
+            "away_team": away,
+            "commence_time": (start + timedelta(hours=i - first_id)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "bookmakers": bookmakers,
+        })
+    return events
+
+
+def generate_props_payload(event, n_books=10, n_props=60, seed=0):
+    """
+    Payload of the per-event odds endpoint: n_props player prop lines
+    (spread across points, assists and rebounds), each quoted by every book.
+    """
+    rng = random.Random(f"{seed}:{event['id']}")
+    books = book_names(n_books)
+    props = []
+    for i in range(n_props):
+        market = PROP_MARKETS[i % len(PROP_MARKETS)]
+        low, high = PROP_LINES[market]
+        props.append((market, f"Player {i // len(PROP_MARKETS):03d}",
+                      round(rng.uniform(low, high)) + 0.5, rng.uniform(0.4, 0.6)))
+
+    bookmakers = []
+    for book in books:
+        outcomes_by_market = {market: [] for market in PROP_MARKETS}
+        for market, player, line, fair_over in props:
+            over, under = _two_way_prices(rng, fair_over)
+            outcomes_by_market[market].append({"name": "Over", "description": player, "price": over, "point": line})
+            outcomes_by_market[market].append({"name": "Under", "description": player, "price": under, "point": line})
+        bookmakers.append({
+            "key": book.lower().replace(" ", ""),
+            "title": book,
+            "markets": [{"key": market, "outcomes": outcomes} for market, outcomes in outcomes_by_market.items()],
+        })
+    return {
+        "id": event["id"],
+        "sport_key": event.get("sport_key"),
+        "home_team": event["home_team"],
+        "away_team": event["away_team"],
+        "commence_time": event["commence_time"],
+        "bookmakers": bookmakers,
+    }
+
+
+def write_synthetic_fixtures(fixture_store, standard_path, standard_params, props_path_template,
+                             props_params, n_events=100, n_books=40, n_props=300, seed=0):
+    """
+    Fill a FixtureStore with a synthetic slate so replay mode can serve it.
+
+    props_path_template is formatted with event_id, e.g.
+    "/sports/basketball_nba/events/{event_id}/odds".
+    """
+    events = generate_standard_events(n_events, n_books, seed)
+    fixture_store.save(standard_path, standard_params, events)
+    for event in events:
+        payload = generate_props_payload(event, n_books, n_props, seed)
+        fixture_store.save(props_path_template.format(event_id=event["id"]), props_params, payload)
+    return events
+
+
+def jitter_prices(payload, rng, noise=0.015):
+    """Copy of a payload with every price moved by up to `noise` in implied probability."""
+    payload = copy.deepcopy(payload)
+    for event in payload if isinstance(payload, list) else [payload]:
+        for bookmaker in event["bookmakers"]:
+            for market in bookmaker["markets"]:
+                for outcome in market["outcomes"]:
+                    outcome["price"] = probability_to_american(
+                        implied_probability(outcome["price"]) + rng.uniform(-noise, noise))
+    return payload
+
+
+def write_synthetic_season(fixture_store, standard_path, standard_params, props_path_template, props_params,
+                           n_days=30, games_per_day=6, captures_per_day=6, n_books=10, n_props=30, seed=0):
+    """
+    Fill a FixtureStore with a time-ordered season for backtests.
+
+    Each day's games tip off hourly from 19:00 UTC. The day's slate and
+    props are recorded captures_per_day times, hourly up to the first
+    tipoff. Every capture moves each price a little away from the day's
+    opening prices, so outliers tend to revert by the close. Returns the
+    number of recordings written.
+    """
+    rng = random.Random(seed)
+    season_start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    written = 0
+    for day in range(n_days):
+        first_tipoff = season_start + timedelta(days=day, hours=19)
+        events = generate_standard_events(games_per_day, n_books, seed=(seed * 100003 + day),
+                                          start=first_tipoff, first_id=day * games_per_day)
+        props = {event["id"]: generate_props_payload(event, n_books, n_props, seed) for event in events}
+        for capture in range(captures_per_day):
+            captured_at = (first_tipoff - timedelta(hours=captures_per_day - capture - 1, minutes=5)).timestamp()
+            fixture_store.save(standard_path, standard_params, jitter_prices(events, rng), captured_at=captured_at)
+            for event in events:
+                fixture_store.save(props_path_template.format(event_id=event["id"]), props_params,
+                                   jitter_prices(props[event["id"]], rng), captured_at=captured_at + 1)
+            written += 1 + len(events)
+    return written
@@ -0,0 +1,90 @@
+"""
+Backtest throughput: how long the closing-line-value backtest takes to replay
+a synthetic season of recorded snapshots, fully offline.
+
+The season has --days days of --games games each, recorded --captures times a
+day (standard odds plus every game's props). The replay time is extrapolated
+to a 90-day season, and the run fails if that is over --budget-s.
+
+    python bench/bench_backtest.py
+    python bench/bench_backtest.py --days 60 --captures 12 --budget-s 300
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+os.environ["ODDS_POLLER_ENABLED"] = "false"
+
+SEASON_DAYS = 90
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--games", type=int, default=8, help="Games per day")
+    parser.add_argument("--captures", type=int, default=8, help="Snapshots recorded per day")
+    parser.add_argument("--books", type=int, default=10)
+    parser.add_argument("--props", type=int, default=30, help="Prop lines per game")
+    parser.add_argument("--min-ev", type=float, default=0)
+    parser.add_argument("--budget-s", type=float, default=300.0,
+                        help="Fail if the extrapolated 90-day replay exceeds this")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    import index
+    from backtest import Backtest, closing_line_value, iter_season, report
+    from fixtures import FixtureStore
+    from synthetic import write_synthetic_season
+
+    sport = index.SPORTS[0]
+    fixture_dir = tempfile.mkdtemp(prefix="ev-backtest-")
+    try:
+        recordings = write_synthetic_season(
+            FixtureStore(fixture_dir), *index.standard_request(sport),
+            f"/sports/{sport}/events/{{event_id}}/odds", index.props_request("{event_id}", sport)[1],
+            n_days=args.days, games_per_day=args.games, captures_per_day=args.captures,
+            n_books=args.books, n_props=args.props,
+        )
+        start = time.perf_counter()
+        backtest = Backtest(args.min_ev).run(iter_season([fixture_dir]))
+        replayed = time.perf_counter()
+        summary = report(closing_line_value(backtest))
+        finished = time.perf_counter()
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    total = finished - start
+    results = {
+        "recordings": recordings,
+        "prices": len(backtest.prices),
+        "picks": len(backtest.picks),
+        "replay_s": round(replayed - start, 2),
+        "clv_s": round(finished - replayed, 3),
+        "total_s": round(total, 2),
+        "recordings_per_s": round(recordings / total),
+        "season_estimate_s": round(total * SEASON_DAYS / args.days, 1),
+        "overall": summary["overall"][0] if summary["overall"] else None,
+    }
+    for name, value in results.items():
+        print(f"{name:<18} {value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    estimate = results["season_estimate_s"]
+    if estimate > args.budget_s:
+        print(f"\n{SEASON_DAYS}-day season over budget: ~{estimate}s > {args.budget_s}s")
+        return 1
+    print(f"\n{SEASON_DAYS}-day season within budget: ~{estimate}s <= {args.budget_s}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
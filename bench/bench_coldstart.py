@@ -0,0 +1,167 @@
+"""
+Cold-start benchmark: how long a brand-new process takes to import the app
+and answer its first request, fully offline.
+
+Each run starts a fresh interpreter (nothing is warm) that imports api/index.py
+and requests one page through Flask's test client. Two scenarios:
+
+  bootstrap  COLD_START_SNAPSHOT_PATH is set and a persisted snapshot exists,
+             so the first response is served from it (the serverless path)
+  live       no snapshot: the first response waits on a full fetch (replayed
+             from fixtures, so this is a lower bound on the real thing)
+
+Exits non-zero when the bootstrap median (import + first response) is over
+--budget-ms, or when the bootstrap path loads any of HEAVY_MODULES before its
+first byte, so it can run in CI to keep cold starts from creeping up.
+
+    python bench/bench_coldstart.py
+    python bench/bench_coldstart.py --runs 10 --budget-ms 400 --path /props/<event_id>
+    python bench/bench_coldstart.py --importtime    # slowest imports as well
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+# Modules worth knowing about if they show up before the first byte
+HEAVY_MODULES = ("numpy", "requests", "sqlite3", "ijson", "brotli")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {api_dir!r})
+import index
+imported = time.perf_counter()
+response = index.app.test_client().get({path!r})
+responded = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - imported) * 1000,
+    "status": response.status_code,
+    "stale_banner": b"Showing saved odds" in response.data,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def child_env(fixture_dir, snapshot_path=None):
+    env = dict(os.environ)
+    for name in ("ODDS_HISTORY_PATH", "SHARED_SNAPSHOT_PATH", "COLD_START_BUNDLED_SNAPSHOT"):
+        env.pop(name, None)
+    env.update({"ODDS_API_MODE": "replay", "ODDS_FIXTURE_DIR": fixture_dir, "ODDS_POLLER_ENABLED": "false"})
+    if snapshot_path:
+        env["COLD_START_SNAPSHOT_PATH"] = snapshot_path
+    else:
+        env.pop("COLD_START_SNAPSHOT_PATH", None)
+    return env
+
+
+def run_child(env, path):
+    code = CHILD.format(api_dir=API_DIR, path=path, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    totals = [run["import_ms"] + run["first_response_ms"] for run in runs]
+    return {
+        "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+        "first_response_ms": round(statistics.median(run["first_response_ms"] for run in runs), 1),
+        "total_ms": round(statistics.median(totals), 1),
+        "max_total_ms": round(max(totals), 1),
+        "stale_banner": runs[-1]["stale_banner"],
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def slowest_imports(env, limit=15):
+    """Top cumulative import times (microseconds) from python -X importtime."""
+    code = f"import sys; sys.path.insert(0, {API_DIR!r}); import index"
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, check=True,
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Directory recorded with ODDS_API_MODE=record (default: synthetic slate)")
+    parser.add_argument("--events", type=int, default=12)
+    parser.add_argument("--books", type=int, default=15)
+    parser.add_argument("--props", type=int, default=90, help="Prop lines per event")
+    parser.add_argument("--path", default="/", help="Page requested first (default /)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500.0,
+                        help="Fail if the bootstrap median import + first response exceeds this")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    fixture_dir = args.fixtures or tempfile.mkdtemp(prefix="ev-bench-")
+    snapshot_path = os.path.join(tempfile.mkdtemp(prefix="ev-coldstart-"), "snapshot.bin")
+    if not args.fixtures:
+        # The synthetic slate needs the app's own request parameters
+        sys.path.insert(0, API_DIR)
+        os.environ.update(child_env(fixture_dir))
+        import index
+        from fixtures import FixtureStore
+        from synthetic import write_synthetic_fixtures
+
+        sport = index.SPORTS[0]
+        write_synthetic_fixtures(
+            FixtureStore(fixture_dir),
+            f"/sports/{sport}/odds",
+            {"regions": index.REGIONS, "markets": index.MARKETS_MAIN, "oddsFormat": index.ODDS_FORMAT},
+            f"/sports/{sport}/events/{{event_id}}/odds",
+            {"regions": index.REGIONS, "markets": index.props_markets_for(sport), "oddsFormat": index.ODDS_FORMAT},
+            n_events=args.events, n_books=args.books, n_props=args.props,
+        )
+
+    # What a previous instance would have left behind
+    subprocess.run([sys.executable, os.path.join(API_DIR, "refresher.py"), "--once", snapshot_path],
+                   env=child_env(fixture_dir), check=True, capture_output=True)
+
+    results = {
+        "bootstrap": summarize([run_child(child_env(fixture_dir, snapshot_path), args.path)
+                                for _ in range(args.runs)]),
+        "live": summarize([run_child(child_env(fixture_dir), args.path) for _ in range(args.runs)]),
+    }
+
+    print(f"{'scenario':<10} {'import ms':>10} {'1st resp ms':>12} {'total ms':>9} {'max ms':>8}  loaded before first byte")
+    for name, row in results.items():
+        print(f"{name:<10} {row['import_ms']:>10} {row['first_response_ms']:>12} {row['total_ms']:>9} "
+              f"{row['max_total_ms']:>8}  {', '.join(row['loaded']) or '-'}")
+    if args.importtime:
+        print("\nslowest imports (cumulative ms):")
+        for cumulative, name in slowest_imports(child_env(fixture_dir, snapshot_path)):
+            print(f"  {cumulative / 1000:>8.1f}  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    total = results["bootstrap"]["total_ms"]
+    loaded = results["bootstrap"]["loaded"]
+    if total > args.budget_ms or loaded:
+        if total > args.budget_ms:
+            print(f"\nCold start over budget: {total} ms > {args.budget_ms} ms", file=sys.stderr)
+        if loaded:
+            print(f"\nCold start loads {', '.join(loaded)} before the first byte", file=sys.stderr)
+        return 1
+    print(f"\nCold start within budget: {total} ms <= {args.budget_ms} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Odds math microbenchmark: throughput of the lookup-table conversions in
+api/odds_math.py against the formulas they replaced.
+
+Before (old formulas) and after (odds_math), on the prices quoted in a
+synthetic slate: per-call conversions, the batch functions and the functions
+that call them per market. That the two give identical results is covered by
+tests/test_odds_math.py.
+
+    python bench/bench_odds_math.py
+    python bench/bench_odds_math.py --events 30 --books 20 --props 120 --json results.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+os.environ["ODDS_POLLER_ENABLED"] = "false"
+for setting in ("ODDS_HISTORY_PATH", "SHARED_SNAPSHOT_PATH", "COLD_START_SNAPSHOT_PATH", "ALERT_RULES_PATH"):
+    os.environ.pop(setting, None)
+
+
+# The conversions as they were before odds_math, for reference
+
+def reference_implied_probability(odds):
+    if odds > 0:
+        implied_probability = 100 / (odds + 100)
+    else:
+        implied_probability = abs(odds) / (abs(odds) + 100)
+    return implied_probability
+
+
+def reference_american_to_decimal(american_odds):
+    if american_odds < 0:
+        return 1 + (100 / abs(american_odds))
+    else:
+        return 1 + (american_odds / 100)
+
+
+def reference_decimal_to_american(decimal_odds):
+    if decimal_odds <= 1.0:
+        return 0
+    elif decimal_odds < 2.0:
+        return int(-100 / (decimal_odds - 1))
+    else:
+        return int((decimal_odds - 1) * 100)
+
+
+def reference_decimal_odds(prices):
+    decimals = []
+    for price in prices:
+        decimals.append(reference_american_to_decimal(price))
+    return decimals
+
+
+@contextmanager
+def reference_math(index, arbitrage):
+    """Patch the old formulas back into the modules that use odds_math."""
+    patches = [
+        (index, "american_to_decimal", reference_american_to_decimal),
+        (index, "implied_probability", reference_implied_probability),
+        (index, "decimal_to_american", reference_decimal_to_american),
+        (index, "decimal_odds", reference_decimal_odds),
+        (arbitrage, "american_to_decimal", reference_american_to_decimal),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, function in patches:
+        setattr(module, name, function)
+    try:
+        yield
+    finally:
+        for module, name, function in saved:
+            setattr(module, name, function)
+
+
+def best_of(fn, repeat):
+    """Fastest of `repeat` runs of fn(), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=12)
+    parser.add_argument("--books", type=int, default=15)
+    parser.add_argument("--props", type=int, default=90, help="Prop lines per event")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    import arbitrage
+    import index
+    import odds_math
+    from props_stream import parse_props_payload
+    from synthetic import generate_props_payload, generate_standard_events
+
+    standard_events = generate_standard_events(args.events, args.books, args.seed)
+    props_payloads = [generate_props_payload(event, args.books, args.props, args.seed) for event in standard_events]
+    props_by_event = {payload["id"]: parse_props_payload(payload).props for payload in props_payloads}
+    markets = [odds_by_book for _, odds_by_book in
+               index.collect_ev_markets(index.process_events(standard_events), props_by_event)]
+    prices = [outcome["price"]
+              for event in standard_events + props_payloads
+              for bookmaker in event["bookmakers"]
+              for market in bookmaker["markets"]
+              for outcome in market["outcomes"]]
+
+    stages = {
+        "calculate_positive_ev": lambda: [index.calculate_positive_ev(odds_by_book) for odds_by_book in markets],
+        "build_spread_data": lambda: index.process_events(standard_events),
+        "find_arbitrage": lambda: arbitrage.find_arbitrage(standard_events, props_by_event),
+    }
+
+    conversions = {
+        "american_to_decimal": (lambda: [reference_american_to_decimal(price) for price in prices],
+                                lambda: [odds_math.american_to_decimal(price) for price in prices]),
+        "implied_probability": (lambda: [reference_implied_probability(price) for price in prices],
+                                lambda: [odds_math.implied_probability(price) for price in prices]),
+        "decimal_odds (batch)": (lambda: reference_decimal_odds(prices),
+                                 lambda: odds_math.decimal_odds(prices)),
+        "implied_probabilities (batch)": (lambda: [reference_implied_probability(price) for price in prices],
+                                          lambda: odds_math.implied_probabilities(prices)),
+    }
+    rows = {}
+    for name, (reference, table) in conversions.items():
+        before_s, after_s = best_of(reference, args.repeat), best_of(table, args.repeat)
+        rows[name] = {"unit": "M prices/s", "before": len(prices) / before_s / 1e6,
+                      "after": len(prices) / after_s / 1e6}
+    for name, stage in stages.items():
+        with reference_math(index, arbitrage):
+            before_s = best_of(stage, args.repeat)
+        after_s = best_of(stage, args.repeat)
+        rows[name] = {"unit": "ms", "before": before_s * 1000, "after": after_s * 1000}
+
+    print(f"\n{len(prices)} quoted prices, {len(markets)} EV markets, {len(standard_events)} events\n")
+    print(f"{'':<30} {'unit':>11} {'before':>9} {'after':>9} {'speedup':>8}")
+    for name, row in rows.items():
+        speedup = row["after"] / row["before"] if row["unit"] != "ms" else row["before"] / row["after"]
+        row.update(before=round(row["before"], 3), after=round(row["after"], 3), speedup=round(speedup, 2))
+        print(f"{name:<30} {row['unit']:>11} {row['before']:>9} {row['after']:>9} {row['speedup']:>7}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
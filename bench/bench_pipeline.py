@@ -0,0 +1,176 @@
+"""
+End-to-end benchmark of the odds pipeline, fully offline.
+
+Serves a recorded (or synthetic) slate through the client's replay mode and
+reports latency and peak memory for each stage: fetch, build_spread_data
+(process_events), props formatting, EV scan and the ev.html render.
+
+props_parse_full and props_parse_stream compare ingesting the raw props
+response bodies by decoding them whole versus with the one-pass streaming
+parser (incremental when ijson is installed); peak MiB is the number to watch.
+
+alerts_full checks every opportunity against --rules random alert rules;
+alerts_unchanged re-checks the same set, which is what most polls look like.
+
+    python bench/bench_pipeline.py                       # a typical 12-game night
+    python bench/bench_pipeline.py --events 100 --books 40 --props 300
+    python bench/bench_pipeline.py --fixtures path/to/recorded --json results.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+
+def measure(fn, repeat):
+    """Run fn `repeat` times for timings, then once more under tracemalloc for peak memory."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {
+        "min_ms": round(min(timings), 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "peak_mib": round(peak / (1024 * 1024), 2),
+    }
+
+
+def measure_props_parsing(index, raw_props, repeat):
+    """
+    props_parse_full and props_parse_stream over the raw props response
+    bodies. One body at a time, results dropped: peak memory is that of a
+    single fetch. The bodies are freed on return.
+    """
+    from props_stream import parse_props_payload
+
+    bodies = [json.dumps(payload).encode() for payload in raw_props.values()]
+
+    def parse_full():
+        for body in bodies:
+            index.format_props_data(json.loads(body))
+
+    def parse_stream():
+        for body in bodies:
+            parse_props_payload(io.BytesIO(body), index.props_markets_for)
+
+    return {
+        "props_parse_full": measure(parse_full, repeat)[1],
+        "props_parse_stream": measure(parse_stream, repeat)[1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Directory recorded with ODDS_API_MODE=record (default: synthetic slate)")
+    parser.add_argument("--events", type=int, default=12)
+    parser.add_argument("--books", type=int, default=15)
+    parser.add_argument("--props", type=int, default=90, help="Prop lines per event")
+    parser.add_argument("--rules", type=int, default=300, help="Alert rules for the alerts stages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    fixture_dir = args.fixtures or tempfile.mkdtemp(prefix="ev-bench-")
+    os.environ["ODDS_API_MODE"] = "replay"
+    os.environ["ODDS_FIXTURE_DIR"] = fixture_dir
+    os.environ["ODDS_POLLER_ENABLED"] = "false"
+    os.environ.pop("ODDS_HISTORY_PATH", None)
+    sys.path.insert(0, API_DIR)
+    import index
+    from fixtures import FixtureStore
+    from synthetic import write_synthetic_fixtures
+
+    if not args.fixtures:
+        sport = index.SPORTS[0]
+        write_synthetic_fixtures(
+            FixtureStore(fixture_dir),
+            f"/sports/{sport}/odds",
+            {"regions": index.REGIONS, "markets": index.MARKETS_MAIN, "oddsFormat": index.ODDS_FORMAT},
+            f"/sports/{sport}/events/{{event_id}}/odds",
+            {"regions": index.REGIONS, "markets": index.props_markets_for(sport), "oddsFormat": index.ODDS_FORMAT},
+            n_events=args.events, n_books=args.books, n_props=args.props, seed=args.seed,
+        )
+
+    results = {}
+
+    def fetch():
+        standard_events = index.for_each_sport(index.fetch_standard_odds_data)
+        raw_props = {event["id"]: index.odds_client.get(*index.props_request(event["id"])) for event in standard_events}
+        return standard_events, raw_props
+
+    (standard_events, raw_props), results["fetch"] = measure(fetch, args.repeat)
+    events_data, results["build_spread_data"] = measure(lambda: index.process_events(standard_events), args.repeat)
+    props_by_event, results["props_formatting"] = measure(
+        lambda: {event_id: index.format_props_data(payload) for event_id, payload in raw_props.items()},
+        args.repeat,
+    )
+
+    results.update(measure_props_parsing(index, raw_props, args.repeat))
+
+    opportunities, results["ev_scan"] = measure(
+        lambda: index.find_ev_opportunities(events_data, 0, props_by_event), args.repeat
+    )
+
+    from alerts import AlertEngine, AlertRule
+    rng = random.Random(args.seed)
+    books = sorted({ev["best_book"] for ev in opportunities})
+    markets = ["all"] + list(index.EVResultSet.MARKET_FILTERS) + sorted({ev["market_type"] for ev in opportunities})
+    rules = [
+        AlertRule(f"rule-{i}", (rng.choice(markets),), rng.choice([2.0, 4.0, 8.0, 15.0]),
+                  frozenset(rng.sample(books, min(2, len(books)))) if books and rng.random() < 0.5 else None,
+                  rng.choice([None, 30.0]))
+        for i in range(args.rules)
+    ]
+    new_engine = lambda: AlertEngine(rules, market_filters=index.EVResultSet.MARKET_FILTERS)
+    _, results["alerts_full"] = measure(lambda: new_engine().process(opportunities), args.repeat)
+    engine = new_engine()
+    engine.process(opportunities)
+    _, results["alerts_unchanged"] = measure(lambda: engine.process(opportunities), args.repeat)
+
+    result_set = index.EVResultSet(opportunities)
+
+    def render():
+        with index.app.test_request_context("/ev"):
+            selected = result_set.select("all", 1.0)
+            all_books = sorted({book for ev in selected for book in ev["all_odds"]})
+            return index.render_template("ev.html", opportunities=selected, all_books=all_books,
+                                         market_types=result_set.market_types, active_tab="ev",
+                                         current_filter="all", min_ev=1.0)
+
+    html, results["template_render"] = measure(render, args.repeat)
+
+    summary = {
+        "events": len(events_data),
+        "markets_scanned": len(index.collect_ev_markets(events_data, props_by_event)),
+        "opportunities": len(opportunities),
+        "html_bytes": len(html.encode()),
+        "stages": results,
+    }
+    print(f"{summary['events']} events, {summary['markets_scanned']} markets, "
+          f"{summary['opportunities']} +EV opportunities, {summary['html_bytes']} bytes of HTML")
+    print(f"{'stage':<20}{'min ms':>12}{'median ms':>12}{'peak MiB':>12}")
+    for stage, stats in results.items():
+        print(f"{stage:<20}{stats['min_ms']:>12}{stats['median_ms']:>12}{stats['peak_mib']:>12}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
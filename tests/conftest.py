@@ -0,0 +1,11 @@
+import os
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, API_DIR)
+
+# Tests that import index get a quiet app: no poller, no files, no webhooks
+os.environ["ODDS_POLLER_ENABLED"] = "false"
+for setting in ("ODDS_HISTORY_PATH", "SHARED_SNAPSHOT_PATH", "COLD_START_SNAPSHOT_PATH",
+                "ALERT_RULES_PATH", "ALERT_WEBHOOK_URL", "ODDS_API_MODE", "ODDS_FIXTURE_DIR"):
+    os.environ.pop(setting, None)
@@ -0,0 +1,266 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alerts import AlertEngine, AlertRule, WebhookSender, parse_rule
+from incremental import opportunity_key
+
+MARKET_FILTERS = {
+    'spreads': lambda market_type: market_type == 'Spread',
+    'player_props': lambda market_type: 'Player' in market_type,
+    'points': lambda market_type: market_type == 'Player Points',
+}
+MARKET_TYPES = ["Spread", "Player Points", "Player Assists", "Player Threes"]
+BOOKS = ["DraftKings", "FanDuel", "BetMGM", "Caesars", "PointsBet"]
+NOW = 1_900_000_000.0
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def random_rules(rng, count):
+    markets = ["all"] + list(MARKET_FILTERS) + MARKET_TYPES
+    rules = []
+    for i in range(count):
+        books = rng.sample(BOOKS, rng.randint(1, 3)) if rng.random() < 0.5 else None
+        rules.append(AlertRule(
+            name=f"rule-{i}",
+            markets=tuple(rng.sample(markets, rng.randint(1, 2))),
+            min_ev=round(rng.uniform(-1, 8), 1),
+            books=frozenset(books) if books else None,
+            min_minutes_before_start=rng.choice([None, None, 0, 30, 90]),
+        ))
+    return rules
+
+
+def random_opportunity(rng, event, market_type, team):
+    return {
+        "event_id": f"ev{event}",
+        "commence_time": iso(NOW + event * 1800),
+        "home_team": "Home", "away_team": "Away",
+        "market_type": market_type,
+        "team": team,
+        "line": 1.5,
+        "best_book": rng.choice(BOOKS),
+        "best_odds": rng.choice([-120, -110, 100, 115, 130]),
+        "ev_percentage": round(rng.uniform(-2, 10), 2),
+        "markets": rng.randint(2, 10),
+    }
+
+
+def seconds_to_start(opportunity, now):
+    return datetime.fromisoformat(opportunity["commence_time"].replace("Z", "+00:00")).timestamp() - now
+
+
+def rule_matches(rule, opportunity, remaining):
+    """One rule against one opportunity, spelled out the slow way."""
+    market_type = opportunity["market_type"]
+    market_ok = any(market == "all" or market == market_type
+                    or (market in MARKET_FILTERS and MARKET_FILTERS[market](market_type))
+                    for market in rule.markets)
+    book_ok = rule.books is None or opportunity["best_book"] in rule.books
+    time_ok = rule.min_minutes_before_start is None or remaining > rule.min_minutes_before_start * 60
+    return market_ok and book_ok and time_ok and opportunity["ev_percentage"] > rule.min_ev
+
+
+class BruteForceAlerts:
+    """Every rule against every opportunity on every call; fires on a rule starting to match."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.matched = {}
+
+    def process(self, opportunities, now):
+        alerts = []
+        matched = {}
+        for opportunity in opportunities:
+            key = opportunity_key(opportunity)
+            remaining = seconds_to_start(opportunity, now)
+            names = {rule.name for rule in self.rules if rule_matches(rule, opportunity, remaining)}
+            alerts += [(key, name) for name in names - self.matched.get(key, set())]
+            matched[key] = names
+        self.matched = matched
+        return alerts
+
+
+def fired(alerts):
+    return sorted((alert["key"], alert["rule"]) for alert in alerts)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_incremental_matches_brute_force(seed):
+    rng = random.Random(seed)
+    rules = random_rules(rng, 300)
+    engine = AlertEngine(rules, market_filters=MARKET_FILTERS)
+    brute_force = BruteForceAlerts(rules)
+
+    board = {}
+    for event in range(8):
+        for market_type in MARKET_TYPES:
+            for team in ("A", "B"):
+                opportunity = random_opportunity(rng, event, market_type, team)
+                board[opportunity_key(opportunity)] = opportunity
+    now = NOW
+    total = 0
+    for poll in range(30):
+        opportunities = [opportunity for opportunity in board.values() if rng.random() < 0.9]
+        got = engine.process(opportunities, now)
+        expected = brute_force.process(opportunities, now)
+        assert fired(got) == sorted(expected), f"poll {poll}"
+        total += len(expected)
+
+        # Move some prices, let time pass towards (and past) the start times
+        for key in rng.sample(sorted(board), 20):
+            opportunity = dict(board[key])
+            opportunity["ev_percentage"] = round(opportunity["ev_percentage"] + rng.uniform(-3, 3), 2)
+            if rng.random() < 0.3:
+                opportunity["best_book"] = rng.choice(BOOKS)
+                opportunity["best_odds"] = rng.choice([-120, -110, 100, 115, 130])
+            board[key] = opportunity
+        now += 600
+    assert total > 0
+
+
+def opportunity(ev, book="DraftKings", odds=110, team="Player A", start_in=7200):
+    return {"event_id": "ev1", "commence_time": iso(NOW + start_in), "market_type": "Player Points",
+            "team": team, "line": 20.5, "best_book": book, "best_odds": odds, "ev_percentage": ev, "markets": 6}
+
+
+def test_alert_fires_once_while_matching():
+    notified = []
+    engine = AlertEngine([parse_rule({"name": "props", "markets": ["player_props"], "min_ev": 4})],
+                         market_filters=MARKET_FILTERS, notify=notified.append)
+    assert fired(engine.process([opportunity(5)], NOW)) == [("ev1|Player Points|Player A|20.5", "props")]
+    # Same opportunity, unchanged or moved but still over the threshold: no repeat
+    assert engine.process([opportunity(5)], NOW + 60) == []
+    assert engine.process([opportunity(6, odds=120)], NOW + 120) == []
+    assert engine.stats == {"opportunities_checked": 2, "alerts_fired": 1}
+    assert len(notified) == 1
+
+
+def test_alert_rearms_after_dropping_below_threshold():
+    engine = AlertEngine([parse_rule({"name": "props", "markets": "all", "min_ev": 4})])
+    assert len(engine.process([opportunity(5)], NOW)) == 1
+    assert engine.process([opportunity(3)], NOW) == []
+    assert len(engine.process([opportunity(4.5)], NOW)) == 1
+
+
+def test_alert_rearms_after_leaving_the_board():
+    engine = AlertEngine([parse_rule({"name": "props", "min_ev": 4})])
+    assert len(engine.process([opportunity(5)], NOW)) == 1
+    assert engine.process([], NOW) == []
+    assert len(engine.process([opportunity(5)], NOW)) == 1
+
+
+def test_rules_fire_independently():
+    engine = AlertEngine([parse_rule({"name": "low", "min_ev": 2}),
+                          parse_rule({"name": "high", "min_ev": 6}),
+                          parse_rule({"name": "fanduel", "min_ev": 2, "books": "FanDuel"})])
+    assert fired(engine.process([opportunity(3)], NOW)) == [("ev1|Player Points|Player A|20.5", "low")]
+    # Crossing the higher threshold fires only the rule that wasn't matching yet
+    assert [alert["rule"] for alert in engine.process([opportunity(7)], NOW)] == ["high"]
+    # The best price moving to FanDuel keeps "low" and "high" matching
+    assert [alert["rule"] for alert in engine.process([opportunity(7, book="FanDuel")], NOW)] == ["fanduel"]
+
+
+def test_time_window():
+    engine = AlertEngine([parse_rule({"name": "early", "min_ev": 1, "min_minutes_before_start": 30})])
+    assert engine.process([opportunity(5, start_in=20 * 60)], NOW) == []
+    assert len(engine.process([opportunity(5, team="Player B", start_in=40 * 60)], NOW)) == 1
+
+
+class WebhookStub:
+    """Local webhook receiver: logs each POSTed batch, answering with the scripted statuses first."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.batches = []
+        self.connections = set()
+        self.received = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.connections.add(self.client_address)
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                if status == 200:
+                    stub.batches.append(json.loads(body)["alerts"])
+                    stub.received.set()
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                if status in (429, 503):
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while sum(map(len, self.batches)) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    stubs = []
+
+    def start(statuses=()):
+        stubs.append(WebhookStub(statuses))
+        return stubs[-1]
+
+    yield start
+    for stub in stubs:
+        stub.close()
+
+
+def test_webhook_batches_a_burst(webhook):
+    stub = webhook()
+    sender = WebhookSender(stub.url, debounce=0.1, max_batch=4)
+    for i in range(5):
+        sender.send([{"rule": "r", "key": f"k{i}-{j}"} for j in range(2)])
+    stub.wait_for(10)
+    assert [len(batch) for batch in stub.batches] == [4, 4, 2]
+    assert [alert["key"] for batch in stub.batches for alert in batch] == [
+        f"k{i}-{j}" for i in range(5) for j in range(2)]
+    assert sender.stats == {"sent": 10, "failed": 0, "dropped": 0}
+    # Every batch went over the one kept-alive connection
+    assert len(stub.connections) == 1
+    sender.close()
+
+
+def test_webhook_retries_when_not_accepted(webhook):
+    stub = webhook([503, 429])
+    sender = WebhookSender(stub.url, debounce=0.01, backoff_factor=0.01)
+    sender.send([{"rule": "r", "key": "k"}])
+    stub.wait_for(1)
+    assert stub.batches == [[{"rule": "r", "key": "k"}]]
+    assert sender.stats["sent"] == 1
+
+
+def test_webhook_gives_up_on_errors(webhook):
+    stub = webhook([500])
+    sender = WebhookSender(stub.url, debounce=0.01)
+    sender.send([{"rule": "r", "key": "k"}])
+    deadline = time.monotonic() + 5
+    while sender.stats["failed"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sender.stats == {"sent": 0, "failed": 1, "dropped": 0}
+    assert stub.batches == []
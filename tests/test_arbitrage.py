@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from arbitrage import arb_key, find_arbitrage, stake_split
+from odds_math import american_to_decimal
+
+
+def event(*bookmakers, event_id="event1"):
+    return {"id": event_id, "commence_time": "2030-01-01T00:00:00Z", "home_team": "Home", "away_team": "Away",
+            "bookmakers": [{"title": title, "markets": markets} for title, markets in bookmakers]}
+
+
+def h2h(home_price, away_price):
+    outcomes = []
+    if home_price is not None:
+        outcomes.append({"name": "Home", "price": home_price})
+    if away_price is not None:
+        outcomes.append({"name": "Away", "price": away_price})
+    return {"key": "h2h", "outcomes": outcomes}
+
+
+def spread(team, point, price):
+    return {"key": "spreads", "outcomes": [{"name": team, "price": price, "point": point}]}
+
+
+def total(side, point, price):
+    return {"key": "totals", "outcomes": [{"name": side, "price": price, "point": point}]}
+
+
+def prop(player, line, books):
+    return {"player": player, "line": line,
+            "books": {book: {"over_price": over, "under_price": under} for book, (over, under) in books.items()}}
+
+
+def assert_balanced(arb, total_stake=100.0):
+    """Stakes add up to the total and every leg pays out the same (to the cent the stakes are rounded to)."""
+    stakes = [leg["stake"] for leg in arb["legs"]]
+    assert sum(stakes) == pytest.approx(total_stake, abs=0.01 * len(stakes))
+    for leg in arb["legs"]:
+        payout = leg["stake"] * american_to_decimal(leg["price"])
+        assert payout == pytest.approx(arb["payout"], abs=0.01 * american_to_decimal(leg["price"]) + 0.01)
+    # profit_percentage is rounded to 0.01%, the payout to the cent
+    assert arb["payout"] == pytest.approx(total_stake * (1 + arb["profit_percentage"] / 100),
+                                          abs=total_stake * 0.00005 + 0.005)
+
+
+def test_moneyline_arb_across_two_books():
+    arbs = find_arbitrage([event(("BookA", [h2h(110, -150)]), ("BookB", [h2h(-150, 105)]))])
+
+    assert len(arbs) == 1
+    arb = arbs[0]
+    implied_total = 1 / 2.10 + 1 / 2.05
+    assert (arb["market"], arb["market_type"], arb["line"]) == ("h2h", "Moneyline", None)
+    assert arb["implied_total"] == round(implied_total, 4)
+    assert arb["profit_percentage"] == round((1 / implied_total - 1) * 100, 2)
+    assert arb["payout"] == round(100 / implied_total, 2)
+    legs = {leg["outcome"]: leg for leg in arb["legs"]}
+    assert (legs["Home"]["book"], legs["Home"]["price"]) == ("BookA", 110)
+    assert (legs["Away"]["book"], legs["Away"]["price"]) == ("BookB", 105)
+    assert legs["Home"]["stake"] == round(100 * (1 / 2.10) / implied_total, 2)
+    assert_balanced(arb)
+
+
+def test_spread_arb_pairs_opposite_points():
+    arbs = find_arbitrage([event(("BookA", [spread("Home", -3.5, 105)]),
+                                 ("BookB", [spread("Away", 3.5, 105)]))])
+
+    assert len(arbs) == 1
+    arb = arbs[0]
+    assert (arb["market"], arb["line"]) == ("spreads", -3.5)
+    assert sorted((leg["outcome"], leg["point"]) for leg in arb["legs"]) == [("Away", 3.5), ("Home", -3.5)]
+    assert_balanced(arb)
+
+
+def test_no_arb_when_implied_total_is_at_least_one():
+    standard = [
+        event(("BookA", [h2h(-110, -110)]), ("BookB", [h2h(-110, -110)])),
+        event(("BookA", [h2h(100, -200)]), ("BookB", [h2h(-200, 100)]), event_id="event2"),  # exactly 1
+    ]
+    assert find_arbitrage(standard) == []
+
+
+def test_mismatched_points_are_not_paired():
+    standard = [event(("BookA", [spread("Home", -3.5, 150), total("Over", 220.5, 150)]),
+                      ("BookB", [spread("Away", 4.5, 150), total("Under", 221.5, 150)]))]
+    assert find_arbitrage(standard) == []
+
+
+def test_single_book_and_one_sided_markets_are_not_arbs():
+    standard = [
+        event(("BookA", [h2h(-105, -115), spread("Home", -2.5, -110), spread("Away", 2.5, -110)])),
+        event(("BookA", [h2h(300, None)]), ("BookB", [h2h(250, None)]), event_id="event2"),
+    ]
+    assert find_arbitrage(standard) == []
+
+
+def test_prop_arb_over_and_under_at_different_books():
+    props_by_event = {"event1": {"points": {
+        "Player A|24.5": prop("Player A", 24.5, {"BookA": (115, -140), "BookB": (-140, 110)}),
+        "Player B|10.5": prop("Player B", 10.5, {"BookA": (-110, -110), "BookB": (-110, -110)}),
+    }}}
+    arbs = find_arbitrage([event()], props_by_event)
+
+    assert len(arbs) == 1
+    arb = arbs[0]
+    assert (arb["market"], arb["market_type"], arb["player"], arb["line"]) == (
+        "player_points", "Player Points", "Player A", 24.5)
+    assert {leg["outcome"]: leg["book"] for leg in arb["legs"]} == {"Over": "BookA", "Under": "BookB"}
+    assert_balanced(arb)
+
+
+def test_min_profit_and_total_stake():
+    standard = [event(("BookA", [h2h(110, -150)]), ("BookB", [h2h(-150, 105)]))]
+    profit = find_arbitrage(standard)[0]["profit_percentage"]
+
+    assert find_arbitrage(standard, min_profit=profit) == []
+    arb = find_arbitrage(standard, total_stake=250)[0]
+    assert arb["profit_percentage"] == profit
+    assert_balanced(arb, 250)
+
+
+def test_arbs_come_most_profitable_first_with_distinct_keys():
+    standard = [event(("BookA", [h2h(110 + 10 * i, -150)]), ("BookB", [h2h(-150, 105)]), event_id=f"event{i}")
+                for i in range(5)]
+    arbs = find_arbitrage(standard)
+    assert [arb["event_id"] for arb in arbs] == [f"event{i}" for i in reversed(range(5))]
+    assert len({arb_key(arb) for arb in arbs}) == len(arbs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stake_split_equalizes_payouts(seed):
+    rng = random.Random(seed)
+    decimal_odds = [rng.uniform(1.05, 8.0) for _ in range(rng.randint(2, 4))]
+    stakes = stake_split(decimal_odds, 100.0)
+    assert sum(stakes) == pytest.approx(100.0)
+    payouts = [stake * odds for stake, odds in zip(stakes, decimal_odds)]
+    assert max(payouts) - min(payouts) == pytest.approx(0, abs=1e-9)
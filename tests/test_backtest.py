@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import index
+from backtest import Backtest, closing_line_value, event_start, iter_season, pick_rows, report
+from fixtures import FixtureStore
+from history import flatten_odds_payload
+from synthetic import write_synthetic_season
+
+SPORT = index.SPORTS[0]
+STANDARD_PATH = f"/sports/{SPORT}/odds"
+START = datetime(2030, 1, 1, 20, tzinfo=timezone.utc).timestamp()
+
+
+def slate(home_price_at_a):
+    """One game's spreads at three books; BookA's Home price is the only one that moves."""
+    def book(title, home_price):
+        return {"key": title.lower(), "title": title, "markets": [{"key": "spreads", "outcomes": [
+            {"name": "Home", "price": home_price, "point": -3.5}, {"name": "Away", "price": -110, "point": 3.5}]}]}
+    return [{"id": "event1", "sport_key": SPORT, "commence_time": "2030-01-01T20:00:00Z",
+             "home_team": "Home", "away_team": "Away",
+             "bookmakers": [book("BookA", home_price_at_a), book("BookB", -110), book("BookC", -110)]}]
+
+
+def replay(*prices_at):
+    return Backtest().run([(START + offset, STANDARD_PATH, {}, slate(price)) for offset, price in prices_at])
+
+
+def test_picks_are_measured_against_the_last_price_before_the_start():
+    backtest = replay((-7200, 150), (-3600, 120), (600, 300))
+    results = closing_line_value(backtest)
+    rows = list(pick_rows(backtest, results))
+
+    assert [(row["book"], row["team"], row["odds"], row["closing_odds"]) for row in rows] == [
+        ("BookA", "Home", 150, 120), ("BookA", "Home", 120, 120)]
+    assert rows[0]["clv_percentage"] == pytest.approx((2.5 / 2.2 - 1) * 100, abs=1e-4)
+    assert [row["beat_close"] for row in rows] == [1, 0]
+    # Against the closing average of the three books' implied probabilities
+    closing_probability = (1 / 2.2 + 2 * 110 / 210) / 3
+    assert rows[0]["closing_ev_percentage"] == pytest.approx((2.5 * closing_probability - 1) * 100, abs=1e-4)
+    assert report(results)["overall"] == [{"group": "all", "picks": 2, "closed": 2, "beat_close": 50.0,
+                                           "avg_clv": round(rows[0]["clv_percentage"] / 2, 2),
+                                           "avg_ev": round((rows[0]["ev_percentage"] + rows[1]["ev_percentage"]) / 2, 2),
+                                           "avg_close_ev": pytest.approx(17.67, abs=0.01)}]
+    # The snapshot after the start has nothing upcoming; only the moved market was re-evaluated
+    assert backtest.stats == {"records": 3, "snapshots": 3, "markets_evaluated": 3, "markets_skipped": 1}
+
+
+def test_a_price_flagged_again_counts_once():
+    backtest = replay((-7200, 150), (-3600, 120), (-1800, 150))
+    assert [(at - START, odds) for at, odds in zip(backtest.picks.captured_at, backtest.picks.odds)] == [
+        (-7200, 150), (-3600, 120)]
+
+
+def test_closing_prices_match_a_row_by_row_replay(tmp_path):
+    write_synthetic_season(FixtureStore(str(tmp_path)), *index.standard_request(SPORT),
+                           f"/sports/{SPORT}/events/{{event_id}}/odds", index.props_request("{event_id}", SPORT)[1],
+                           n_days=2, games_per_day=2, captures_per_day=3, n_books=4, n_props=6)
+    records = list(iter_season([str(tmp_path)]))
+    assert [record[0] for record in records] == sorted(record[0] for record in records)
+
+    backtest = Backtest().run(records)
+    expected = {}
+    for captured_at, path, _, body in records:
+        for row in flatten_odds_payload(body, captured_at, SPORT):
+            if captured_at < event_start(row[3]):
+                key = (row[2], row[4], row[5], row[6], None if row[7] is None else float(row[7]), row[8])
+                expected[key] = row[9]
+
+    closing = backtest.prices.closing_prices()
+    assert {key: closing[key_id] for key, key_id in backtest.prices.key_ids.items()
+            if not np.isnan(closing[key_id])} == expected
+    assert len(backtest.picks) > 0
+    assert all(at < backtest.prices.key_start[key_id]
+               for at, key_id in zip(backtest.picks.captured_at, backtest.picks.key_id))
@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+import random
+
+import pytest
+
+import index
+from batch_scan import ChunkedWriter, OPPORTUNITY_COLUMNS, main, scan_fixture_store, snapshot_dirs
+from fixtures import FixtureStore
+from history import flatten_odds_payload
+from props_stream import parse_props_payload
+from synthetic import generate_props_payload, generate_standard_events, jitter_prices
+
+SPORT = index.SPORTS[0]
+
+
+def record_snapshot(directory, seed=0, captured_at=1000.0):
+    """One recorded slate plus every game's props; returns (events, payloads)."""
+    store = FixtureStore(str(directory))
+    events = generate_standard_events(3, 5, sport=SPORT, seed=seed)
+    store.save(*index.standard_request(SPORT), events, captured_at=captured_at)
+    payloads = [generate_props_payload(event, 5, 9, seed) for event in events]
+    for event, payload in zip(events, payloads):
+        store.save(*index.props_request(event["id"], SPORT), payload, captured_at=captured_at + 1)
+    return events, payloads
+
+
+def test_scan_matches_the_app_pipeline(tmp_path):
+    older = jitter_prices(generate_standard_events(3, 5, sport=SPORT, seed=9), random.Random(0))
+    FixtureStore(str(tmp_path)).save(*index.standard_request(SPORT), older, captured_at=500.0)
+    events, payloads = record_snapshot(tmp_path)
+
+    opportunity_rows, line_rows = scan_fixture_store(str(tmp_path))
+
+    props_by_event = {payload["id"]: parse_props_payload(payload, index.props_markets_for).props
+                      for payload in payloads}
+    expected = index.find_ev_opportunities(index.process_events(events), 0, props_by_event)
+    assert len(expected) > 0
+    name = os.path.basename(str(tmp_path))
+    assert opportunity_rows == [{**ev, "snapshot": name, "captured_at": 1000.0} for ev in expected]
+    # Lines of the newest recordings only
+    expected_lines = list(flatten_odds_payload(events, 1000.0, SPORT))
+    for payload in payloads:
+        expected_lines.extend(flatten_odds_payload(payload, 1001.0, SPORT))
+    assert len(line_rows) == len(expected_lines)
+    assert {row["captured_at"] for row in line_rows} == {1000.0, 1001.0}
+
+
+def test_snapshot_dirs_finds_stores_and_stores_of_stores(tmp_path):
+    archive = tmp_path / "archive"
+    for name in ("day2", "day1"):
+        record_snapshot(archive / name)
+    (archive / "notes").mkdir()
+    single = tmp_path / "single"
+    record_snapshot(single)
+
+    found = snapshot_dirs([str(archive), str(single), str(tmp_path / "missing")])
+    assert found == [str(archive / "day1"), str(archive / "day2"), str(single)]
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl", "parquet"])
+def test_chunked_writer_round_trip(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    columns = (("snapshot", "string"), ("best_odds", "int"), ("ev_percentage", "float"), ("all_odds", "json"))
+    rows = [{"snapshot": f"s{i}", "best_odds": 100 + i, "ev_percentage": i / 4, "all_odds": {"BookA": 100 + i}}
+            for i in range(5)]
+    path = str(tmp_path / f"out.{output_format}")
+    writer = ChunkedWriter(path, output_format, columns, chunk_size=2)
+    writer.write(rows[:3])
+    writer.write(rows[3:])
+    writer.close()
+
+    assert writer.rows_written == 5
+    if output_format == "jsonl":
+        with open(path) as f:
+            assert [json.loads(line) for line in f] == rows
+        return
+    if output_format == "csv":
+        with open(path, newline="") as f:
+            read = list(csv.DictReader(f))
+    else:
+        import pyarrow.parquet
+        read = pyarrow.parquet.read_table(path).to_pylist()
+    assert [(row["snapshot"], int(row["best_odds"]), float(row["ev_percentage"]), json.loads(row["all_odds"]))
+            for row in read] == [(row["snapshot"], row["best_odds"], row["ev_percentage"], row["all_odds"])
+                                 for row in rows]
+
+
+def test_empty_csv_still_has_its_header(tmp_path):
+    path = str(tmp_path / "out.csv")
+    writer = ChunkedWriter(path, "csv", OPPORTUNITY_COLUMNS)
+    writer.close()
+    with open(path) as f:
+        assert f.read().strip() == ",".join(name for name, _ in OPPORTUNITY_COLUMNS)
+
+
+def test_cli_writes_every_snapshot_in_order(tmp_path, capsys):
+    for i, name in enumerate(("b", "a")):
+        record_snapshot(tmp_path / "archive" / name, seed=i)
+    out = tmp_path / "out"
+
+    main(["--snapshots", str(tmp_path / "archive"), "--format", "jsonl", "--workers", "2",
+          "--min-ev", "1", "--out", str(out)])
+
+    with open(out / "opportunities.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    snapshots = [row["snapshot"] for row in rows]
+    assert snapshots == sorted(snapshots) and set(snapshots) == {"a", "b"}
+    assert all(row["ev_percentage"] > 1 for row in rows)
+    assert os.path.getsize(out / "lines.jsonl") > 0
+    assert "Scanned 2 snapshot(s)" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from cold_start import BootstrapSnapshot
+from shared_snapshot import SnapshotFile
+
+
+class Refresher:
+    """refresh() callable that counts its calls and can be held until released."""
+
+    def __init__(self, hold=False, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {"updated_at": time.time(), "refresh": self.calls}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_first_instance_refreshes_and_persists_for_the_next(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    refresh = Refresher()
+    first = BootstrapSnapshot(path, refresh)
+
+    assert first.get() is None
+    wait_for(lambda: first.get() is not None and SnapshotFile(path).sequence() == 1)
+    assert first.get()["refresh"] == 1
+
+    # A later cold start answers from disk straight away and, while that is fresh, fetches nothing
+    later_refresh = Refresher()
+    later = BootstrapSnapshot(path, later_refresh)
+    assert later.get()["refresh"] == 1
+    time.sleep(0.05)
+    assert later_refresh.calls == 0
+
+
+def test_stale_snapshot_is_served_during_a_single_refresh(tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    SnapshotFile(path).write({"updated_at": time.time() - 120, "refresh": 0}, 7)
+    refresh = Refresher(hold=True)
+    bootstrap = BootstrapSnapshot(path, refresh, max_age=60)
+
+    assert [bootstrap.get()["refresh"] for _ in range(5)] == [0] * 5
+    wait_for(lambda: refresh.calls == 1)
+    refresh.release.set()
+    wait_for(lambda: bootstrap.get()["refresh"] == 1)
+    assert refresh.calls == 1
+    wait_for(lambda: SnapshotFile(path).sequence() == 8)  # after the sequence it loaded
+
+
+def test_bundled_snapshot_is_the_fallback(tmp_path):
+    path, bundled = str(tmp_path / "snapshot.bin"), str(tmp_path / "bundled.bin")
+    SnapshotFile(bundled).write({"updated_at": time.time(), "source": "bundled"}, 1)
+    assert BootstrapSnapshot(path, Refresher(), bundled_path=bundled).get()["source"] == "bundled"
+
+    SnapshotFile(path).write({"updated_at": time.time(), "source": "persisted"}, 1)
+    assert BootstrapSnapshot(path, Refresher(), bundled_path=bundled).get()["source"] == "persisted"
+
+    def decode(data):
+        if data["source"] == "persisted":
+            raise ValueError("written by an older release")
+        return data
+    assert BootstrapSnapshot(path, Refresher(), bundled_path=bundled, decode=decode).get()["source"] == "bundled"
+
+
+def test_failed_refresh_waits_for_the_retry_interval(tmp_path):
+    refresh = Refresher(fail=True)
+    bootstrap = BootstrapSnapshot(str(tmp_path / "snapshot.bin"), refresh, retry_interval=0.2)
+
+    bootstrap.get()
+    wait_for(lambda: bootstrap._failed_at is not None)
+    for _ in range(5):
+        assert bootstrap.get() is None
+    assert refresh.calls == 1
+
+    time.sleep(0.25)
+    bootstrap.get()
+    wait_for(lambda: refresh.calls == 2)
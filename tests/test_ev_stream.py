@@ -0,0 +1,73 @@
+import json
+
+import index
+from ev_stream import EVBroadcaster
+
+
+def opportunity(team, ev):
+    return {"event_id": "event1", "market_type": "Spread", "team": team, "line": "-3.5",
+            "best_book": "FanDuel", "best_odds": 105, "ev_percentage": ev, "markets": 5}
+
+
+def parse(message):
+    """(event, id, data) of one SSE message."""
+    if isinstance(message, bytes):
+        message = message.decode()
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields.get("event"), fields.get("id"), json.loads(fields["data"])
+
+
+def take(stream, count):
+    messages = [parse(next(stream)) for _ in range(count)]
+    stream.close()
+    return messages
+
+
+def publish_many(broadcaster, count):
+    for i in range(count):
+        broadcaster.publish([opportunity("Team A", 1.0 + i)])
+
+
+def test_resumes_with_the_diffs_after_its_event_id():
+    broadcaster = EVBroadcaster(heartbeat=0.01)
+    publish_many(broadcaster, 5)
+    messages = take(broadcaster.subscribe(broadcaster.event_id(3)), 3)
+    assert [(event, event_id) for event, event_id, _ in messages] == [
+        ("hello", None), ("diff", broadcaster.event_id(4)), ("diff", broadcaster.event_id(5))]
+    assert messages[2][2]["changed"][0]["ev_percentage"] == 5.0
+
+
+def test_unknown_stream_gets_the_full_state_instead_of_diffs():
+    # A page rendered by another worker process carries that process's stream id
+    other = EVBroadcaster()
+    publish_many(other, 2)
+    broadcaster = EVBroadcaster(heartbeat=0.01)
+    broadcaster.publish([opportunity("Team A", 2.0), opportunity("Team B", 3.0)])
+
+    for last_event_id in (other.event_id(1), other.event_id(2), "garbage"):
+        (event, event_id, data), (hello, _, _) = take(broadcaster.subscribe(last_event_id), 2)
+        assert (event, event_id, hello) == ("sync", broadcaster.event_id(1), "hello")
+        assert sorted(row["team"] for row in data["rows"]) == ["Team A", "Team B"]
+
+
+def test_position_out_of_the_buffer_gets_the_full_state():
+    broadcaster = EVBroadcaster(buffer_size=4, heartbeat=0.01)
+    publish_many(broadcaster, 10)
+    for seq in (1, 50):
+        (event, event_id, data), _ = take(broadcaster.subscribe(broadcaster.event_id(seq)), 2)
+        assert (event, event_id) == ("sync", broadcaster.event_id(10))
+        assert [row["ev_percentage"] for row in data["rows"]] == [10.0]
+
+
+def test_stream_prefers_last_event_id_over_the_page_position(monkeypatch):
+    broadcaster = EVBroadcaster(heartbeat=0.01)
+    publish_many(broadcaster, 300)
+    monkeypatch.setattr(index, "ev_broadcaster", broadcaster)
+
+    response = index.app.test_client().get(
+        "/ev/stream", query_string={"since": broadcaster.event_id(1)},
+        headers={"Last-Event-ID": broadcaster.event_id(299)})
+    messages = take(iter(response.response), 2)
+    response.close()
+    assert [(event, event_id) for event, event_id, _ in messages] == [
+        ("hello", None), ("diff", broadcaster.event_id(300))]
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+
+import pytest
+
+from history import COLUMNS, SERIES_COLUMNS, OddsHistoryStore
+
+BOOKS = ["DraftKings", "FanDuel", "BetMGM"]
+SERIES_KEY = [COLUMNS.index(column) for column in SERIES_COLUMNS]
+PRICE = COLUMNS.index("price")
+
+
+def random_poll(rng, captured_at):
+    """One poll's rows: a few series, prices that often repeat, some without a point."""
+    rows = []
+    for event in range(3):
+        for book in BOOKS:
+            for selection, point in (("Over", 24.5), ("Under", 24.5), ("Home", None)):
+                if rng.random() < 0.2:
+                    continue  # book didn't quote it this time
+                rows.append((captured_at, "basketball_nba", f"event{event}", "2030-01-01T00:00:00Z",
+                             "player_points", selection, "Player A" if point else "", point, book,
+                             rng.choice([-110, -110, -110, -105, 100])))
+    return rows
+
+
+def brute_force_compact(rows):
+    """What a full-table compaction leaves: rows whose price differs from the previous one in their series."""
+    kept = []
+    previous = {}
+    for row in sorted(rows, key=lambda row: row[0]):
+        series = tuple(row[i] for i in SERIES_KEY)
+        if previous.get(series) != row[PRICE]:
+            kept.append(row)
+        previous[series] = row[PRICE]
+    return kept
+
+
+def stored_rows(store):
+    with store._lock:
+        return store._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM odds_history ORDER BY captured_at, rowid"
+        ).fetchall()
+
+
+def mismatches(actual, expected):
+    actual, expected = sorted(map(repr, actual)), sorted(map(repr, expected))
+    return [row for row in actual if row not in expected][:5] + [row for row in expected if row not in actual][:5]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_compaction_matches_full_compaction(tmp_path, seed):
+    rng = random.Random(seed)
+    path = str(tmp_path / "history.sqlite")
+    captured_at = time.time() - 3600
+    expected = []
+    store = OddsHistoryStore(path, compact_interval=float("inf"))
+    for round_ in range(8):
+        for _ in range(rng.randint(1, 4)):
+            captured_at += 60
+            rows = random_poll(rng, captured_at)
+            store.record_rows(rows)
+            expected.extend(rows)
+        store.compact()
+        expected = brute_force_compact(expected)
+        assert mismatches(stored_rows(store), expected) == []
+        if round_ % 3 == 2:
+            # The watermark is kept in the file, so a new process carries on from it
+            store.close()
+            store = OddsHistoryStore(path, compact_interval=float("inf"))
+    store.close()
+
+
+def test_compaction_only_reads_rows_since_the_last_one(tmp_path):
+    store = OddsHistoryStore(str(tmp_path / "history.sqlite"), compact_interval=float("inf"))
+    rows = random_poll(random.Random(0), time.time())
+    store.record_rows(rows)
+    assert store.compact() == 0
+    # An identical poll later on repeats every price: all of it goes, the first poll stays
+    store.record_rows([(row[0] + 60,) + row[1:] for row in rows])
+    assert store.compact() == len(rows)
+    assert len(stored_rows(store)) == len(rows)
+    assert store.compact() == 0
+    store.close()
+
+
+def test_retention_drops_old_rows(tmp_path):
+    store = OddsHistoryStore(str(tmp_path / "history.sqlite"), retention_days=1, compact_interval=float("inf"))
+    rng = random.Random(1)
+    old = random_poll(rng, time.time() - 2 * 86400)
+    new = random_poll(rng, time.time())
+    store.record_rows(old + new)
+    store.compact()
+    assert [row for row in stored_rows(store) if row[0] < time.time() - 86400] == []
+    assert mismatches(stored_rows(store), brute_force_compact(new)) == []
+    store.close()
+
+
+def test_record_rows_does_not_wait_for_compaction(tmp_path):
+    store = OddsHistoryStore(str(tmp_path / "history.sqlite"), compact_interval=0)
+    started, release = threading.Event(), threading.Event()
+    compactions = []
+
+    def slow_compact():
+        compactions.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+
+    store.compact = slow_compact
+    rows = random_poll(random.Random(2), time.time())
+    assert store.record_rows(rows) == len(rows)
+    assert started.wait(5)
+    # A compaction is still running: more writes go through and don't start another
+    assert store.record_rows(rows) == len(rows)
+    release.set()
+    store.close()
+    assert compactions == ["history-compact"]
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from odds_client import OddsApiClient, QuotaExhaustedError
+
+
+class StubOddsApi:
+    """
+    Local HTTP server standing in for The Odds API. Each request gets the next
+    scripted (status, headers, body) response; every request is logged with
+    its path, query and arrival time.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                stub.requests.append({"path": url.path, "query": parse_qs(url.query), "at": time.monotonic()})
+                status, headers, body = stub.responses.pop(0)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v4"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def script(self, *responses):
+        self.responses.extend(responses)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubOddsApi()
+    yield server
+    server.close()
+
+
+def make_client(stub, **options):
+    options.setdefault("backoff_base", 0.01)
+    return OddsApiClient("test-key", base_url=stub.url, **options)
+
+
+def test_retries_429_until_success(stub):
+    stub.script((429, {}, {"message": "slow down"}),
+                (429, {}, {"message": "slow down"}),
+                (200, {}, [{"id": "ev1"}]))
+    client = make_client(stub, max_retries=3)
+
+    assert client.get("/sports/basketball_nba/odds", {"regions": "us"}) == [{"id": "ev1"}]
+    assert len(stub.requests) == 3
+    for sent in stub.requests:
+        assert sent["path"] == "/v4/sports/basketball_nba/odds"
+        assert sent["query"] == {"regions": ["us"], "apiKey": ["test-key"]}
+
+
+def test_waits_for_retry_after(stub):
+    stub.script((429, {"Retry-After": "0.3"}, {}), (200, {}, []))
+    client = make_client(stub)
+
+    client.get("/sports")
+    first, second = stub.requests
+    assert second["at"] - first["at"] >= 0.3
+
+
+def test_retry_after_is_not_cut_to_the_backoff_cap(stub):
+    stub.script((429, {"Retry-After": "0.3"}, {}), (200, {}, []))
+    client = make_client(stub, backoff_cap=0.05)
+
+    client.get("/sports")
+    first, second = stub.requests
+    assert second["at"] - first["at"] >= 0.3
+
+
+def test_gives_up_when_retry_after_is_too_long(stub):
+    stub.script((429, {"Retry-After": "120"}, {}), (200, {}, []))
+    client = make_client(stub, retry_after_cap=1.0)
+
+    start = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        client.get("/sports")
+    assert time.monotonic() - start < 1
+    assert len(stub.requests) == 1
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.script((503, {}, {}), (503, {}, {}))
+    client = make_client(stub, max_retries=1)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("/sports")
+    assert len(stub.requests) == 2
+
+
+def test_does_not_retry_client_errors(stub):
+    stub.script((401, {}, {"message": "bad key"}))
+    client = make_client(stub)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("/sports")
+    assert len(stub.requests) == 1
+
+
+def test_tracks_quota_headers(stub):
+    stub.script((200, {"x-requests-remaining": "498", "x-requests-used": "2", "x-requests-last": "1"}, []),
+                (429, {"x-requests-remaining": "495.0", "x-requests-used": "5"}, {}),
+                (200, {"x-requests-remaining": "bogus", "x-requests-used": "6"}, []))
+    client = make_client(stub)
+    assert client.quota == {"remaining": None, "used": None, "last_cost": None}
+
+    client.get("/sports")
+    assert client.quota == {"remaining": 498, "used": 2, "last_cost": 1}
+
+    # Error responses update the quota too; unparseable values are ignored
+    client.get("/sports")
+    assert client.quota == {"remaining": 495, "used": 6, "last_cost": 1}
+
+
+def test_quota_reserve_stops_requests(stub):
+    stub.script((200, {"x-requests-remaining": "10"}, []))
+    client = make_client(stub, quota_reserve=10)
+    assert client.can_spend()
+
+    client.get("/sports")
+    assert not client.can_spend()
+    with pytest.raises(QuotaExhaustedError):
+        client.get("/sports")
+    with pytest.raises(QuotaExhaustedError):
+        client.get_stream("/sports", None, json.load)
+    assert len(stub.requests) == 1
+
+
+def test_get_stream_hands_over_the_body(stub):
+    stub.script((200, {}, {"id": "ev1", "bookmakers": []}))
+    client = make_client(stub)
+
+    assert client.get_stream("/sports/basketball_nba/events/ev1/odds", None, json.load) == {
+        "id": "ev1", "bookmakers": []}
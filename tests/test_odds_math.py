@@ -0,0 +1,160 @@
+"""
+Property tests: the lookup-table conversions in odds_math give exactly what
+the formulas they replaced give, across the whole range of prices.
+"""
+import math
+import random
+from contextlib import contextmanager
+
+import pytest
+
+import odds_math
+
+LIMIT = odds_math.TABLE_LIMIT + 500
+
+
+# The conversions as they were before odds_math
+
+def reference_implied_probability(odds):
+    if odds > 0:
+        implied_probability = 100 / (odds + 100)
+    else:
+        implied_probability = abs(odds) / (abs(odds) + 100)
+    return implied_probability
+
+
+def reference_american_to_decimal(american_odds):
+    if american_odds < 0:
+        return 1 + (100 / abs(american_odds))
+    else:
+        return 1 + (american_odds / 100)
+
+
+def reference_decimal_to_american(decimal_odds):
+    if decimal_odds <= 1.0:
+        return 0
+    elif decimal_odds < 2.0:
+        return int(-100 / (decimal_odds - 1))
+    else:
+        return int((decimal_odds - 1) * 100)
+
+
+def same(a, b):
+    """Identical results: equal values of the same type, down to the sign of zero."""
+    return type(a) is type(b) and repr(a) == repr(b)
+
+
+def whole_prices():
+    """Every whole price in and just past the table, as ints and as floats."""
+    prices = list(range(-LIMIT, LIMIT + 1))
+    return prices + [float(price) for price in prices]
+
+
+def edge_prices():
+    """The +/-100 boundary and the usual suspects around it."""
+    prices = [0, 0.0, -0.0, True, False, 1e9, -1e9, 10 ** 12, -10 ** 12]
+    for edge in (100, -100, 99, -99, 101, -101):
+        prices += [edge, float(edge), edge + 0.5, edge - 0.5,
+                   math.nextafter(edge, math.inf), math.nextafter(edge, -math.inf)]
+    return prices
+
+
+def fractional_prices(count=50000, seed=0):
+    rng = random.Random(seed)
+    prices = [rng.uniform(-LIMIT, LIMIT) for _ in range(count)]
+    prices += [rng.uniform(-200, 200) for _ in range(count)]
+    prices += [rng.randint(-10 ** 7, 10 ** 7) for _ in range(count)]
+    return prices
+
+
+PRICE_SETS = {"whole": whole_prices, "edges": edge_prices, "fractional": fractional_prices}
+CONVERSIONS = {
+    "american_to_decimal": (odds_math.american_to_decimal, reference_american_to_decimal),
+    "implied_probability": (odds_math.implied_probability, reference_implied_probability),
+}
+BATCHES = {
+    "decimal_odds": (odds_math.decimal_odds, reference_american_to_decimal),
+    "implied_probabilities": (odds_math.implied_probabilities, reference_implied_probability),
+}
+
+
+@pytest.mark.parametrize("prices", PRICE_SETS.values(), ids=PRICE_SETS.keys())
+@pytest.mark.parametrize("conversion", CONVERSIONS.values(), ids=CONVERSIONS.keys())
+def test_conversion_matches_formula(conversion, prices):
+    function, reference = conversion
+    mismatches = [price for price in prices() if not same(function(price), reference(price))]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("prices", PRICE_SETS.values(), ids=PRICE_SETS.keys())
+@pytest.mark.parametrize("batch", BATCHES.values(), ids=BATCHES.keys())
+def test_batch_matches_formula(batch, prices):
+    function, reference = batch
+    prices = prices()
+    results = function(prices)
+    assert len(results) == len(prices)
+    mismatches = [price for price, result in zip(prices, results) if not same(result, reference(price))]
+    assert mismatches == []
+
+
+def test_decimal_to_american_matches_formula():
+    rng = random.Random(0)
+    decimals = [rng.uniform(0.5, 200) for _ in range(100000)]
+    decimals += [rng.uniform(1.0, 2.1) for _ in range(100000)]
+    decimals += [american / 100 for american in range(-1000, 100001)]
+    for boundary in (1.0, 2.0):
+        decimals += [boundary, math.nextafter(boundary, 0), math.nextafter(boundary, 3)]
+    decimals += [odds_math.american_to_decimal(price) for price in range(-LIMIT, LIMIT + 1)]
+    mismatches = [value for value in decimals
+                  if not same(odds_math.decimal_to_american(value), reference_decimal_to_american(value))]
+    assert mismatches == []
+
+
+def test_table_covers_the_configured_range():
+    for table in (odds_math.DECIMAL_TABLE, odds_math.IMPLIED_TABLE):
+        assert set(table) == set(range(-odds_math.TABLE_LIMIT, odds_math.TABLE_LIMIT + 1))
+
+
+@contextmanager
+def reference_math(*modules):
+    """Patch the old formulas back into modules that import them from odds_math."""
+    references = {
+        "american_to_decimal": reference_american_to_decimal,
+        "implied_probability": reference_implied_probability,
+        "decimal_to_american": reference_decimal_to_american,
+        "decimal_odds": lambda prices: [reference_american_to_decimal(price) for price in prices],
+    }
+    saved = []
+    for module in modules:
+        for name, function in references.items():
+            if hasattr(module, name):
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, function)
+    try:
+        yield
+    finally:
+        for module, name, function in saved:
+            setattr(module, name, function)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_market_stages_unchanged(seed):
+    import arbitrage
+    import index
+    from props_stream import parse_props_payload
+    from synthetic import generate_props_payload, generate_standard_events
+
+    standard_events = generate_standard_events(8, 12, seed)
+    props_by_event = {payload["id"]: parse_props_payload(payload).props for payload in
+                      (generate_props_payload(event, 12, 40, seed) for event in standard_events)}
+    markets = [odds_by_book for _, odds_by_book in
+               index.collect_ev_markets(index.process_events(standard_events), props_by_event)]
+    stages = {
+        "calculate_positive_ev": lambda: [index.calculate_positive_ev(odds_by_book) for odds_by_book in markets],
+        "process_events": lambda: index.process_events(standard_events),
+        "find_arbitrage": lambda: arbitrage.find_arbitrage(standard_events, props_by_event),
+    }
+    with reference_math(index, arbitrage):
+        before = {name: repr(stage()) for name, stage in stages.items()}
+    changed = [name for name, stage in stages.items() if repr(stage()) != before[name]]
+    assert changed == []
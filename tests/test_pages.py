@@ -0,0 +1,174 @@
+import random
+from collections import OrderedDict
+
+import pytest
+
+import index
+from ev_stream import EVBroadcaster
+from props_stream import EventProps, parse_props_payload
+from render_cache import RenderCache
+from snapshot_cache import SnapshotCache
+from synthetic import generate_props_payload, generate_standard_events, jitter_prices
+
+
+def opportunity(team, ev):
+    return {"event_id": "event1", "commence_time": "2030-01-01T00:00:00Z", "home_team": "Home",
+            "away_team": "Away", "market_type": "Spread", "team": team, "line": "-3.5",
+            "best_book": "FanDuel", "best_odds": 105, "all_odds": {"FanDuel": 105, "BetMGM": -110},
+            "implied_probabilities": {"FanDuel": 0.49, "BetMGM": 0.52},
+            "individual_ev": {"FanDuel": 3.0, "BetMGM": -1.0}, "fair_odds": {"FanDuel": -104, "BetMGM": 100},
+            "avg_implied_probability": 0.5, "avg_american_odds": -102, "ev_percentage": ev,
+            "odds_variance": 0.01, "markets": 2}
+
+
+def shared_data(version, opportunities, data_versions=None, event_index=None):
+    """What the leader writes to disk for a snapshot."""
+    snapshot = {"events": [], "props_by_event": {}, "arbs": [], "scan_stats": {}, "event_index": event_index or {},
+                "data_versions": data_versions or {"standard": (version,), "props": {}},
+                "version": version, "updated_at": 0, "result_set": index.EVResultSet(opportunities)}
+    return index.snapshot_data(snapshot)
+
+
+def loaded_snapshot(version, opportunities, data_versions=None):
+    """A snapshot as a follower or cold start loads it, with the stream position still undecoded."""
+    return index.LoadedSnapshot(shared_data(version, opportunities, data_versions))
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(index, "render_cache", RenderCache())
+    monkeypatch.setattr(index, "ev_broadcaster", EVBroadcaster())
+    renders = []  # names of the pages rendered, in order
+    for name in ("render_index", "render_props", "render_ev_page"):
+        def counting_render(*args, _render=getattr(index, name), _name=name):
+            renders.append(_name)
+            return _render(*args)
+        monkeypatch.setattr(index, name, counting_render)
+    return index.app.test_client(), renders
+
+
+@pytest.fixture
+def cached_slate(monkeypatch):
+    """Two events and their props, already in a fresh odds cache, so pages render offline."""
+    monkeypatch.setattr(index, "odds_cache", SnapshotCache(first_version=1000))
+    monkeypatch.setattr(index, "event_index", {})
+    monkeypatch.setattr(index, "scans", index.SingleFlight())
+    sport = index.SPORTS[0]
+    events = generate_standard_events(2, 4, sport=sport)
+    index.odds_cache.set(index.standard_cache_key(sport), events)
+    index.index_events(sport, events)
+    payloads = {event["id"]: generate_props_payload(event, 4, 12) for event in events}
+    for event_id, payload in payloads.items():
+        store_props(payload)
+    return events, payloads
+
+
+def store_props(payload):
+    index.odds_cache.set(index.props_cache_key(payload["id"]),
+                         EventProps(payload, parse_props_payload(payload, index.props_markets_for).props))
+
+
+def test_ev_page_is_rendered_once_per_odds_version(app, monkeypatch):
+    client, renders = app
+    snapshot = loaded_snapshot(1, [opportunity("Team A", 3.0), opportunity("Team B", 2.0)])
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+
+    first = client.get("/ev")
+    second = client.get("/ev")
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data
+    assert len(renders) == 1
+
+    snapshot = loaded_snapshot(2, [opportunity("Team A", 4.0)])
+    client.get("/ev")
+    client.get("/ev")
+    assert len(renders) == 2
+
+
+def test_snapshot_pages_follow_the_versions_of_what_they_show(app, monkeypatch):
+    client, renders = app
+    data_versions = {"standard": (10,), "props": {"event1": 20, "event2": 30}}
+    snapshot = loaded_snapshot(1, [opportunity("Team A", 3.0)], data_versions)
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+    for path in ("/", "/ev"):
+        client.get(path)
+
+    # A new snapshot in which only event2's props moved
+    data_versions = {"standard": (10,), "props": {"event1": 20, "event2": 31}}
+    snapshot = loaded_snapshot(2, [opportunity("Team A", 3.5)], data_versions)
+    for path in ("/", "/ev"):
+        assert client.get(path).status_code == 200
+    assert (renders.count("render_index"), renders.count("render_ev_page")) == (1, 2)
+
+
+def test_cached_pages_follow_the_versions_of_what_they_show(app, cached_slate):
+    client, renders = app
+    events, payloads = cached_slate
+    first, second = (event["id"] for event in events)
+    paths = ["/", f"/props/{first}", f"/props/{second}", "/ev"]
+    for path in paths * 2:
+        assert client.get(path).status_code == 200
+    assert renders == ["render_index", "render_props", "render_props", "render_ev_page"]
+
+    # Only the second event's props move: its page and /ev are rendered again, nothing else
+    store_props(jitter_prices(payloads[second], random.Random(0)))
+    for path in paths:
+        client.get(path)
+    assert renders[4:] == ["render_props", "render_ev_page"]
+
+    # New standard odds change every page
+    index.odds_cache.set(index.standard_cache_key(index.SPORTS[0]), jitter_prices(events, random.Random(1)))
+    for path in paths:
+        client.get(path)
+    assert renders[6:] == ["render_index", "render_props", "render_props", "render_ev_page"]
+
+
+def test_ev_page_embeds_the_position_it_was_rendered_at(app, monkeypatch):
+    client, _ = app
+    snapshot = loaded_snapshot(1, [opportunity("Team A", 3.0)])
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+
+    html = client.get("/ev").get_data(as_text=True)
+    assert f"since={index.ev_broadcaster.stream_id}%3A1" in html
+
+
+def test_market_dropdown_lists_the_market_types_on_the_board(app, monkeypatch):
+    client, _ = app
+    pass_yards = dict(opportunity("QB", 4.0), market_type="Player Pass Yds")
+    saves = dict(opportunity("Goalie", 2.5), market_type="Player Saves")
+    snapshot = loaded_snapshot(1, [opportunity("Team A", 3.0), pass_yards, saves])
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+
+    html = client.get("/ev", query_string={"market": "Player Pass Yds"}).get_data(as_text=True)
+    assert '<option value="Player Pass Yds" selected>' in html
+    assert '<option value="Player Saves" >' in html
+    assert "QB" in html and "Goalie" not in html and "Team A" not in html
+
+    teams = {row["team"] for row in client.get("/api/ev", query_string={"market": "Player Saves"}).get_json()["data"]}
+    assert teams == {"Goalie"}
+    assert len(client.get("/api/ev", query_string={"market": "all"}).get_json()["data"]) == 3
+
+
+def test_follower_forgets_events_that_left_the_board(app, monkeypatch):
+    client, _ = app
+    monkeypatch.setattr(index, "event_index", {})
+    monkeypatch.setattr(index, "unknown_events", OrderedDict())
+    lookups = []
+    def get_props_odds_data(event_id):
+        lookups.append(event_id)
+        return EventProps(None, {})  # the per-event endpoint no longer knows it
+    monkeypatch.setattr(index, "get_props_odds_data", get_props_odds_data)
+
+    summaries = {event_id: {"event_id": event_id, "away_team": "Away", "home_team": "Home",
+                            "commence_time": "", "sport_key": index.SPORTS[0]}
+                 for event_id in ("finished", "live", "upcoming")}
+    snapshot = index.load_shared_snapshot(shared_data(1, [], event_index={
+        event_id: summaries[event_id] for event_id in ("finished", "live")}))
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+    snapshot = index.load_shared_snapshot(shared_data(2, [], event_index={
+        event_id: summaries[event_id] for event_id in ("live", "upcoming")}))
+
+    assert index.event_index == {"live": summaries["live"], "upcoming": summaries["upcoming"]}
+    for _ in range(3):
+        assert client.get("/props/finished").status_code == 404
+    assert lookups == ["finished"]  # then remembered as unknown
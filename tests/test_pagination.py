@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+import index
+from pagination import (BadRequest, decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor,
+                        paginate, paginate_ranked, top_k)
+
+
+def random_opportunities(rng, count):
+    # EVs on a coarse grid, so plenty of ties
+    return [{"event_id": f"event{i % 7}", "market_type": rng.choice(["Spread", "Player Points"]),
+             "team": f"Team {i}", "line": rng.choice(["-3.5", "Over 24.5"]),
+             "ev_percentage": round(rng.uniform(0, 5) * 4) / 4}
+            for i in range(count)]
+
+
+def walk(items, limit, rank):
+    """Every page of items, following next cursors."""
+    pages, after = [], None
+    while True:
+        page, cursor = paginate_ranked(items, after, limit, rank)
+        pages.append(page)
+        if cursor is None:
+            return pages
+        after = decode_rank_cursor(cursor)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_k_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    items = random_opportunities(rng, 200)
+    for k in (0, 1, 10, 200, 500):
+        assert top_k(items, k, index.ev_rank) == sorted(items, key=index.ev_rank)[:k]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50, 500])
+def test_ranked_pages_cover_the_list_once_in_order(limit):
+    items = random_opportunities(random.Random(limit), 120)
+    pages = walk(items, limit, index.ev_rank)
+    assert [item for page in pages for item in page] == sorted(items, key=index.ev_rank)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_ranked_cursor_survives_reranking():
+    rng = random.Random(0)
+    items = random_opportunities(rng, 60)
+    first, cursor = paginate_ranked(items, None, 10, index.ev_rank)
+    ranked = sorted(items, key=index.ev_rank)
+
+    # Before the next page: the top item drops off and another one jumps to the top
+    ranked[0]["ev_percentage"] = -1.0
+    ranked[30]["ev_percentage"] = 99.0
+    second, _ = paginate_ranked(items, decode_rank_cursor(cursor), 10, index.ev_rank)
+
+    # An offset cursor would have skipped ranked[10]
+    assert second[0] is ranked[10]
+    assert not any(item in first for item in second)
+    assert ranked[30] not in second  # moved ahead of the cursor, so it belongs to page one now
+
+
+def test_offset_cursor_round_trip():
+    assert decode_cursor(None) == 0
+    assert decode_cursor(encode_cursor(40)) == 40
+    page, cursor = paginate(list(range(10)), 4, 3)
+    assert page == [4, 5, 6] and decode_cursor(cursor) == 7
+    assert paginate(list(range(10)), 8, 3) == ([8, 9], None)
+
+
+def test_rank_cursor_round_trip():
+    assert decode_rank_cursor(None) is None
+    assert decode_rank_cursor(encode_rank_cursor((-2.5, "event1|Spread|Team|-3.5"))) == (-2.5, "event1|Spread|Team|-3.5")
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", encode_cursor(5), "e30"])
+def test_bad_rank_cursors_are_rejected(cursor):
+    with pytest.raises(BadRequest):
+        decode_rank_cursor(cursor)
+
+
+def test_rank_cursor_of_the_wrong_shape_is_rejected():
+    items = random_opportunities(random.Random(1), 5)
+    with pytest.raises(BadRequest):
+        paginate_ranked(items, ("event1", 2.5), 2, index.ev_rank)
+
+
+@pytest.mark.parametrize("cursor", ["garbage!", encode_cursor(-1), encode_rank_cursor((1.0, "x"))])
+def test_bad_offset_cursors_are_rejected(cursor):
+    with pytest.raises(BadRequest):
+        decode_cursor(cursor)
+
+
+def test_api_ev_pages_follow_the_cursor(monkeypatch):
+    items = random_opportunities(random.Random(2), 30)
+    opportunities = sorted(items, key=lambda ev: ev["ev_percentage"], reverse=True)
+    snapshot = {"result_set": index.EVResultSet(opportunities)}
+    monkeypatch.setattr(index, "latest_snapshot", lambda: snapshot)
+    client = index.app.test_client()
+
+    seen, cursor = [], None
+    while True:
+        query = {"limit": 8, "min_ev": -100, "fields": "team,ev_percentage"}
+        if cursor:
+            query["cursor"] = cursor
+        body = client.get("/api/ev", query_string=query).get_json()
+        assert body["total"] == len(items)
+        seen.extend(row["team"] for row in body["data"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [ev["team"] for ev in sorted(items, key=index.ev_rank)]
+
+    assert client.get("/api/ev", query_string={"cursor": "garbage!"}).status_code == 400
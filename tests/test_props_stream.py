@@ -0,0 +1,128 @@
+import io
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+import props_stream
+from props_stream import parse_props_payload
+from synthetic import generate_props_payload, generate_standard_events
+
+
+def markets_for(sport):
+    return "player_points,player_assists,player_rebounds,player_threes"
+
+
+def slate_payload(n_books=4, n_props=24):
+    return generate_props_payload(generate_standard_events(1, 4)[0], n_books, n_props)
+
+
+def irregular_payload():
+    """Outcomes the pairing has to skip or keep first-come, plus non-ASCII names and a non-player market."""
+    outcomes = [
+        {"name": "Under", "description": "Only Under", "price": -110, "point": 5.5},
+        {"name": "Over", "description": "Nikola Jokić", "price": 120, "point": 10.5},
+        {"name": "Over", "description": "Nikola Jokić", "price": 999, "point": 11.5},
+        {"name": "Under", "description": "Nikola Jokić", "price": -140, "point": 10.5},
+        {"name": "Over", "description": "No Under", "price": 101.5, "point": 3.5},
+        {"name": "Yes", "description": "Nikola Jokić", "price": 200},
+        {"name": "Over", "price": 100, "point": 1.5},
+    ]
+    return {"id": "event1", "sport_key": "basketball_nba", "home_team": "Home \"Quoted\"", "away_team": "Away",
+            "commence_time": "2030-01-01T00:00:00Z",
+            "bookmakers": [
+                {"key": "a", "title": "BookA", "markets": [{"key": "h2h", "outcomes": []},
+                                                            {"key": "player_rebounds", "outcomes": outcomes}]},
+                {"key": "b", "title": "BookB", "markets": [{"key": "player_double_double", "outcomes": outcomes}]},
+                {"key": "c", "title": "BookC", "markets": []},
+            ]}
+
+
+class TrickleStream:
+    """Binary stream that returns at most chunk bytes per sized read, like a slow response."""
+
+    def __init__(self, data, chunk):
+        self.data = io.BytesIO(data)
+        self.chunk = chunk
+
+    def read(self, size=-1):
+        if size is not None and size >= 0:
+            size = min(size, self.chunk)
+        return self.data.read(size)
+
+
+@pytest.fixture(params=["ijson", "json"])
+def backend(request, monkeypatch):
+    """Run the streamed path with ijson, and as if it weren't installed."""
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(props_stream, "load_ijson", lambda: None)
+    return request.param
+
+
+def parse_recording(source):
+    calls = []
+    result = parse_props_payload(source, markets_for,
+                                 on_bookmaker=lambda event, bookmaker: calls.append((dict(event), bookmaker)))
+    return result, calls
+
+
+@pytest.mark.parametrize("payload", [slate_payload(), irregular_payload()], ids=["slate", "irregular"])
+@pytest.mark.parametrize("chunk", [1, 7, 65536])
+def test_streamed_payload_matches_the_decoded_one(backend, payload, chunk):
+    expected, expected_calls = parse_recording(payload)
+    result, calls = parse_recording(TrickleStream(json.dumps(payload).encode(), chunk))
+
+    assert result == expected
+    assert calls == expected_calls
+    assert [bookmaker["title"] for _, bookmaker in calls] == [b["title"] for b in payload["bookmakers"]]
+
+
+def test_irregular_outcomes_are_paired_as_documented():
+    props = parse_props_payload(irregular_payload(), markets_for).props
+    assert list(props) == ["points", "assists", "rebounds", "threes", "double_double"]
+    assert props["points"] == {}
+    rebounds = props["rebounds"]
+    assert list(rebounds) == ["Nikola Jokić_10.5", "No Under_3.5"]
+    assert rebounds["Nikola Jokić_10.5"]["books"]["BookA"] == {"point": 10.5, "over_price": 120, "under_price": -140}
+    assert rebounds["No Under_3.5"]["books"]["BookA"]["under_price"] is None
+
+
+def test_header_fields_reach_the_splice_before_the_first_bookmaker(backend):
+    # A header longer than ijson's first read, so the splice has to replay part of it
+    payload = dict(irregular_payload(), home_team="H" * 100_000)
+    seen = []
+    parse_props_payload(io.BytesIO(json.dumps(payload).encode()),
+                        on_bookmaker=lambda event, bookmaker: seen.append(event.get("home_team")))
+    assert seen == [payload["home_team"]] * len(payload["bookmakers"])
+
+
+def test_load_ijson_is_none_without_the_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "ijson", None)
+    props_stream.load_ijson.cache_clear()
+    try:
+        assert props_stream.load_ijson() is None
+    finally:
+        props_stream.load_ijson.cache_clear()
+
+
+def peak_memory(parse):
+    tracemalloc.start()
+    try:
+        parse()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_keeps_the_document_out_of_memory():
+    pytest.importorskip("ijson")
+    body = json.dumps(slate_payload(n_books=30, n_props=300)).encode()
+
+    streamed = peak_memory(lambda: parse_props_payload(io.BytesIO(body), markets_for))
+    decoded = peak_memory(lambda: parse_props_payload(json.load(io.BytesIO(body)), markets_for))
+    # The decoded path holds every bookmaker at once; streaming only ever one,
+    # plus the formatted props both paths return
+    assert streamed < 0.6 * decoded
@@ -0,0 +1,194 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class Caller(threading.Thread):
+    """Runs flight.do(key, fn, timeout) in its own thread and keeps the outcome."""
+
+    def __init__(self, flight, key, fn, timeout=None):
+        super().__init__(daemon=True)
+        self.args = (key, fn, timeout)
+        self.flight = flight
+        self.result = self.error = None
+
+    def run(self):
+        try:
+            self.result = self.flight.do(*self.args)
+        except BaseException as e:
+            self.error = e
+
+
+def start_leader(flight, key, fn):
+    """A caller that is known to be the leader for key once this returns."""
+    leader = Caller(flight, key, fn)
+    leader.start()
+    wait_until(lambda: flight.in_flight(key))
+    return leader
+
+
+def start_waiters(flight, key, fn, count, timeout=None):
+    """count callers that are known to be waiting on key's leader once this returns."""
+    shared = flight.stats["shared"]
+    waiters = [Caller(flight, key, fn, timeout) for _ in range(count)]
+    for waiter in waiters:
+        waiter.start()
+    wait_until(lambda: flight.stats["shared"] == shared + count)
+    return waiters
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait()
+        return {"value": 42}
+
+    leader = start_leader(flight, "key", fn)
+    waiters = start_waiters(flight, "key", fn, 8)
+    release.set()
+    for caller in [leader] + waiters:
+        caller.join(5)
+        assert caller.error is None
+        assert caller.result is leader.result
+    assert leader.result == {"value": 42}
+    assert len(calls) == 1
+    assert flight.stats == {"leaders": 1, "shared": 8, "errors": 0, "cancelled": 0}
+    assert not flight.in_flight("key")
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key * 2) for key in (1, 2, 1)] == [2, 4, 2]
+    assert flight.stats["leaders"] == 3
+
+
+def test_error_is_raised_in_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        release.wait()
+        raise ValueError("upstream down")
+
+    leader = start_leader(flight, "key", fail)
+    waiters = start_waiters(flight, "key", fail, 5)
+    release.set()
+    for caller in [leader] + waiters:
+        caller.join(5)
+        assert isinstance(caller.error, ValueError)
+        assert str(caller.error) == "upstream down"
+    assert len(calls) == 1
+    assert flight.stats["errors"] == 1
+
+    # Failures aren't remembered: the next call runs fn again
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_interrupted_leader_hands_over_to_a_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(threading.current_thread())
+        if len(calls) == 1:
+            release.wait()
+            raise KeyboardInterrupt
+        return "second run"
+
+    leader = start_leader(flight, "key", fn)
+    waiters = start_waiters(flight, "key", fn, 4)
+    release.set()
+    leader.join(5)
+    for waiter in waiters:
+        waiter.join(5)
+
+    # Only the interrupted thread sees the interruption; one waiter reruns fn for all of them
+    assert isinstance(leader.error, KeyboardInterrupt)
+    assert all(waiter.error is None and waiter.result == "second run" for waiter in waiters)
+    assert len(calls) == 2
+    assert calls[0] is leader and calls[1] in waiters
+    assert flight.stats["cancelled"] == 1
+    assert flight.stats["leaders"] == 2
+    assert not flight.in_flight("key")
+
+
+def test_interrupted_leader_without_waiters():
+    flight = SingleFlight()
+
+    def interrupted():
+        raise SystemExit
+
+    with pytest.raises(SystemExit):
+        flight.do("key", interrupted)
+    assert not flight.in_flight("key")
+    assert flight.do("key", lambda: "fresh") == "fresh"
+    assert not flight.in_flight("key")
+    assert flight.stats == {"leaders": 2, "shared": 0, "errors": 0, "cancelled": 1}
+
+
+def test_waiter_timeout_leaves_the_call_running():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def slow():
+        release.wait()
+        return "done"
+
+    leader = start_leader(flight, "key", slow)
+    impatient = start_waiters(flight, "key", slow, 1, timeout=0.05)[0]
+    patient = start_waiters(flight, "key", slow, 1)[0]
+    impatient.join(5)
+    assert isinstance(impatient.error, TimeoutError)
+    assert flight.in_flight("key")
+
+    release.set()
+    for caller in (leader, patient):
+        caller.join(5)
+        assert caller.error is None and caller.result == "done"
+    assert flight.stats == {"leaders": 1, "shared": 2, "errors": 0, "cancelled": 0}
+
+
+def test_timeout_does_not_apply_to_the_leader():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: time.sleep(0.05) or "slow", timeout=0.01) == "slow"
+
+
+@pytest.mark.parametrize("rounds", [50])
+def test_no_call_is_lost_under_contention(rounds):
+    flight = SingleFlight()
+    counter = {"runs": 0}
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            counter["runs"] += 1
+        time.sleep(0.0005)
+        return "ok"
+
+    callers = [Caller(flight, "key", fn) for _ in range(rounds)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(5)
+    assert all(caller.result == "ok" for caller in callers)
+    assert counter["runs"] == flight.stats["leaders"]
+    assert flight.stats["leaders"] + flight.stats["shared"] == rounds
+    assert not flight.in_flight("key")